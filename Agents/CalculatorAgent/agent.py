@@ -1,12 +1,13 @@
 from Agents.agent_base import AgentBase
 from Modules.MessageProcessor.message_processor import Message
 from SqlDB.conversation_history import ConversationHistoryService
-from langchain_openai import ChatOpenAI
-from langchain_core.messages import HumanMessage, SystemMessage, AIMessage, ToolMessage
+from langchain_core.messages import HumanMessage, SystemMessage, AIMessage, ToolMessage, message_chunk_to_message
+from langchain_core.runnables import RunnableConfig
 from langgraph.graph import MessagesState, START, StateGraph
 from langgraph.prebuilt import tools_condition, ToolNode
-from langgraph.checkpoint.memory import MemorySaver
 from config import Config
+from Modules.OpenAI.llm_client_registry import get_chat_model
+from Modules.ConversationMemory import to_chat_message
 from typing import Any, Callable
 from .tools import add, subtract, multiply, divide, pow, sqrt
 
@@ -15,11 +16,7 @@ class CalculatorAgent(AgentBase):
         super().__init__(user_id, agent_id, agent_configuration, questionnaire_answers)
         self.conversation_service = ConversationHistoryService()
         self.config = Config.from_env()
-        self.llm = ChatOpenAI(
-            api_key=self.config.openai_api_key,
-            model=self.config.gpt_model,
-            temperature=self.agent_configuration.get('temperature', 0.2)
-        )
+        self.llm = get_chat_model(temperature=self.agent_configuration.get('temperature', 0.2))
         
         tools = [add, subtract, multiply, divide, pow, sqrt]
         print(f"Tools registered: {[tool.name for tool in tools]}")
@@ -29,32 +26,27 @@ class CalculatorAgent(AgentBase):
         
         self.llm_with_tools = self.llm.bind_tools(tools)
         
-        memory = MemorySaver()
-        self.react_graph = self._build_graph(tools, memory)
+        self._context_history = []
+        self.react_graph = self._build_graph(tools)
     
-    def _build_graph(self, tools, memory):
-        def assistant(state: MessagesState):
-            history = self.conversation_service.get_conversation_history(
-                self.user_id,
-                self.agent_id,
-                limit=5,
-                exclude_tool_calls=True
-            )
-            
-            history.reverse()
-            
-            system_msg = SystemMessage(content="You are a calculator. When asked to perform a calculation, you MUST use the available tools. Available tools: add (for addition), subtract (for subtraction), multiply (for multiplication), divide (for division), pow (for exponentiation), sqrt (for square root). After using tools and getting results, respond with ONLY the final numerical result - no explanations, no text, just the number.")
-            messages = [system_msg]
-            
-            for msg in history:
-                if msg['role'] == 'user':
-                    messages.append(HumanMessage(content=msg['content']))
-                elif msg['role'] == 'assistant':
-                    messages.append(AIMessage(content=msg['content']))
-            
+    SYSTEM_PROMPT = "You are a calculator. When asked to perform a calculation, you MUST use the available tools. Available tools: add (for addition), subtract (for subtraction), multiply (for multiplication), divide (for division), pow (for exponentiation), sqrt (for square root). After using tools and getting results, respond with ONLY the final numerical result - no explanations, no text, just the number."
+    
+    def _build_graph(self, tools):
+        async def assistant(state: MessagesState, config: RunnableConfig):
+            messages = [SystemMessage(content=self.SYSTEM_PROMPT)]
+            messages.extend(self._context_history)
             messages.extend(state["messages"])
             
-            result = self.llm_with_tools.invoke(messages)
+            # Tool call rounds stream no text, the final answer reaches the user as it is generated
+            stream_chunk = config["configurable"].get("stream_chunk")
+            result = None
+            accumulated = ""
+            async for chunk in self.llm_with_tools.astream(messages):
+                result = chunk if result is None else result + chunk
+                if chunk.content and stream_chunk:
+                    accumulated += chunk.content
+                    await stream_chunk(chunk.content, accumulated)
+            result = message_chunk_to_message(result)
             
             print(f"LLM response type: {type(result)}")
             print(f"LLM response content: {result.content if hasattr(result, 'content') else 'N/A'}")
@@ -77,10 +69,26 @@ class CalculatorAgent(AgentBase):
         builder.add_conditional_edges("assistant", tools_condition)
         builder.add_edge("tools", "assistant")
         
-        return builder.compile(checkpointer=memory)
+        # No checkpointer: each ask starts from an empty state, earlier turns
+        # reach the prompt only through the token budgeted _context_history
+        return builder.compile()
     
-    def _save_message(self, role: str, content: str, session_id: str):
-        self.conversation_service.save_message(
+    async def _load_context_history(self, prompt_messages: list):
+        history = await self.conversation_service.get_conversation_history(
+            self.user_id,
+            self.agent_id,
+            limit=5,
+            exclude_tool_calls=True
+        )
+        messages = [to_chat_message(msg) for msg in reversed(history)]
+        builder = self._get_context_builder()
+        self._context_history = builder.build(
+            [message for message in messages if message is not None],
+            reserved=builder.count_messages([SystemMessage(content=self.SYSTEM_PROMPT)] + prompt_messages)
+        )
+    
+    async def _save_message(self, role: str, content: str, session_id: str):
+        await self.conversation_service.save_message(
             self.user_id,
             self.agent_id,
             role,
@@ -117,11 +125,13 @@ class CalculatorAgent(AgentBase):
         session_id = f"{self.user_id}:{self.agent_id}"
         
         try:
-            config = {"configurable": {"thread_id": session_id}}
+            config = {"configurable": {"stream_chunk": stream_chunk}}
             messages = [HumanMessage(content=message.text)]
             
+            await self._load_context_history(messages)
+            
             print(f"Invoking react graph with message: {message.text}")
-            result = self.react_graph.invoke({"messages": messages}, config)
+            result = await self.react_graph.ainvoke({"messages": messages}, config)
             
             print(f"Graph result messages count: {len(result['messages'])}")
             for i, msg in enumerate(result['messages']):
@@ -144,13 +154,13 @@ class CalculatorAgent(AgentBase):
                 except ValueError:
                     response_content = numbers[-1]
             
-            self._save_message('user', message.text, session_id)
-            self._save_message('assistant', response_content, session_id)
+            await self._save_message('user', message.text, session_id)
+            await self._save_message('assistant', response_content, session_id)
             
             for msg in result['messages']:
                 if hasattr(msg, 'tool_calls') and msg.tool_calls:
                     for tool_call in msg.tool_calls:
-                        self._save_message('tool', f"{tool_call['name']}({tool_call.get('args', {})})", session_id)
+                        await self._save_message('tool', f"{tool_call['name']}({tool_call.get('args', {})})", session_id)
             
             return self.response(response_content)
         except Exception as e:
@@ -158,10 +168,15 @@ class CalculatorAgent(AgentBase):
             print(f"Error in ask: {e}")
             traceback.print_exc()
             error_msg = self._("Error processing calculation: {error}").format(error=str(e))
-            self._save_message('user', message.text, session_id)
-            self._save_message('assistant', error_msg, session_id)
+            await self._save_message('user', message.text, session_id)
+            await self._save_message('assistant', error_msg, session_id)
             return self.response(error_msg)
     
+    def close(self):
+        super().close()
+        self.llm_with_tools = None
+        self.react_graph = None
+    
     @property
     def name(self) -> str:
         return "calculator"
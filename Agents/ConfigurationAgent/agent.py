@@ -1,20 +1,16 @@
 from Agents.agent_base import AgentBase
-from langchain_openai import ChatOpenAI
 from config import Config
+from Modules.OpenAI.llm_client_registry import get_chat_model
 from typing import Any, Callable
 from Modules.MessageProcessor.message_processor import Message
 from Modules.CityHelper.city_helper import CityHelper
+from SqlDB.agent_item_cache import AgentItemCache
 
 class ConfigurationAgent(AgentBase):
     def __init__(self, user_id: str, agent_id: str, agent_configuration: dict, questionnaire_answers: dict = None):
         super().__init__(user_id, agent_id, agent_configuration, questionnaire_answers)
         self.config = Config.from_env()
-        self.llm = ChatOpenAI(
-            api_key=self.config.openai_api_key,
-            model=self.config.gpt_model,
-            temperature=0.1,
-            max_tokens=500
-        )
+        self.llm = get_chat_model(temperature=0.1, max_tokens=500)
         self.city_helper = CityHelper()
         self.configuration_steps = {
             'language': self._ask_language,
@@ -22,23 +18,23 @@ class ConfigurationAgent(AgentBase):
         }
     
     async def ask(self, message: Message, send_message: Callable[[str], Any], stream_chunk: Callable[[str, str], Any] = None) -> str:
-        self._save_user_message(message)
+        await self._save_user_message(message)
         
         if self._is_configuration_complete():
             response = self._("Configuration is already complete. You can now use other agents.")
-            self._save_assistant_message(response)
+            await self._save_assistant_message(response)
             return self.response(response)
         
         current_step = self._get_current_step()
         
         if current_step == 'language':
-            response = self._ask_language(message)
+            response = await self._ask_language(message)
         elif current_step == 'city':
-            response = self._ask_city(message)
+            response = await self._ask_city(message)
         else:
             response = self._("Configuration error. Please contact support.")
         
-        self._save_assistant_message(response)
+        await self._save_assistant_message(response)
         return self.response(response)
     
     def _is_configuration_complete(self) -> bool:
@@ -53,7 +49,7 @@ class ConfigurationAgent(AgentBase):
             return 'city'
         return 'complete'
     
-    def _ask_language(self, message: Message) -> str:
+    async def _ask_language(self, message: Message) -> str:
         """Ask user for their language preference"""
         if self.questionnaire_answers.get('language'):
             return self._("Language is already set. Moving to next step.")
@@ -63,7 +59,7 @@ class ConfigurationAgent(AgentBase):
             lang = message.text.strip().lower()
             if lang in ['en', 'pl']:
                 self.questionnaire_answers['language'] = lang
-                self._save_configuration()
+                await self._save_configuration()
                 self.refresh_translator()  # Refresh translator to use new language
                 return self._get_city_question()
             else:
@@ -82,7 +78,7 @@ Wpisz tylko dwie litery (en lub pl):"""
         else:
             return self._("What is your language? Insert two characters code:\nen - English\npl - Polski\n\nEnter only two characters (en or pl):")
     
-    def _ask_city(self, message: Message) -> str:
+    async def _ask_city(self, message: Message) -> str:
         """Ask user for their city"""
         if not self.questionnaire_answers.get('language'):
             return self._("Please set language first.")
@@ -97,8 +93,8 @@ Wpisz tylko dwie litery (en lub pl):"""
             
             # Validate city using geocoding
             try:
-                normalized_city = self.city_helper.normalize_city_name(city_name)
-                coordinates = self.city_helper.get_coordinates_from_geocoding(normalized_city)
+                normalized_city = await self.city_helper.normalize_city_name(city_name)
+                coordinates = await self.city_helper.get_coordinates_from_geocoding(normalized_city)
                 
                 if coordinates:
                     lat, lon = coordinates
@@ -108,7 +104,7 @@ Wpisz tylko dwie litery (en lub pl):"""
                         "lon": lon
                     }
                     self.questionnaire_answers['city'] = city_obj
-                    self._save_configuration()
+                    await self._save_configuration()
                     return self._("Configuration completed! You can now use other agents.")
                 else:
                     return self._get_city_error_message(user_lang)
@@ -134,10 +130,11 @@ Spróbuj ponownie:"""
         else:
             return self._("City name should be in the basic form. Examples of correct names:\n- Warszawa (not Warszawie)\n- Katowice (not Katowicach)\n- New York (not New Yorku)\n- London (not Londynie)\n- Paris (not Paryżu)\n\nPlease try again:")
     
-    def _save_configuration(self):
+    async def _save_configuration(self):
         """Save configuration to database via UserManager"""
         # Use the inherited _user_manager from the base class
-        self._user_manager.update_user_configuration(self.user_id, self.questionnaire_answers)
+        await self._user_manager.update_user_configuration(self.user_id, self.questionnaire_answers)
+        AgentItemCache().invalidate(self.user_id)
         print(f"Configuration saved for user {self.user_id}")
     
     @property
@@ -1,7 +1,8 @@
 from Agents.agent_base import AgentBase
-from langchain_openai import ChatOpenAI
+from Agents.streaming_utils import stream_llm_response
 from langchain_core.messages import HumanMessage, SystemMessage, AIMessage
 from config import Config
+from Modules.OpenAI.llm_client_registry import get_chat_model
 from typing import Any, Callable
 from Modules.MessageProcessor.message_processor import Message
 
@@ -9,27 +10,26 @@ class DefaultAgent(AgentBase):
     def __init__(self, user_id: str, agent_id: str, agent_configuration: dict, questionnaire_answers: dict = None):
         super().__init__(user_id, agent_id, agent_configuration, questionnaire_answers)
         self.config = Config.from_env()
-        self.llm = ChatOpenAI(
-            api_key=self.config.openai_api_key,
-            model=self.config.gpt_model,
-            temperature=self.agent_configuration.get('temperature', 0.7)
-        )
+        self.llm = get_chat_model(temperature=self.agent_configuration.get('temperature', 0.7))
     
     async def ask(self, message: Message, send_message: Callable[[str], Any], stream_chunk: Callable[[str, str], Any] = None) -> str:
         system_prompt = "You are a helpful AI assistant. CRITICAL: Keep your responses as SHORT as possible. Be concise, direct, and avoid unnecessary explanations. Use the minimum number of words needed to answer. Respond in the same language as the user's message."
         
-        chat_history = self._get_chat_history()
-        messages = [SystemMessage(content=system_prompt)] + chat_history + [HumanMessage(content=message.text)]
+        system_message = SystemMessage(content=system_prompt)
+        user_message = HumanMessage(content=message.text)
+        relevant_history = await self._get_relevant_history(message.text)
+        prompt_messages = [system_message, relevant_history] if relevant_history else [system_message]
+        chat_history = await self._get_chat_history(prompt_messages + [user_message])
+        messages = prompt_messages + chat_history + [user_message]
         
         try:
-            response = self.llm.invoke(messages)
-            response_content = response.content
+            response_content = await stream_llm_response(self.llm, messages, stream_chunk)
             
             if response_content == '':
                 raise Exception(self._("Response content is empty"))
             
-            self._save_user_message(message)
-            self._save_assistant_message(response_content)
+            await self._save_user_message(message)
+            await self._save_assistant_message(response_content)
             return self.response(response_content)
                 
         except Exception as e:
@@ -1,8 +1,8 @@
+import asyncio
 from datetime import datetime, UTC
 from .tools import get_sunrise, get_sunset
-from langchain_openai import ChatOpenAI
 from langchain_core.messages import HumanMessage, SystemMessage
-from config import Config
+from Modules.OpenAI.llm_client_registry import get_chat_model
 from Agents.agent_base import AgentBase
 from typing import Any, Callable
 from Modules.MessageProcessor.message_processor import Message
@@ -14,39 +14,36 @@ class TimeAgent(AgentBase):
     def __init__(self, user_id: str, agent_id: str, agent_configuration: dict, questionnaire_answers: dict = None):
         super().__init__(user_id, agent_id, agent_configuration, questionnaire_answers)
         self.description = "Agent responsible for time information, sunrise and sunset times"
-        config = Config.from_env()
-        
         if 'temperature' not in agent_configuration:
             raise ValueError("Temperature configuration not found for time agent")
         temperature = agent_configuration['temperature']
         
-        self.llm = ChatOpenAI(
-            model=config.gpt_model,
-            temperature=temperature,
-            openai_api_key=config.openai_api_key
-        )
+        self.llm = get_chat_model(temperature=temperature)
     
     @property
     def name(self) -> str:
         return "time"
         
     async def ask(self, message: Message, send_message: Callable[[str], Any], stream_chunk: Callable[[str, str], Any] = None) -> str:
-        self._save_user_message(message)
+        await self._save_user_message(message)
         
+        # The city lookup and the query type are independent LLM calls, the classification runs while the city is looked up
+        classification = asyncio.create_task(self._determine_query_type(message.text))
         try:
-            city_info = self.get_city_info(message)
-            self.current_city_name, self.current_city_lat, self.current_city_lon = city_info
-        except ValueError as e:
-            response = self._("Configuration error: {error}").format(error=str(e))
-            self._save_assistant_message(response)
-            return self.response(response)
-        except Exception as e:
-            response = self._("Error getting city information: {error}").format(error=str(e))
-            self._save_assistant_message(response)
+            city_info = await self.get_city_info(message)
+        except BaseException as e:
+            # Without a city there is nothing to answer, the classification call is dropped
+            classification.cancel()
+            if not isinstance(e, Exception):
+                raise
+            if isinstance(e, ValueError):
+                response = self._("Configuration error: {error}").format(error=str(e))
+            else:
+                response = self._("Error getting city information: {error}").format(error=str(e))
+            await self._save_assistant_message(response)
             return self.response(response)
-        
-        # Get query type considering the full conversation context
-        query_type = self._determine_query_type(message.text)
+        self.current_city_name, self.current_city_lat, self.current_city_lon = city_info
+        query_type = await classification
         
         if query_type == "sunrise":
             response = self._handle_sunrise_query()
@@ -57,10 +54,10 @@ class TimeAgent(AgentBase):
         else:
             response = self._("I'm sorry, I don't understand your request. Please try again.")
         
-        self._save_assistant_message(response)
+        await self._save_assistant_message(response)
         return self.response(response)
     
-    def _determine_query_type(self, message_text: str) -> str:
+    async def _determine_query_type(self, message_text: str) -> str:
         system_prompt = f"""You are a time agent that helps users get information about time including:
         - current time
         - time in a specific city
@@ -93,7 +90,7 @@ class TimeAgent(AgentBase):
         ]
         
         try:
-            response = self.llm.invoke(messages)
+            response = await self.llm.ainvoke(messages)
             return response.content.strip().lower()
         except Exception as e:
             print("Error determining query type: ", e)
@@ -1,8 +1,9 @@
-from langchain_openai import ChatOpenAI
+import asyncio
 from Agents.agent_base import AgentBase
 from Agents.WeatherAgent.tools import get_weather
 from Agents.WeatherAgent.response_formatter import format_weather_response
 from config import Config
+from Modules.OpenAI.llm_client_registry import get_chat_model
 from typing import Any, Callable
 from Modules.MessageProcessor.message_processor import Message
 
@@ -12,26 +13,22 @@ class WeatherAgent(AgentBase):
         super().__init__(user_id, agent_id, agent_configuration, questionnaire_answers)
         self.config = Config.from_env()
         temperature = self.agent_configuration.get('temperature')
-        self.llm = ChatOpenAI(
-            api_key=self.config.openai_api_key,
-            model=self.config.gpt_model,
-            temperature=temperature
-        )
+        self.llm = get_chat_model(temperature=temperature)
     
     async def ask(self, message: Message, send_message: Callable[[str], Any], stream_chunk: Callable[[str, str], Any] = None) -> str:
-        self._save_user_message(message)
-        response = self._get_response(message)
-        self._save_assistant_message(response)
+        await self._save_user_message(message)
+        response = await self._get_response(message)
+        await self._save_assistant_message(response)
         return self.response(response)
 
-    def _get_response(self, message: Message) -> str:
+    async def _get_response(self, message: Message) -> str:
         try:
-            city_name, lat, lon = self.get_city_info(message)
+            city_name, lat, lon = await self.get_city_info(message)
             
             if lat is None or lon is None:
                 return self._("I can't provide a weather forecast without knowing the city name. Please provide the city name or configure the default city in the settings.")
             
-            weather_data = get_weather(lat, lon)
+            weather_data = await asyncio.to_thread(get_weather, lat, lon)
             response = format_weather_response(weather_data, city_name, self._)
             
             return response
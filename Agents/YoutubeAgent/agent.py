@@ -1,12 +1,15 @@
+import asyncio
 from Agents.agent_base import AgentBase
 from Agents.streaming_utils import stream_llm_response
 from Modules.MessageProcessor.message_processor import Message
 from SqlDB.conversation_history import ConversationHistoryService
-from langchain_openai import ChatOpenAI
+from SqlDB.transcript_store import TranscriptStore, make_reference
 from langchain_core.messages import HumanMessage, SystemMessage, AIMessage
 from langgraph.graph import MessagesState, START, END, StateGraph
 from langgraph.checkpoint.memory import MemorySaver
 from config import Config
+from Modules.OpenAI.llm_client_registry import get_chat_model
+from Modules.ConversationMemory import to_chat_message
 from typing import Any, Callable
 from .youtube_tools import (
     extract_youtube_url,
@@ -29,15 +32,15 @@ class YoutubeAgentState(MessagesState):
     response: str | None
 
 class YoutubeAgent(AgentBase):
+    # Share of the context token budget a transcript may take, the conversation about it gets the rest
+    TRANSCRIPT_BUDGET_SHARE = 0.75
+    
     def __init__(self, user_id: str, agent_id: str, agent_configuration: dict, questionnaire_answers: dict = None):
         super().__init__(user_id, agent_id, agent_configuration, questionnaire_answers)
         self.conversation_service = ConversationHistoryService()
+        self.transcript_store = TranscriptStore()
         self.config = Config.from_env()
-        self.llm = ChatOpenAI(
-            api_key=self.config.openai_api_key,
-            model=self.config.gpt_model,
-            temperature=self.agent_configuration.get('temperature', 0.2)
-        )
+        self.llm = get_chat_model(temperature=self.agent_configuration.get('temperature', 0.2))
         memory = MemorySaver()
         self._send_message = None
         self._stream_chunk = None
@@ -61,15 +64,17 @@ class YoutubeAgent(AgentBase):
                 
                 video_id = extract_video_id(youtube_url)
                 user_language = self._get_user_language()
+                transcription_language = user_language
                 transcription = None
                 
                 try:
-                    transcription = fetch_transcription(youtube_url, language=user_language)
+                    transcription = await self._get_transcription(video_id, youtube_url, user_language)
                 except Exception:
                     if user_language != 'en':
                         await send_message(self._("Transcription not available in {language}. Trying English...").format(language=user_language))
                         try:
-                            transcription = fetch_transcription(youtube_url, language='en')
+                            transcription_language = 'en'
+                            transcription = await self._get_transcription(video_id, youtube_url, 'en')
                         except Exception:
                             await send_message(self._("Transcription not available in English."))
                             raise
@@ -79,7 +84,7 @@ class YoutubeAgent(AgentBase):
                 
                 await send_message(self._("Transcription downloaded. Generating summary."))
                 
-                video_title, video_date = get_video_metadata(video_id)
+                video_title, video_date = await asyncio.to_thread(get_video_metadata, video_id)
                 header = f"""{self._("Title")}: {video_title}
 {self._("Publication date")}: {video_date}
 
@@ -93,9 +98,10 @@ class YoutubeAgent(AgentBase):
                 
                 full_summary = header + summary_content
                 
-                self._save_message('user', state["message_text"], f"{self.user_id}:{self.agent_id}")
-                self._save_message('tool', transcription, session_id)
-                self._save_message('assistant', full_summary, session_id)
+                await self._save_message('user', state["message_text"], f"{self.user_id}:{self.agent_id}")
+                # Only a reference is kept in the history, the text is stored once per video and language
+                await self._save_message('tool', make_reference(video_id, transcription_language), session_id)
+                await self._save_message('assistant', full_summary, session_id)
                 
                 return {
                     "transcription": transcription,
@@ -106,14 +112,14 @@ class YoutubeAgent(AgentBase):
                 }
             except Exception as e:
                 error_msg = self._("Error processing YouTube video: {error}").format(error=str(e))
-                self._save_message('assistant', error_msg, session_id)
+                await self._save_message('assistant', error_msg, session_id)
                 return {
                     "response": error_msg,
                     "messages": [AIMessage(content=error_msg)]
                 }
         
         async def check_previous_transcription(state: YoutubeAgentState):
-            last_session_id = self.conversation_service.get_last_session_id(
+            last_session_id = await self.conversation_service.get_last_session_id(
                 self.user_id,
                 self.agent_id
             )
@@ -122,10 +128,10 @@ class YoutubeAgent(AgentBase):
                 return {"session_id": None, "has_transcription": False}
             
             
-            history_messages = self.conversation_service.get_conversation_history(
+            history_messages = await self.conversation_service.get_conversation_history(
                 self.user_id,
                 self.agent_id,
-                limit=None,
+                limit=1,
                 exclude_tool_calls=False,
                 session_id=last_session_id
             )
@@ -138,8 +144,8 @@ class YoutubeAgent(AgentBase):
         
         async def request_youtube_url(state: YoutubeAgentState):
             response = self._("Insert youtube link to generate summary.")
-            self._save_message('user', state["message_text"], f"{self.user_id}:{self.agent_id}")
-            self._save_message('assistant', response, f"{self.user_id}:{self.agent_id}")
+            await self._save_message('user', state["message_text"], f"{self.user_id}:{self.agent_id}")
+            await self._save_message('assistant', response, f"{self.user_id}:{self.agent_id}")
             return {
                 "response": response,
                 "messages": [AIMessage(content=response)]
@@ -148,7 +154,7 @@ class YoutubeAgent(AgentBase):
         async def answer_question(state: YoutubeAgentState):
             session_id = state["session_id"]
             
-            history_messages = self.conversation_service.get_conversation_history(
+            history_messages = await self.conversation_service.get_conversation_history(
                 self.user_id,
                 self.agent_id,
                 limit=None,
@@ -160,23 +166,33 @@ class YoutubeAgent(AgentBase):
             
             system_prompt = self._("You are a helpful assistant. Answer based on the conversation history and current message. Be straight to the point without long explanations. If the user wants more details, they will ask.")
             
-            messages = [SystemMessage(content=system_prompt)]
+            system_message = SystemMessage(content=system_prompt)
+            user_message = HumanMessage(content=state["message_text"])
+            builder = self._get_context_builder()
+            reserved = builder.count_messages([system_message, user_message])
+            transcript_tokens = int((builder.token_budget - reserved) * self.TRANSCRIPT_BUDGET_SHARE)
             
+            transcript_messages = []
+            chat_messages = []
             for msg in history_messages:
-                if msg['role'] == 'user':
-                    messages.append(HumanMessage(content=msg['content']))
-                elif msg['role'] == 'assistant':
-                    messages.append(AIMessage(content=msg['content']))
-                elif msg['role'] == 'tool':
-                    messages.append(SystemMessage(content=f"Full video transcription:\n{msg['content']}"))
+                if msg['role'] == 'tool':
+                    transcription = await self.transcript_store.resolve(msg['content'])
+                    if transcription:
+                        transcription = builder.truncate(transcription, transcript_tokens)
+                        transcript_messages.append(SystemMessage(content=f"Full video transcription:\n{transcription}"))
+                else:
+                    chat_message = to_chat_message(msg)
+                    if chat_message is not None:
+                        chat_messages.append(chat_message)
             
-            messages.append(HumanMessage(content=state["message_text"]))
+            reserved += builder.count_messages(transcript_messages)
+            messages = [system_message] + transcript_messages + builder.build(chat_messages, reserved) + [user_message]
             
             try:
                 response_content = await stream_llm_response(self.llm, messages, stream_chunk)
                 
-                self._save_message('user', state["message_text"], session_id)
-                self._save_message('assistant', response_content, session_id)
+                await self._save_message('user', state["message_text"], session_id)
+                await self._save_message('assistant', response_content, session_id)
                 
                 return {
                     "response": response_content,
@@ -184,7 +200,7 @@ class YoutubeAgent(AgentBase):
                 }
             except Exception as e:
                 error_msg = self._("Error generating response: {error}").format(error=str(e))
-                self._save_message('assistant', error_msg, session_id)
+                await self._save_message('assistant', error_msg, session_id)
                 return {
                     "response": error_msg,
                     "messages": [AIMessage(content=error_msg)]
@@ -233,8 +249,15 @@ class YoutubeAgent(AgentBase):
     def _build_graph_with_callbacks(self, memory, send_message, stream_chunk):
         return self._build_graph(memory, send_message, stream_chunk)
     
-    def _save_message(self, role: str, content: str, session_id: str):
-        self.conversation_service.save_message(
+    async def _get_transcription(self, video_id: str, youtube_url: str, language: str) -> str:
+        transcription = await self.transcript_store.get(video_id, language)
+        if transcription is None:
+            transcription = await asyncio.to_thread(fetch_transcription, youtube_url, language=language)
+            await self.transcript_store.put(video_id, language, transcription)
+        return transcription
+    
+    async def _save_message(self, role: str, content: str, session_id: str):
+        await self.conversation_service.save_message(
             self.user_id,
             self.agent_id,
             role,
@@ -262,6 +285,12 @@ class YoutubeAgent(AgentBase):
         result = await graph.ainvoke(initial_state, config)
         return self.response(result.get("response", ""))
     
+    def close(self):
+        super().close()
+        self._send_message = None
+        self._stream_chunk = None
+        self.graph = None
+    
     @property
     def name(self) -> str:
         return "youtube"
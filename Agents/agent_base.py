@@ -1,12 +1,13 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional, Callable
-import gettext
+from typing import Dict, Any, Optional, Callable, Sequence
 import logging
-from pathlib import Path
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+from config import Config
 from Modules.MessageProcessor.message_processor import Message
 from Modules.UserManager.user_manager import UserManager
 from Modules.CityHelper import CityHelper
-from Modules.ConversationMemory import get_conversation_memory_manager
+from Modules.ConversationMemory import ContextBuilder, get_conversation_memory_manager
+from Modules.TranslationTools.catalog_registry import get_catalog
 
 logger = logging.getLogger(__name__)
 
@@ -21,15 +22,18 @@ class AgentBase(ABC):
         self._user_manager = UserManager()
         self._city_helper = None
         self._translator = None
+        self._context_builder = None
         self._conversation_memory_manager = get_conversation_memory_manager()
-        self._chat_history = None
-        self._initialize_conversation_memory()
+        self._history = None
     
-    def _initialize_conversation_memory(self):
-        self._chat_history = self._conversation_memory_manager.get_chat_history(
-            self.user_id, 
-            self.agent_id
-        )
+    @property
+    def _chat_history(self):
+        # Held until the shared manager evicts it, then fetched again
+        if self._history is None or self._history.evicted:
+            self._history = self._conversation_memory_manager.get_chat_history(
+                self.user_id, self.agent_id, self.agent_configuration.get('history_window')
+            )
+        return self._history
     
     def _get_user_language(self) -> str:
         user = self._user_manager.cache.get_user_by_id(self.user_id)
@@ -42,28 +46,7 @@ class AgentBase(ABC):
     
     def _get_translator(self):
         if self._translator is None:
-            user_lang = self._get_user_language()
-            
-            if user_lang == 'en':
-                self._translator = gettext.NullTranslations()
-            else:
-                try:
-                    agent_name = self.name.capitalize() + "Agent"
-                    agent_dir = Path(__file__).parent / agent_name
-                    locale_dir = agent_dir / 'locale'
-                    mo_file = locale_dir / user_lang / 'LC_MESSAGES' / 'messages.mo'
-                    
-                    if mo_file.exists():
-                        self._translator = gettext.translation(
-                            'messages',
-                            localedir=str(locale_dir),
-                            languages=[user_lang]
-                        )
-                    else:
-                        self._translator = gettext.NullTranslations()
-                except Exception as e:
-                    print(f"Exception creating translator: {e}")
-                    self._translator = gettext.NullTranslations()
+            self._translator = get_catalog(self.name.capitalize() + "Agent", self._get_user_language())
         return self._translator
     
     def refresh_translator(self):
@@ -73,23 +56,58 @@ class AgentBase(ABC):
         translator = self._get_translator()
         return translator.gettext(message)
     
-    def _save_user_message(self, message: Message):
-        if self._chat_history and message:
-            self._chat_history.add_user_message(message.text)
-    
-    def _save_assistant_message(self, message: str):
-        if self._chat_history and message:
-            self._chat_history.add_ai_message(message)
-    
-    def _save_tool_call(self, message: str):
-        if self._chat_history and message:
-            self._chat_history.add_tool_call(message)
-    
-    def _get_chat_history(self):
-        if self._chat_history:
-            return self._chat_history.messages
+    async def _save_user_message(self, message: Message):
+        chat_history = self._chat_history
+        if chat_history and message:
+            await chat_history.aadd_user_message(message.text)
+    
+    async def _save_assistant_message(self, message: str):
+        chat_history = self._chat_history
+        if chat_history and message:
+            await chat_history.aadd_ai_message(message)
+    
+    async def _save_tool_call(self, message: str):
+        chat_history = self._chat_history
+        if chat_history and message:
+            await chat_history.aadd_tool_call(message)
+    
+    def _get_context_builder(self) -> ContextBuilder:
+        if self._context_builder is None:
+            token_budget = self.agent_configuration.get('context_token_budget') or Config.from_env().context_token_budget
+            self._context_builder = ContextBuilder(token_budget)
+        return self._context_builder
+    
+    async def _get_chat_history(self, prompt_messages: Sequence[BaseMessage] = ()):
+        """Chat history that fits into the token budget next to the other prompt messages"""
+        history = self._chat_history
+        if history:
+            builder = self._get_context_builder()
+            messages = await history.aget_messages()
+            # The running summary keeps long-range context, it goes first and counts against the budget
+            summary_message = history.summary_message()
+            if summary_message is not None:
+                prompt_messages = [summary_message, *prompt_messages]
+            chat_history = builder.build(messages, reserved=builder.count_messages(prompt_messages))
+            return [summary_message] + chat_history if summary_message is not None else chat_history
         return []
     
+    async def _get_relevant_history(self, text: str) -> Optional[SystemMessage]:
+        """Earlier messages similar to text that are no longer in the chat history, as one prompt message"""
+        history = self._chat_history
+        if not history:
+            return None
+        messages = await history.asearch_similar(text)
+        if not messages:
+            return None
+        lines = '\n'.join(
+            f"{'User' if isinstance(message, HumanMessage) else 'Assistant'}: {message.content}"
+            for message in messages
+        )
+        builder = self._get_context_builder()
+        # Retrieved messages may be long, they must leave room for the recent conversation
+        lines = builder.truncate(lines, builder.token_budget // 4)
+        return SystemMessage(content=f"Relevant earlier messages:\n{lines}")
+    
     def _truncate_message(self, message: str) -> str:
         if len(message) > self.TELEGRAM_MAX_MESSAGE_LENGTH:
             return message[:self.TELEGRAM_MAX_MESSAGE_LENGTH - 3] + "..."
@@ -99,8 +117,16 @@ class AgentBase(ABC):
         return self._truncate_message(content)
     
     def clear_conversation_history(self):
-        if self._chat_history:
-            self._chat_history.clear()
+        history = self._chat_history
+        if history:
+            history.clear()
+    
+    def close(self):
+        """Release per-instance resources when the rooter evicts this agent"""
+        self._city_helper = None
+        self._translator = None
+        self._context_builder = None
+        self._history = None
     
     @abstractmethod
     async def ask(self, message: Message, send_message: Callable[[str], Any], stream_chunk: Callable[[str, str], Any] = None) -> str:
@@ -111,17 +137,17 @@ class AgentBase(ABC):
     def name(self) -> str:
         pass
     
-    def get_city_info(self, message: Message = None) -> tuple:
+    async def get_city_info(self, message: Message = None) -> tuple:
 
         if self._city_helper is None:
             temperature = self.agent_configuration.get('temperature', 0.7)
             self._city_helper = CityHelper(temperature=temperature)
         
         if message:
-            city_name = self._city_helper.extract_city_from_message(message.text)
+            city_name = await self._city_helper.extract_city_from_message(message.text)
             if city_name:
-                normalized_city = self._city_helper.normalize_city_name(city_name)
-                coordinates = self._city_helper.get_coordinates_from_geocoding(normalized_city)
+                normalized_city = await self._city_helper.normalize_city_name(city_name)
+                coordinates = await self._city_helper.get_coordinates_from_geocoding(normalized_city)
                 if coordinates:
                     lat, lon = coordinates
                     return (normalized_city, lat, lon)
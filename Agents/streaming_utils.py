@@ -1,4 +1,6 @@
-from typing import Any, Callable
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Optional
 from langchain_openai import ChatOpenAI
 from langchain_core.messages import BaseMessage
 
@@ -6,27 +8,116 @@ from langchain_core.messages import BaseMessage
 async def stream_llm_response(
     llm: ChatOpenAI,
     messages: list[BaseMessage],
-    stream_chunk: Callable[[str, str], Any],
+    stream_chunk: Optional[Callable[[str, str], Any]],
     initial_text: str = ""
 ) -> str:
     accumulated = initial_text
     response_content = ""
-    
+
     async for chunk in llm.astream(messages):
         if hasattr(chunk, 'content') and chunk.content:
             accumulated += chunk.content
-            await stream_chunk(chunk.content, accumulated)
+            if stream_chunk:
+                await stream_chunk(chunk.content, accumulated)
             response_content = accumulated
-    
+
     if not response_content:
-        response = llm.invoke(messages)
+        response = await llm.ainvoke(messages)
         response_content = response.content
         if initial_text:
             accumulated = initial_text + response_content
         else:
             accumulated = response_content
-        await stream_chunk(response_content, accumulated)
+        if stream_chunk and response_content:
+            await stream_chunk(response_content, accumulated)
         response_content = accumulated
-    
+
     return response_content
 
+
+class LatencyMetrics:
+    """Time to first streamed text and total response time of every agent.
+
+    The last MAX_SAMPLES responses of each agent are kept for percentiles.
+    """
+    _instance = None
+    MAX_SAMPLES = 1000
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._samples = {}
+        return cls._instance
+
+    def record(self, agent_name: str, time_to_first_byte: float, total: float) -> None:
+        samples = self._samples.get(agent_name)
+        if samples is None:
+            samples = self._samples[agent_name] = {
+                'ttfb': deque(maxlen=self.MAX_SAMPLES),
+                'total': deque(maxlen=self.MAX_SAMPLES),
+                'responses': 0
+            }
+        samples['ttfb'].append(time_to_first_byte)
+        samples['total'].append(total)
+        samples['responses'] += 1
+
+    @staticmethod
+    def _percentile(values: Deque[float], percentile: float) -> float:
+        ordered = sorted(values)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * percentile))]
+
+    def clear(self) -> None:
+        self._samples.clear()
+
+    @property
+    def stats(self) -> Dict[str, dict]:
+        """Per agent: responses and ttfb/total p50 and p95 in milliseconds"""
+        return {
+            agent_name: {
+                'responses': samples['responses'],
+                'ttfb_p50_ms': self._percentile(samples['ttfb'], 0.5) * 1000,
+                'ttfb_p95_ms': self._percentile(samples['ttfb'], 0.95) * 1000,
+                'total_p50_ms': self._percentile(samples['total'], 0.5) * 1000,
+                'total_p95_ms': self._percentile(samples['total'], 0.95) * 1000
+            }
+            for agent_name, samples in self._samples.items()
+        }
+
+
+class ResponseTimer:
+    """Measures one agent response, the first streamed chunk is its first byte.
+
+    A response that streams nothing reaches the user in one piece, its time
+    to first byte is the total time.
+    """
+
+    def __init__(self, agent_name: str, metrics: LatencyMetrics = None, clock: Callable[[], float] = time.perf_counter):
+        self.agent_name = agent_name
+        self.metrics = metrics or LatencyMetrics()
+        self._clock = clock
+        self.started = clock()
+        self.first_byte: Optional[float] = None
+
+    def wrap(self, stream_chunk: Optional[Callable[[str, str], Any]]) -> Optional[Callable[[str, str], Any]]:
+        if stream_chunk is None:
+            return None
+
+        async def timed_stream_chunk(chunk: str, accumulated: str):
+            if self.first_byte is None:
+                self.first_byte = self._clock()
+            return await stream_chunk(chunk, accumulated)
+
+        return timed_stream_chunk
+
+    def finish(self) -> tuple:
+        """Record the response, returns (time to first byte, total) in seconds"""
+        finished = self._clock()
+        total = finished - self.started
+        time_to_first_byte = (self.first_byte or finished) - self.started
+        self.metrics.record(self.agent_name, time_to_first_byte, total)
+        print(f"Agent {self.agent_name}: first text after {time_to_first_byte * 1000:.0f} ms, response after {total * 1000:.0f} ms")
+        return time_to_first_byte, total
+
+
+def get_latency_metrics() -> LatencyMetrics:
+    return LatencyMetrics()
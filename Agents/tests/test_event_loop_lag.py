@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+
+import asyncio
+import time
+import uuid
+import pytest
+from langchain_core.messages import AIMessage
+from SqlDB.memory_conversation_storage import MemoryConversationStorage
+from Modules.ConversationMemory.conversation_memory import ConversationMemoryManager
+from Modules.CityHelper.city_helper import CityHelper
+from Modules.MessageProcessor.message_processor import Message
+from Agents.DefaultAgent.agent import DefaultAgent
+
+COMPLETION_SECONDS = 0.5
+TICK_SECONDS = 0.01
+MAX_LAG_SECONDS = 0.1
+
+
+class SlowLLM:
+    """Completes after COMPLETION_SECONDS, invoke blocks the thread like a synchronous HTTP call"""
+
+    def __init__(self, content: str = 'answer'):
+        self.content = content
+
+    def invoke(self, messages):
+        time.sleep(COMPLETION_SECONDS)
+        return AIMessage(content=self.content)
+
+    async def ainvoke(self, messages):
+        await asyncio.sleep(COMPLETION_SECONDS)
+        return AIMessage(content=self.content)
+
+    async def astream(self, messages):
+        yield await self.ainvoke(messages)
+
+
+@pytest.fixture(autouse=True)
+def openai_settings(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    monkeypatch.setenv("GPT_MODEL", "gpt-test")
+
+
+def _default_agent(memory_manager: ConversationMemoryManager) -> DefaultAgent:
+    agent = DefaultAgent(str(uuid.uuid4()), str(uuid.uuid4()), {'temperature': 0.7})
+    agent._conversation_memory_manager = memory_manager
+    agent.llm = SlowLLM()
+    return agent
+
+
+def _message(agent: DefaultAgent, text: str) -> Message:
+    return Message(text=text, language='en', ui_language='en', user_id=agent.user_id)
+
+
+async def _max_lag_while(coroutine) -> tuple:
+    """Runs coroutine next to a ticker standing in for other chats, returns (result, largest tick delay)"""
+    lags = []
+    done = asyncio.Event()
+
+    async def ticker():
+        while not done.is_set():
+            expected = time.perf_counter() + TICK_SECONDS
+            await asyncio.sleep(TICK_SECONDS)
+            lags.append(time.perf_counter() - expected)
+
+    ticking = asyncio.create_task(ticker())
+    try:
+        result = await coroutine
+    finally:
+        done.set()
+        await ticking
+    return result, max(lags)
+
+
+async def _no_reply(text: str) -> None:
+    pass
+
+
+class TestEventLoopLag:
+    def test_default_agent_does_not_block_other_chats(self):
+        agent = _default_agent(ConversationMemoryManager(storage=MemoryConversationStorage()))
+
+        response, lag = asyncio.run(_max_lag_while(agent.ask(_message(agent, 'hello'), _no_reply)))
+        print(f"\nLargest event loop lag during a {COMPLETION_SECONDS}s completion: {lag * 1000:.1f} ms")
+
+        assert response == 'answer'
+        assert lag < MAX_LAG_SECONDS
+
+    def test_chats_are_answered_concurrently(self):
+        memory_manager = ConversationMemoryManager(storage=MemoryConversationStorage())
+        agents = [_default_agent(memory_manager) for _ in range(5)]
+
+        async def run():
+            began = time.perf_counter()
+            responses = await asyncio.gather(*(agent.ask(_message(agent, 'hello'), _no_reply) for agent in agents))
+            return responses, time.perf_counter() - began
+
+        responses, elapsed = asyncio.run(run())
+
+        assert responses == ['answer'] * len(agents)
+        assert elapsed < 2 * COMPLETION_SECONDS
+
+    def test_city_helper_does_not_block_other_chats(self):
+        helper = CityHelper()
+        helper.llm = SlowLLM('London')
+
+        city, lag = asyncio.run(_max_lag_while(helper.extract_city_from_message('What time is it in London?')))
+
+        assert city == 'London'
+        assert lag < MAX_LAG_SECONDS
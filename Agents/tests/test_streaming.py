@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+
+import asyncio
+import time
+import uuid
+import pytest
+from langchain_core.messages import AIMessageChunk, HumanMessage, SystemMessage
+from SqlDB.memory_conversation_storage import MemoryConversationStorage
+from Modules.ConversationMemory.conversation_memory import ConversationMemoryManager
+from Modules.MessageProcessor.message_processor import Message
+from Agents.CalculatorAgent.agent import CalculatorAgent
+from Agents.DefaultAgent.agent import DefaultAgent
+from Agents.streaming_utils import LatencyMetrics, ResponseTimer
+
+TOKEN_SECONDS = 0.05
+
+
+class StreamingLLM:
+    """Streams one round of chunks per call, TOKEN_SECONDS apart"""
+
+    def __init__(self, *rounds):
+        self.rounds = list(rounds)
+
+    async def astream(self, messages):
+        for chunk in self.rounds.pop(0):
+            await asyncio.sleep(TOKEN_SECONDS)
+            yield chunk
+
+
+class RecordingLLM(StreamingLLM):
+    """StreamingLLM keeping the prompt of every call"""
+
+    def __init__(self, *rounds):
+        super().__init__(*rounds)
+        self.prompts = []
+
+    async def astream(self, messages):
+        self.prompts.append(list(messages))
+        async for chunk in super().astream(messages):
+            yield chunk
+
+
+class ChunkRecorder:
+    def __init__(self):
+        self.chunks = []
+        self.first_at = None
+
+    async def __call__(self, chunk: str, accumulated: str):
+        if self.first_at is None:
+            self.first_at = time.perf_counter()
+        self.chunks.append((chunk, accumulated))
+
+
+@pytest.fixture(autouse=True)
+def openai_settings(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    monkeypatch.setenv("GPT_MODEL", "gpt-test")
+
+
+@pytest.fixture
+def memory_manager():
+    return ConversationMemoryManager(storage=MemoryConversationStorage())
+
+
+@pytest.fixture
+def metrics():
+    metrics = LatencyMetrics()
+    metrics.clear()
+    return metrics
+
+
+def _message(user_id: str, text: str) -> Message:
+    return Message(text=text, language='en', ui_language='en', user_id=user_id)
+
+
+async def _no_reply(text: str) -> None:
+    pass
+
+
+class TestDefaultAgentStreaming:
+    def test_text_is_streamed_before_completion(self, memory_manager):
+        agent = DefaultAgent(str(uuid.uuid4()), str(uuid.uuid4()), {'temperature': 0.7})
+        agent._conversation_memory_manager = memory_manager
+        agent.llm = StreamingLLM([AIMessageChunk(content=word) for word in ['Hello', ' there', ', how', ' can', ' I', ' help?']])
+        recorder = ChunkRecorder()
+
+        async def run():
+            began = time.perf_counter()
+            response = await agent.ask(_message(agent.user_id, 'hi'), _no_reply, recorder)
+            return response, recorder.first_at - began, time.perf_counter() - began
+
+        response, first_chunk, total = asyncio.run(run())
+
+        assert response == 'Hello there, how can I help?'
+        assert recorder.chunks[-1][1] == response
+        assert first_chunk < total / 3
+
+
+class TestCalculatorStreaming:
+    def test_only_final_answer_is_streamed(self):
+        agent = CalculatorAgent(str(uuid.uuid4()), str(uuid.uuid4()), {'temperature': 0.2})
+        agent.conversation_service.storage = MemoryConversationStorage()
+        agent.llm_with_tools = StreamingLLM(
+            [AIMessageChunk(content='', tool_call_chunks=[{'name': 'add', 'args': '{"a": 2, "b": 3}', 'id': 'call_1', 'index': 0}])],
+            [AIMessageChunk(content='5')]
+        )
+        recorder = ChunkRecorder()
+
+        response = asyncio.run(agent.ask(_message(agent.user_id, '2 + 3'), _no_reply, recorder))
+
+        assert response == '5'
+        assert recorder.chunks == [('5', '5')]
+
+    def test_prompt_holds_only_the_budgeted_history(self):
+        agent = CalculatorAgent(str(uuid.uuid4()), str(uuid.uuid4()), {'temperature': 0.2})
+        agent.conversation_service.storage = MemoryConversationStorage()
+        asks = 4
+        rounds = []
+        for ask in range(asks):
+            rounds.append([AIMessageChunk(content='', tool_call_chunks=[{'name': 'add', 'args': f'{{"a": {ask}, "b": 1}}', 'id': f'call_{ask}', 'index': 0}])])
+            rounds.append([AIMessageChunk(content=str(ask + 1))])
+        agent.llm_with_tools = RecordingLLM(*rounds)
+
+        for ask in range(asks):
+            asyncio.run(agent.ask(_message(agent.user_id, f'{ask} + 1'), _no_reply))
+
+        # The first call of every ask: system prompt, stored history, the new question
+        first_calls = agent.llm_with_tools.prompts[::2]
+        for ask, prompt in enumerate(first_calls):
+            assert isinstance(prompt[0], SystemMessage)
+            assert isinstance(prompt[-1], HumanMessage) and prompt[-1].content == f'{ask} + 1'
+            history = [message.content for message in prompt[1:-1]]
+            assert len(history) == len(set(history)) <= 5
+            assert all(message.type in ('human', 'ai') and not getattr(message, 'tool_calls', None) for message in prompt[1:-1])
+        assert len(first_calls[-1]) <= 1 + 5 + 1
+
+
+class TestResponseTimer:
+    def test_first_chunk_is_first_byte(self, metrics):
+        now = [0.0]
+        timer = ResponseTimer('default', metrics, clock=lambda: now[0])
+        recorder = ChunkRecorder()
+        stream_chunk = timer.wrap(recorder)
+
+        async def run():
+            now[0] = 0.2
+            await stream_chunk('Hello', 'Hello')
+            now[0] = 0.5
+            await stream_chunk(' world', 'Hello world')
+            now[0] = 1.0
+
+        asyncio.run(run())
+
+        assert timer.finish() == (0.2, 1.0)
+        assert recorder.chunks[-1] == (' world', 'Hello world')
+        assert metrics.stats['default']['responses'] == 1
+        assert metrics.stats['default']['ttfb_p50_ms'] == pytest.approx(200)
+        assert metrics.stats['default']['total_p50_ms'] == pytest.approx(1000)
+
+    def test_response_without_stream_reaches_user_at_the_end(self, metrics):
+        now = [0.0]
+        timer = ResponseTimer('time', metrics, clock=lambda: now[0])
+
+        assert timer.wrap(None) is None
+        now[0] = 0.3
+        assert timer.finish() == (0.3, 0.3)
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+
+import asyncio
+import uuid
+import pytest
+from types import SimpleNamespace
+from SqlDB.memory_conversation_storage import MemoryConversationStorage
+from Modules.ConversationMemory.conversation_memory import ConversationMemoryManager
+from Modules.MessageProcessor.message_processor import Message
+from Agents.TimeAgent.agent import TimeAgent
+
+
+class ClassifyingLLM:
+    """Answers the query type after the city lookup had time to finish or fail"""
+
+    def __init__(self, answer: str):
+        self.answer = answer
+        self.started = asyncio.Event()
+        self.cancelled = False
+
+    async def ainvoke(self, messages):
+        self.started.set()
+        try:
+            await asyncio.sleep(0.05)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        return SimpleNamespace(content=self.answer)
+
+
+@pytest.fixture(autouse=True)
+def openai_settings(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    monkeypatch.setenv("GPT_MODEL", "gpt-test")
+
+
+@pytest.fixture
+def agent():
+    agent = TimeAgent(str(uuid.uuid4()), str(uuid.uuid4()), {'temperature': 0.2})
+    agent._conversation_memory_manager = ConversationMemoryManager(storage=MemoryConversationStorage())
+    agent.llm = ClassifyingLLM('time')
+    agent._get_current_time = lambda: '12:00'
+    return agent
+
+
+def _message(agent: TimeAgent, text: str) -> Message:
+    return Message(text=text, language='en', ui_language='en', user_id=agent.user_id)
+
+
+class TestTimeAgent:
+    def test_classification_runs_while_the_city_is_looked_up(self, agent):
+        async def get_city_info(message):
+            await asyncio.wait_for(agent.llm.started.wait(), 1)
+            return ('Kraków', 50.06, 19.94)
+        agent.get_city_info = get_city_info
+
+        assert asyncio.run(agent.ask(_message(agent, 'What time is it?'), None)) == '12:00'
+        assert not agent.llm.cancelled
+
+    @pytest.mark.parametrize("error,expected", [
+        (ValueError('city not configured'), 'Configuration error: city not configured'),
+        (RuntimeError('geocoding failed'), 'Error getting city information: geocoding failed'),
+    ])
+    def test_failed_city_lookup_cancels_classification(self, agent, error, expected):
+        async def get_city_info(message):
+            await agent.llm.started.wait()
+            raise error
+        agent.get_city_info = get_city_info
+
+        async def run():
+            response = await agent.ask(_message(agent, 'What time is it?'), None)
+            # Let the cancelled classification unwind
+            await asyncio.sleep(0)
+            return response
+
+        assert asyncio.run(run()) == expected
+        assert agent.llm.cancelled
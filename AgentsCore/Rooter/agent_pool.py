@@ -0,0 +1,115 @@
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, Optional
+from Agents.agent_base import AgentBase
+
+
+class AgentInstancePool:
+    """LRU pool of live agent instances bounded by size and idle time.
+
+    Evicted agents get their ``close()`` hook called so that LLM clients,
+    chat histories and compiled graphs can be released. An agent evicted
+    while it is answering inside ``in_use`` is closed once that call ends.
+    """
+
+    def __init__(self, max_size: int = 256, idle_timeout: float = 1800.0, clock: Callable[[], float] = time.monotonic):
+        if max_size < 1:
+            raise ValueError("Agent pool max_size must be at least 1")
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self._clock = clock
+        self._entries: OrderedDict[str, tuple[AgentBase, float]] = OrderedDict()
+        self._in_use: Dict[int, int] = {}
+        self._deferred_close: Dict[int, AgentBase] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[AgentBase]:
+        now = self._clock()
+        self._evict_idle(now)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries[key] = (entry[0], now)
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def put(self, key: str, agent: AgentBase) -> None:
+        now = self._clock()
+        previous = self._entries.pop(key, None)
+        if previous is not None and previous[0] is not agent:
+            self._close(previous[0])
+        self._entries[key] = (agent, now)
+        self._evict_idle(now)
+        while len(self._entries) > self.max_size:
+            _, (evicted, _) = self._entries.popitem(last=False)
+            self._close(evicted)
+            self.evictions += 1
+
+    def remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._close(entry[0])
+
+    def clear(self) -> None:
+        while self._entries:
+            _, (agent, _) = self._entries.popitem(last=False)
+            self._close(agent)
+
+    @contextmanager
+    def in_use(self, agent: AgentBase) -> Iterator[AgentBase]:
+        """Keep agent open while a call to it is in flight"""
+        key = id(agent)
+        self._in_use[key] = self._in_use.get(key, 0) + 1
+        try:
+            yield agent
+        finally:
+            remaining = self._in_use[key] - 1
+            if remaining:
+                self._in_use[key] = remaining
+            else:
+                del self._in_use[key]
+                if self._deferred_close.pop(key, None) is not None:
+                    self._close(agent)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def stats(self) -> dict:
+        return {
+            'size': len(self._entries),
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'in_use': len(self._in_use),
+            'deferred_closes': len(self._deferred_close),
+        }
+
+    def _evict_idle(self, now: float) -> None:
+        if self.idle_timeout is None:
+            return
+        while self._entries:
+            key, (agent, last_used) = next(iter(self._entries.items()))
+            if now - last_used < self.idle_timeout:
+                break
+            del self._entries[key]
+            self._close(agent)
+            self.evictions += 1
+
+    def _close(self, agent: AgentBase) -> None:
+        if id(agent) in self._in_use:
+            self._deferred_close[id(agent)] = agent
+            return
+        try:
+            agent.close()
+        except Exception as e:
+            print(f"Error closing agent {agent.__class__.__name__}: {e}")
@@ -0,0 +1,87 @@
+import json
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Iterable, Mapping, Optional
+from .keyword_matcher import KeywordMatcher
+
+DEFAULT_AGENT_NAME = 'default'
+CONFIGURATION_AGENT_NAME = 'configuration'
+FALLBACK_LANGUAGE = 'en'
+
+
+@dataclass(frozen=True, slots=True, eq=False, repr=False)
+class AgentRecord:
+    """Read-only agent row shared by every reader of a registry"""
+    id: str
+    name: str
+    keywords: tuple
+    configuration: Mapping[str, Any]
+    display_names: Optional[Mapping[str, str]] = None
+
+    def __post_init__(self):
+        object.__setattr__(self, 'keywords', tuple(self.keywords))
+        object.__setattr__(self, 'configuration', MappingProxyType(dict(self.configuration or {})))
+        object.__setattr__(self, 'display_names', MappingProxyType(dict(self.display_names or {})))
+
+    @classmethod
+    def from_model(cls, agent) -> 'AgentRecord':
+        keywords = tuple(k.strip().lower() for k in agent.keywords.split(',') if k.strip())
+        configuration = agent.configuration
+        if isinstance(configuration, str):
+            configuration = json.loads(configuration)
+        display_names = agent.display_name if isinstance(agent.display_name, dict) else {}
+        return cls(str(agent.id), agent.name, keywords, configuration or {}, display_names)
+
+    def __repr__(self) -> str:
+        return f"AgentRecord(id={self.id!r}, name={self.name!r})"
+
+
+class AgentRegistry:
+    """Immutable snapshot of the agents table with O(1) lookups.
+
+    The rooter builds a new registry when the agents table changes and swaps
+    the reference, so readers never see a half-built index.
+    """
+    __slots__ = ('agents', 'default_agent', 'configuration_agent', 'keyword_matcher',
+                 '_by_id', '_by_name', '_by_keyword', '_display_names')
+
+    def __init__(self, agents: Iterable[AgentRecord], app_keyword: str):
+        self.agents = tuple(agents)
+        by_keyword = {}
+        display_names = {}
+        for agent in self.agents:
+            for keyword in agent.keywords:
+                by_keyword[keyword] = agent
+            for language, display_name in agent.display_names.items():
+                display_names[(agent.name, language)] = display_name
+
+        self._by_id = MappingProxyType({agent.id: agent for agent in self.agents})
+        self._by_name = MappingProxyType({agent.name: agent for agent in self.agents})
+        self._by_keyword = MappingProxyType(by_keyword)
+        self._display_names = MappingProxyType(display_names)
+        self.default_agent = self._by_name.get(DEFAULT_AGENT_NAME)
+        self.configuration_agent = self._by_name.get(CONFIGURATION_AGENT_NAME)
+        self.keyword_matcher = KeywordMatcher(app_keyword, by_keyword)
+
+    @classmethod
+    def from_models(cls, agents: Iterable, app_keyword: str) -> 'AgentRegistry':
+        return cls((AgentRecord.from_model(agent) for agent in agents), app_keyword)
+
+    def get_by_id(self, agent_id: str) -> Optional[AgentRecord]:
+        return self._by_id.get(agent_id)
+
+    def get_by_name(self, name: str) -> Optional[AgentRecord]:
+        return self._by_name.get(name)
+
+    def get_by_keyword(self, keyword: str) -> Optional[AgentRecord]:
+        return self._by_keyword.get(keyword)
+
+    def display_name(self, agent: AgentRecord, language: str) -> str:
+        return (
+            self._display_names.get((agent.name, language))
+            or self._display_names.get((agent.name, FALLBACK_LANGUAGE))
+            or agent.name
+        )
+
+    def __len__(self) -> int:
+        return len(self.agents)
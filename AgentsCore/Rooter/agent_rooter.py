@@ -1,177 +1,147 @@
-from SqlDB.database import Session, engine
-from SqlDB.models import Agent, AgentItem
-import os
-import json
-import gettext
+from sqlalchemy import select
+from SqlDB.database import AsyncSessionLocal
+from SqlDB.models import Agent
 import re
-from pathlib import Path
 from typing import Optional, Any
 from config import Config
-from SqlDB.user_cache import UserCache
+from SqlDB.agent_item_cache import AgentItemCache
+from SqlDB.retention_policy import RetentionPolicy
 from .agent_factory import AgentFactory
+from .agent_registry import AgentRegistry, AgentRecord
+from .agent_pool import AgentInstancePool
+from .user_lock_registry import UserLockRegistry
+from .routing_decision import (
+    RoutingDecision,
+    WHICH_AGENT,
+    SWITCH,
+    ALREADY_ACTIVE,
+    UNKNOWN_AGENT,
+    CONFIGURATION_REQUIRED
+)
 from Agents.agent_base import AgentBase
+from Agents.streaming_utils import ResponseTimer
 from Modules.MessageProcessor.message_processor import Message
 from Modules.UserManager.user_manager import UserManager
+from Modules.TranslationTools.catalog_registry import get_catalog, ROOTER_COMPONENT
 
 class AgentRooter:
     _instance = None
-    _agents = []
-    _agent_map = {}
+    _registry = None
     _app_keyword = None
     current_agents = {}
-    _agent_instances = {}
+    _agent_instances = None
     _user_manager = None
 
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super().__new__(cls)
             cls._instance._init()
-            cls._instance._load_agents()
         return cls._instance
       
     def _init(self):
         config = Config.from_env()
         self._app_keyword = config.app_keyword.lower()
-        self._agents = []
-        self._agent_map = {}
-        self._default_agent = None
-        self._agent_instances = {}
+        self._registry = AgentRegistry((), self._app_keyword)
+        self._agent_instances = AgentInstancePool(
+            max_size=config.agent_pool_max_size,
+            idle_timeout=config.agent_pool_idle_seconds
+        )
         self._user_manager = UserManager()
-        self._translators = {}
-        self._user_languages = {}
+        self._agent_item_cache = AgentItemCache()
+        self._which_commands = {}
+        self._user_locks = UserLockRegistry()
 
-    def _load_agents(self):
-        session = Session(engine)
-        try:
-            agents = session.query(Agent).all()
-            
-            for agent in agents:
-                keywords = [k.strip().lower() for k in agent.keywords.split(',') if k.strip()]
-                agent_configuration = agent.configuration
-                if isinstance(agent_configuration, str):
-                    agent_configuration = json.loads(agent_configuration)
-                agent_obj = {
-                    'id': str(agent.id),
-                    'name': agent.name,
-                    'keywords': keywords,
-                    'configuration': agent_configuration,
-                    'display_name': agent.display_name
-                }
-                self._agents.append(agent_obj)
-                for kw in keywords:
-                    self._agent_map[kw] = agent_obj
-                if agent.name == 'default':
-                    self._default_agent = agent_obj
-        finally:
-            session.close()
+    async def load_agents(self):
+        """Build the agent registry from the agents table and swap it in"""
+        async with AsyncSessionLocal() as session:
+            agents = (await session.execute(select(Agent))).scalars().all()
+        self._swap_registry(AgentRegistry.from_models(agents, self._app_keyword))
+    
+    async def reload_agents(self) -> int:
+        """Pick up changes of the agents table, returns the number of loaded agents"""
+        await self.load_agents()
+        # Pooled instances were created with the previous configuration
+        self._agent_instances.clear()
+        return len(self._registry)
+    
+    def _swap_registry(self, registry: AgentRegistry):
+        # Readers hold either the old or the new snapshot, never a mix of both
+        self._registry = registry
+        self.current_agents = {
+            user_id: registry.get_by_name(agent.name) or registry.default_agent
+            for user_id, agent in list(self.current_agents.items())
+            if agent is not None
+        }
+        RetentionPolicy().update({agent.id: agent.configuration for agent in registry.agents})
+    
+    @property
+    def registry(self) -> AgentRegistry:
+        return self._registry
 
-    def _get_agent_item_questionnaire_data(self, user_id: str, agent_id: str) -> dict:
-        session = Session(engine)
-        try:
-            agent_item = session.query(AgentItem).filter(
-                AgentItem.user_id == user_id,
-                AgentItem.agent_id == agent_id
-            ).first()
-            
-            if agent_item:
-                return agent_item.questionnaire_answers or {}
-            return {}
-        finally:
-            session.close()
+    async def _get_agent_item_questionnaire_data(self, user_id: str, agent_id: str) -> dict:
+        return await self._agent_item_cache.get_answers(user_id, agent_id)
 
     def _get_agent_instance_key(self, user_id: str, agent_name: str) -> str:
         return f"{user_id}_{agent_name}"
 
-    def _get_agent_instance(self, user_id: str, agent_name: str) -> AgentBase:
+    async def _get_agent_instance(self, user_id: str, agent_name: str) -> AgentBase:
         instance_key = self._get_agent_instance_key(user_id, agent_name)
         
-        if instance_key in self._agent_instances:
-            return self._agent_instances[instance_key]
+        agent_instance = self._agent_instances.get(instance_key)
+        if agent_instance is not None:
+            return agent_instance
         
-        agent_obj = None
-        for agent in self._agents:
-            if agent['name'] == agent_name:
-                agent_obj = agent
-                break
-        
-        if not agent_obj:
+        agent_record = self._registry.get_by_name(agent_name)
+        if not agent_record:
             raise ValueError(f"Agent {agent_name} not found")
         
-        questionnaire_answers = self._get_agent_item_questionnaire_data(user_id, agent_obj['id'])
+        questionnaire_answers = await self._get_agent_item_questionnaire_data(user_id, agent_record.id)
         
         agent_instance = AgentFactory.create_agent(
             agent_name=agent_name,
             user_id=user_id,
-            agent_id=agent_obj['id'],
-            agent_configuration=agent_obj['configuration'],
+            agent_id=agent_record.id,
+            agent_configuration=agent_record.configuration,
             questionnaire_answers=questionnaire_answers
         )
         
-        self._agent_instances[instance_key] = agent_instance
+        self._agent_instances.put(instance_key, agent_instance)
         return agent_instance
+    
+    def user_lock(self, user_key):
+        """Lock guarding routing state and agent instances of a single user"""
+        return self._user_locks.lock(user_key)
+    
+    def get_agent_pool_stats(self) -> dict:
+        return self._agent_instances.stats
 
     def find_agent_in_message(self, message: Message):
-        msg = message.text.lower()
-        for kw, agent in self._agent_map.items():
-            search = f"{self._app_keyword} {kw}"
-            if search in msg:
-                return agent
-        return None
+        return self._registry.keyword_matcher.match(message.text).agent
     
     def _extract_words(self, text: str) -> list:
         text_lower = text.lower().strip()
         return re.findall(r'\b\w+\b', text_lower, re.UNICODE)
     
-    def _check_invalid_agent_request(self, message: Message) -> Optional[str]:
-        msg_lower = message.text.lower().strip()
-        app_keyword_pattern = f"{self._app_keyword} "
-        
-        if app_keyword_pattern not in msg_lower:
-            return None
-        
-        words = self._extract_words(msg_lower)
-        if len(words) < 2:
-            return None
-        
-        app_keyword_index = -1
-        for i, word in enumerate(words):
-            if word == self._app_keyword and i + 1 < len(words):
-                app_keyword_index = i
-                break
-        
-        if app_keyword_index == -1:
-            return None
-        
-        requested_keyword = words[app_keyword_index + 1] if app_keyword_index + 1 < len(words) else None
-        
-        if requested_keyword and requested_keyword not in self._agent_map:
-            return requested_keyword
-        
-        return None
-    
-    def _get_current_agent(self, user_id: str):
+    def _get_current_agent(self, user_id: str) -> Optional[AgentRecord]:
         if user_id not in self.current_agents:
             # Set default agent initially
-            self.current_agents[user_id] = self._default_agent
+            self.current_agents[user_id] = self._registry.default_agent
         return self.current_agents[user_id]
     
     def _user_has_configuration(self, user_id: str) -> bool:
         """Check if user has completed configuration using UserManager"""
         return self._user_manager.check_user_configuration(user_id)
     
-    def _get_configuration_agent(self):
-        """Get the configuration agent object"""
-        for agent in self._agents:
-            if agent['name'] == 'configuration':
-                return agent
-        return None
+    def _get_configuration_agent(self) -> Optional[AgentRecord]:
+        """Get the configuration agent record"""
+        return self._registry.configuration_agent
     
-    def _get_current_agent_instance(self, user_id: str) -> AgentBase:
+    async def _get_current_agent_instance(self, user_id: str) -> AgentBase:
         current_agent = self._get_current_agent(user_id)
         if not current_agent:
             return None
             
-        return self._get_agent_instance(user_id, current_agent['name'])
+        return await self._get_agent_instance(user_id, current_agent.name)
     
     def _get_user_language(self, user_id: str) -> str:
         user = self._user_manager.cache.get_user_by_id(user_id)
@@ -180,132 +150,114 @@ class AgentRooter:
         return user.configuration['language']
     
     def _get_translator(self, user_id: str, language: Optional[str] = None):
-        if language is None:
-            user_lang = self._get_user_language(user_id)
-        else:
-            user_lang = language
-        
-        cache_key = f"{user_id}_{user_lang}" if language else user_id
-        
-        if language is None:
-            if user_id in self._user_languages and self._user_languages[user_id] != user_lang:
-                if user_id in self._translators:
-                    del self._translators[user_id]
-            self._user_languages[user_id] = user_lang
-        
-        if cache_key in self._translators:
-            return self._translators[cache_key]
-        
-        if user_lang == 'en':
-            self._translators[cache_key] = gettext.NullTranslations()
-        else:
-            try:
-                locale_dir = Path(__file__).parent / 'locale'
-                mo_file = locale_dir / user_lang / 'LC_MESSAGES' / 'messages.mo'
-                
-                if mo_file.exists():
-                    self._translators[cache_key] = gettext.translation(
-                        'messages',
-                        localedir=str(locale_dir),
-                        languages=[user_lang]
-                    )
-                else:
-                    self._translators[cache_key] = gettext.NullTranslations()
-            except Exception as e:
-                print(f"Exception creating translator for user {user_id}: {e}")
-                self._translators[cache_key] = gettext.NullTranslations()
-        return self._translators[cache_key]
+        return get_catalog(ROOTER_COMPONENT, language or self._get_user_language(user_id))
     
-    def _(self, user_id: str, message: str) -> str:
-        translator = self._get_translator(user_id)
+    def _(self, user_id: str, message: str, language: Optional[str] = None) -> str:
+        translator = self._get_translator(user_id, language)
         return translator.gettext(message)
     
-    def _get_agent_display_name(self, agent: dict, user_language: str) -> str:
-        display_name = agent.get('display_name')
-        if display_name and isinstance(display_name, dict):
-            if user_language in display_name:
-                return display_name[user_language]
-            if 'en' in display_name:
-                return display_name['en']
-        return agent['name']
+    def _get_agent_display_name(self, agent: AgentRecord, user_language: str) -> str:
+        return self._registry.display_name(agent, user_language)
     
     async def ask_current_agent(self, message: Message, send_message: Any, stream_chunk: Any = None) -> str:
-        agent_instance = self._get_current_agent_instance(message.user_id)
+        agent_instance = await self._get_current_agent_instance(message.user_id)
         if agent_instance:
-            return await agent_instance.ask(message, send_message, stream_chunk)
+            return await self._ask(agent_instance, message, send_message, stream_chunk)
         return "No agent available to respond"
-
-    def check_which_agent_query(self, message: Message) -> Optional[str]:
-        user_language = self._get_user_language(message.user_id)
-        msg_lower = message.text.lower().strip()
-        
-        translator = self._get_translator(message.user_id)
-        commands_str = translator.gettext("which,what")
-        commands = [cmd.strip() for cmd in commands_str.split(',') if cmd.strip()]
-        
-        if user_language != 'en':
-            en_translator = self._get_translator(message.user_id, 'en')
-            en_commands_str = en_translator.gettext("which,what")
-            en_commands = [cmd.strip() for cmd in en_commands_str.split(',') if cmd.strip()]
-            commands.extend(en_commands)
-        
-        words = self._extract_words(msg_lower)
-        
-        if len(words) < 2:
-            return None
-        
-        first_word = words[0].strip()
-        second_word = words[1].strip() if len(words) > 1 else ""
+    
+    async def dispatch(self, decision: RoutingDecision, send_message: Any, stream_chunk: Any = None) -> str:
+        agent = decision.target_agent or self._get_current_agent(decision.message.user_id)
+        if not agent:
+            return "No agent available to respond"
+        agent_instance = await self._get_agent_instance(decision.message.user_id, agent.name)
+        return await self._ask(agent_instance, decision.message, send_message, stream_chunk)
+    
+    async def _ask(self, agent_instance: AgentBase, message: Message, send_message: Any, stream_chunk: Any = None) -> str:
+        """Ask an agent, recording its time to first streamed text and total latency"""
+        timer = ResponseTimer(agent_instance.name)
+        try:
+            with self._agent_instances.in_use(agent_instance):
+                return await agent_instance.ask(message, send_message, timer.wrap(stream_chunk))
+        finally:
+            timer.finish()
+    
+    def _get_which_commands(self, language: str) -> frozenset:
+        commands = self._which_commands.get(language)
+        if commands is None:
+            languages = [language] if language == 'en' else [language, 'en']
+            commands = frozenset(
+                cmd.strip()
+                for lang in languages
+                for cmd in get_catalog(ROOTER_COMPONENT, lang).gettext("which,what").split(',')
+                if cmd.strip()
+            )
+            self._which_commands[language] = commands
+        return commands
+    
+    def route(self, message: Message) -> RoutingDecision:
+        """Decide once per message what the rooter does with it: answer a command, switch agents and/or forward"""
+        user_id = message.user_id
+        language = message.language or self._get_user_language(user_id)
+        words = self._extract_words(message.text)
+        decision = RoutingDecision(message=message, language=language, words=words)
         
-        if first_word in commands and second_word == "agent":
-            current_agent = self._get_current_agent(message.user_id)
+        if len(words) >= 2 and words[0] in self._get_which_commands(language) and words[1] == "agent":
+            current_agent = self._get_current_agent(user_id)
             if current_agent:
-                agent_display_name = self._get_agent_display_name(current_agent, user_language)
-                response = self._(message.user_id, "The current agent is: {agent_name}").format(agent_name=agent_display_name)
-                return response
+                agent_display_name = self._get_agent_display_name(current_agent, language)
+                decision.command = WHICH_AGENT
+                decision.target_agent = current_agent
+                decision.reply = self._(user_id, "The current agent is: {agent_name}", language).format(agent_name=agent_display_name)
+                decision.forward = False
+                return decision
         
-        return None
-
-    def switch(self, message: Message) -> Optional[str]:
-        switched_agent = None
+        self._route_switch(decision)
+        decision.forward = not (len(words) == 2 and words[0] == self._app_keyword)
+        if decision.target_agent is None:
+            decision.target_agent = self._get_current_agent(user_id)
+        return decision
+    
+    def _route_switch(self, decision: RoutingDecision) -> None:
+        message = decision.message
+        user_id = message.user_id
+        language = decision.language
         
-        if not self._user_has_configuration(message.user_id):
+        if not self._user_has_configuration(user_id):
             configuration_agent = self._get_configuration_agent()
-            if configuration_agent and self.current_agents.get(message.user_id) != configuration_agent:
-                self.current_agents[message.user_id] = configuration_agent
-                switched_agent = configuration_agent
-                print(f"User {message.user_id} has no configuration, forced to ConfigurationAgent")
+            current_agent = self.current_agents.get(user_id)
+            if configuration_agent and (current_agent is None or current_agent.id != configuration_agent.id):
+                self.current_agents[user_id] = configuration_agent
+                decision.command = CONFIGURATION_REQUIRED
+                decision.target_agent = configuration_agent
+                print(f"User {user_id} has no configuration, forced to ConfigurationAgent")
         else:
-            agent = self.find_agent_in_message(message)
-            temp_current_agent = self._get_current_agent(message.user_id)
+            keyword_match = self._registry.keyword_matcher.match(message.text)
+            agent = keyword_match.agent
+            current_agent = self._get_current_agent(user_id)
             
             if agent:
-                if temp_current_agent is None or agent['id'] != temp_current_agent['id']:
-                    self.current_agents[message.user_id] = agent
-                    switched_agent = agent
-                    print(f"Switched to agent: {agent['id']} for user: {message.user_id}")
+                decision.target_agent = agent
+                if current_agent is None or agent.id != current_agent.id:
+                    self.current_agents[user_id] = agent
+                    decision.command = SWITCH
+                    print(f"Switched to agent: {agent.id} for user: {user_id}")
                 else:
-                    user_language = self._get_user_language(message.user_id)
-                    agent_display_name = self._get_agent_display_name(agent, user_language)
-                    message_text = self._(message.user_id, "You are already using agent: {agent_name}").format(
+                    agent_display_name = self._get_agent_display_name(agent, language)
+                    decision.command = ALREADY_ACTIVE
+                    decision.reply = self._(user_id, "You are already using agent: {agent_name}", language).format(
                         agent_name=agent_display_name
                     )
-                    return message_text
-            elif agent is None:
-                invalid_keyword = self._check_invalid_agent_request(message)
-                if invalid_keyword:
-                    error_message = self._(message.user_id, "Agent '{agent_name}' does not exist.").format(
-                        agent_name=invalid_keyword
-                    )
-                    return error_message
-        
-        if switched_agent:
-            user_language = self._get_user_language(message.user_id)
-            agent_display_name = self._get_agent_display_name(switched_agent, user_language)
-            translated_message = self._(message.user_id, "Switched to agent: {agent_name}").format(agent_name=agent_display_name)
-            return translated_message
+                    return
+            elif keyword_match.unknown_keyword:
+                decision.command = UNKNOWN_AGENT
+                decision.reply = self._(user_id, "Agent '{agent_name}' does not exist.", language).format(
+                    agent_name=keyword_match.unknown_keyword
+                )
+                return
         
-        return None
+        if decision.command in (SWITCH, CONFIGURATION_REQUIRED):
+            agent_display_name = self._get_agent_display_name(decision.target_agent, language)
+            decision.reply = self._(user_id, "Switched to agent: {agent_name}", language).format(agent_name=agent_display_name)
 
 def get_agent_rooter():
     return AgentRooter()
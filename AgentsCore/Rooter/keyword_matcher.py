@@ -0,0 +1,94 @@
+import re
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+
+@dataclass(frozen=True)
+class KeywordMatch:
+    agent: Optional[Any] = None
+    unknown_keyword: Optional[str] = None
+
+
+NO_MATCH = KeywordMatch()
+
+
+class KeywordMatcher:
+    """Aho-Corasick automaton over all "<app_keyword> <keyword>" patterns.
+
+    Matching cost depends on the message length only, not on the number of
+    registered keywords. When several keywords occur in one message the one
+    registered first wins, same as the former linear scan over the agent map.
+    """
+
+    def __init__(self, app_keyword: str, keywords: Dict[str, Any]):
+        self._app_keyword = app_keyword.lower()
+        self._probe = f"{self._app_keyword} "
+        self._keywords = frozenset(keywords)
+        self._requested_keyword = re.compile(
+            rf"(?<!\w){re.escape(self._app_keyword)}(?!\w)\W*(\w+)", re.UNICODE
+        )
+        self._goto: list[Dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        # (priority, agent) of the best pattern ending in the state or any of its suffix states
+        self._output: list[Optional[tuple[int, Any]]] = [None]
+
+        for priority, (keyword, agent) in enumerate(keywords.items()):
+            self._add_pattern(f"{self._probe}{keyword}", priority, agent)
+        self._build_failure_links()
+
+    def _add_pattern(self, pattern: str, priority: int, agent: Any):
+        state = 0
+        for char in pattern:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(None)
+            state = next_state
+        if self._output[state] is None:
+            self._output[state] = (priority, agent)
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                inherited = self._output[self._fail[next_state]]
+                own = self._output[next_state]
+                if inherited is not None and (own is None or inherited[0] < own[0]):
+                    self._output[next_state] = inherited
+
+    def match(self, text: str) -> KeywordMatch:
+        text = text.lower()
+        if self._probe not in text:
+            return NO_MATCH
+
+        goto, fail, output = self._goto, self._fail, self._output
+        state = 0
+        best = None
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            found = output[state]
+            if found is not None and (best is None or found[0] < best[0]):
+                best = found
+                if best[0] == 0:
+                    break
+
+        if best is not None:
+            return KeywordMatch(agent=best[1])
+
+        requested = self._requested_keyword.search(text)
+        if requested and requested.group(1) not in self._keywords:
+            return KeywordMatch(unknown_keyword=requested.group(1))
+        return NO_MATCH
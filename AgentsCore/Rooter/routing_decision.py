@@ -0,0 +1,21 @@
+from dataclasses import dataclass, field
+from typing import Any, Optional
+from Modules.MessageProcessor.message_processor import Message
+
+WHICH_AGENT = 'which_agent'
+SWITCH = 'switch'
+ALREADY_ACTIVE = 'already_active'
+UNKNOWN_AGENT = 'unknown_agent'
+CONFIGURATION_REQUIRED = 'configuration_required'
+
+
+@dataclass
+class RoutingDecision:
+    """Result of routing one incoming message, computed once per update by AgentRooter.route"""
+    message: Message
+    language: str
+    words: list[str] = field(default_factory=list)
+    command: Optional[str] = None
+    target_agent: Optional[Any] = None
+    reply: Optional[str] = None
+    forward: bool = True
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from ..agent_pool import AgentInstancePool
+
+
+class FakeAgent:
+    def __init__(self, name: str):
+        self.name = name
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestAgentInstancePool:
+    def test_hit_and_miss_counters(self):
+        pool = AgentInstancePool(max_size=2)
+        assert pool.get("u1_default") is None
+        agent = FakeAgent("default")
+        pool.put("u1_default", agent)
+        assert pool.get("u1_default") is agent
+        assert pool.stats['hits'] == 1
+        assert pool.stats['misses'] == 1
+
+    def test_evicts_least_recently_used(self):
+        pool = AgentInstancePool(max_size=2)
+        first, second, third = FakeAgent("a"), FakeAgent("b"), FakeAgent("c")
+        pool.put("a", first)
+        pool.put("b", second)
+        pool.get("a")
+        pool.put("c", third)
+
+        assert "b" not in pool
+        assert second.closed
+        assert not first.closed
+        assert pool.stats['evictions'] == 1
+        assert len(pool) == 2
+
+    def test_evicts_idle_agents(self):
+        clock = FakeClock()
+        pool = AgentInstancePool(max_size=10, idle_timeout=60, clock=clock)
+        idle, active = FakeAgent("idle"), FakeAgent("active")
+        pool.put("idle", idle)
+        clock.now = 30
+        pool.put("active", active)
+        clock.now = 70
+
+        assert pool.get("idle") is None
+        assert idle.closed
+        assert pool.get("active") is active
+        assert pool.stats['evictions'] == 1
+
+    def test_replacing_entry_closes_previous_agent(self):
+        pool = AgentInstancePool(max_size=2)
+        old, new = FakeAgent("old"), FakeAgent("new")
+        pool.put("key", old)
+        pool.put("key", new)
+        assert old.closed
+        assert pool.get("key") is new
+
+    def test_clear_closes_all_agents(self):
+        pool = AgentInstancePool(max_size=5)
+        agents = [FakeAgent(str(i)) for i in range(3)]
+        for agent in agents:
+            pool.put(agent.name, agent)
+        pool.clear()
+        assert len(pool) == 0
+        assert all(agent.closed for agent in agents)
+
+    def test_agent_in_use_is_closed_after_its_call(self):
+        pool = AgentInstancePool(max_size=1)
+        busy, other = FakeAgent("busy"), FakeAgent("other")
+        pool.put("busy", busy)
+        with pool.in_use(busy):
+            pool.put("other", other)
+            assert "busy" not in pool
+            assert not busy.closed
+            assert pool.stats['deferred_closes'] == 1
+        assert busy.closed
+        assert pool.stats['deferred_closes'] == 0
+        assert pool.stats['in_use'] == 0
+
+    def test_idle_eviction_waits_for_nested_calls(self):
+        clock = FakeClock()
+        pool = AgentInstancePool(max_size=10, idle_timeout=60, clock=clock)
+        agent = FakeAgent("slow")
+        pool.put("slow", agent)
+        with pool.in_use(agent):
+            with pool.in_use(agent):
+                clock.now = 120
+                assert pool.get("slow") is None
+            assert not agent.closed
+        assert agent.closed
+
+    def test_memory_stays_bounded_for_many_users(self):
+        pool = AgentInstancePool(max_size=50)
+        for user in range(1000):
+            pool.put(f"{user}_default", FakeAgent("default"))
+        assert len(pool) == 50
+        assert pool.stats['evictions'] == 950
+
+    def test_rejects_empty_pool(self):
+        with pytest.raises(ValueError):
+            AgentInstancePool(max_size=0)
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import json
+import pytest
+from types import SimpleNamespace
+from dataclasses import FrozenInstanceError
+from ..agent_registry import AgentRegistry, AgentRecord
+from .. import agent_rooter
+from ..agent_rooter import AgentRooter, get_agent_rooter
+from SqlDB.retention_policy import RetentionPolicy
+
+
+def _agent_row(id, name, keywords, display_name=None, configuration='{"temperature": 0.7}'):
+    return SimpleNamespace(id=id, name=name, keywords=keywords, configuration=configuration, display_name=display_name)
+
+
+@pytest.fixture
+def registry():
+    return AgentRegistry.from_models([
+        _agent_row(1, 'configuration', 'konfiguracja,config', {"en": "Configuration", "pl": "Konfiguracja"}),
+        _agent_row(2, 'weather', 'pogoda, pogodowy', {"en": "Weather", "pl": "Pogoda"}),
+        _agent_row(3, 'default', 'domyślny, default', {"en": "Default"}, configuration={"temperature": 0.5}),
+        _agent_row(4, 'youtube', 'youtube'),
+    ], "agent")
+
+
+class TestAgentRegistry:
+    def test_indexes(self, registry):
+        weather = registry.get_by_name('weather')
+        assert registry.get_by_id('2') is weather
+        assert registry.get_by_keyword('pogodowy') is weather
+        assert weather.keywords == ('pogoda', 'pogodowy')
+        assert weather.configuration == json.loads('{"temperature": 0.7}')
+        assert registry.default_agent is registry.get_by_name('default')
+        assert registry.configuration_agent is registry.get_by_id('1')
+        assert registry.get_by_name('missing') is None
+
+    @pytest.mark.parametrize("name,language,expected", [
+        ('weather', 'pl', 'Pogoda'),
+        ('weather', 'en', 'Weather'),
+        ('default', 'pl', 'Default'),
+        ('youtube', 'pl', 'youtube'),
+    ])
+    def test_display_name(self, registry, name, language, expected):
+        assert registry.display_name(registry.get_by_name(name), language) == expected
+
+    def test_keyword_matcher_uses_registry_records(self, registry):
+        assert registry.keyword_matcher.match("agent pogoda w Krakowie").agent is registry.get_by_name('weather')
+        assert registry.keyword_matcher.match("agent kalendarz").unknown_keyword == 'kalendarz'
+
+    def test_records_are_compact_and_read_only(self, registry):
+        record = registry.get_by_name('weather')
+        assert not hasattr(record, '__dict__')
+        with pytest.raises(TypeError):
+            record.display_names['de'] = 'Wetter'
+        with pytest.raises(TypeError):
+            record.configuration['temperature'] = 1.0
+        with pytest.raises(FrozenInstanceError):
+            record.name = 'forecast'
+
+    def test_record_copies_configuration(self):
+        configuration = {"temperature": 0.2}
+        record = AgentRecord('1', 'time', ('czas',), configuration)
+        configuration['temperature'] = 1.0
+        assert record.configuration['temperature'] == 0.2
+
+    def test_empty_registry(self):
+        registry = AgentRegistry((), "agent")
+        assert len(registry) == 0
+        assert registry.default_agent is None
+        assert registry.keyword_matcher.match("agent pogoda").agent is None
+
+    def test_record_repr(self):
+        assert repr(AgentRecord('1', 'time', ('czas',), {})) == "AgentRecord(id='1', name='time')"
+
+
+class FakeSession:
+    def __init__(self, agents):
+        self.agents = agents
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, statement):
+        return SimpleNamespace(scalars=lambda: SimpleNamespace(all=lambda: list(self.agents)))
+
+
+class FakeAgent:
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class TestReloadAgents:
+    @pytest.fixture
+    def rooter(self, monkeypatch):
+        monkeypatch.setenv("APP_KEYWORD", "agent")
+        monkeypatch.setattr(RetentionPolicy, '_agent_days', {})
+        AgentRooter._instance = None
+        rooter = get_agent_rooter()
+        rooter.table = [
+            _agent_row(1, 'default', 'default'),
+            _agent_row(2, 'weather', 'pogoda', configuration={"temperature": 0.7, "retention_days": 30}),
+        ]
+        monkeypatch.setattr(agent_rooter, 'AsyncSessionLocal', lambda: FakeSession(rooter.table))
+        yield rooter
+        AgentRooter._instance = None
+
+    def test_reload_swaps_in_a_new_registry(self, rooter):
+        asyncio.run(rooter.load_agents())
+        old_registry = rooter.registry
+        rooter.table = [
+            _agent_row(1, 'default', 'default'),
+            _agent_row(2, 'weather', 'pogoda,forecast', configuration={"temperature": 0.1, "retention_days": 7}),
+        ]
+
+        assert asyncio.run(rooter.reload_agents()) == 2
+        assert rooter.registry is not old_registry
+        assert rooter.registry.get_by_keyword('forecast') is rooter.registry.get_by_name('weather')
+        assert old_registry.get_by_keyword('forecast') is None
+        assert RetentionPolicy().retention_days('2') == 7
+
+    def test_reload_points_users_at_new_records_and_drops_stale_agents(self, rooter):
+        asyncio.run(rooter.load_agents())
+        rooter.current_agents = {'u1': rooter.registry.get_by_name('weather'), 'u2': rooter.registry.default_agent}
+        stale = FakeAgent()
+        rooter._agent_instances.put('u1_weather', stale)
+        rooter.table = [_agent_row(1, 'default', 'default')]
+
+        asyncio.run(rooter.reload_agents())
+
+        assert rooter.current_agents == {'u1': rooter.registry.default_agent, 'u2': rooter.registry.default_agent}
+        assert stale.closed
+        assert len(rooter._agent_instances) == 0
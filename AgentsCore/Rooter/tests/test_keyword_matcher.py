@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import time
+import pytest
+from ..keyword_matcher import KeywordMatcher
+
+AGENT_KEYWORDS = {
+    'konfiguracja': 'configuration',
+    'config': 'configuration',
+    'pogoda': 'weather',
+    'pogodowy': 'weather',
+    'domyślny': 'default',
+    'default': 'default',
+    'czas': 'time',
+    'youtube': 'youtube',
+    'kalkulator': 'calculator',
+}
+
+
+def _naive_match(keywords: dict, text: str):
+    msg = text.lower()
+    for kw, agent in keywords.items():
+        if f"agent {kw}" in msg:
+            return agent
+    return None
+
+
+class CountingDict(dict):
+    """Automaton state counting its transition lookups"""
+    lookups = 0
+
+    def __contains__(self, key):
+        CountingDict.lookups += 1
+        return super().__contains__(key)
+
+    def get(self, key, default=None):
+        CountingDict.lookups += 1
+        return super().get(key, default)
+
+
+def _count_lookups(matcher: KeywordMatcher, text: str) -> int:
+    matcher._goto = [CountingDict(state) for state in matcher._goto]
+    CountingDict.lookups = 0
+    matcher.match(text)
+    return CountingDict.lookups
+
+
+def _best_time(func, repeats: int = 5, number: int = 2000) -> float:
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+class TestKeywordMatcher:
+    @pytest.fixture
+    def matcher(self):
+        return KeywordMatcher("agent", AGENT_KEYWORDS)
+
+    @pytest.mark.parametrize("text,expected", [
+        ("agent pogoda", "weather"),
+        ("Agent Pogoda jaka jest pogoda w Katowicach?", "weather"),
+        ("proszę agent kalkulator 2+2", "calculator"),
+        ("agent domyślny", "default"),
+        ("agent pogodowy", "weather"),
+        ("agent youtube https://youtu.be/abc", "youtube"),
+    ])
+    def test_finds_agent(self, matcher, text, expected):
+        assert matcher.match(text).agent == expected
+
+    @pytest.mark.parametrize("text", [
+        "jaka jest pogoda?",
+        "agent",
+        "agentpogoda",
+        "",
+    ])
+    def test_no_match(self, matcher, text):
+        result = matcher.match(text)
+        assert result.agent is None
+        assert result.unknown_keyword is None
+
+    @pytest.mark.parametrize("text,expected", [
+        ("agent kalendarz", "kalendarz"),
+        ("agent nieznany co tam?", "nieznany"),
+        ("czy agent, foo istnieje", None),
+        ("agent , pogoda", None),
+    ])
+    def test_unknown_keyword(self, matcher, text, expected):
+        result = matcher.match(text)
+        assert result.agent is None
+        assert result.unknown_keyword == expected
+
+    def test_first_registered_keyword_wins(self, matcher):
+        assert matcher.match("agent czas albo agent pogoda").agent == "weather"
+
+    def test_matches_naive_scan(self, matcher):
+        texts = [
+            "agent pogoda", "agent czasu", "xagent configx", "agent kalkulatory",
+            "agent youtube agent config", "nic ciekawego", "agent default agent czas",
+        ]
+        for text in texts:
+            assert matcher.match(text).agent == _naive_match(AGENT_KEYWORDS, text)
+
+
+class TestKeywordMatcherBenchmark:
+    MESSAGE = "agent kalkulator ile to jest dwa razy dwa podzielone przez cztery plus jeden"
+
+    def _keywords(self, count: int) -> dict:
+        keywords = {f"agent{i:04d}": f"agent-{i}" for i in range(count)}
+        keywords['kalkulator'] = 'calculator'
+        return keywords
+
+    def test_routing_cost_stays_flat_with_keyword_count(self):
+        small_keywords = self._keywords(10)
+        large_keywords = self._keywords(500)
+        small = KeywordMatcher("agent", small_keywords)
+        large = KeywordMatcher("agent", large_keywords)
+
+        assert large.match(self.MESSAGE).agent == "calculator"
+
+        small_time = _best_time(lambda: small.match(self.MESSAGE))
+        large_time = _best_time(lambda: large.match(self.MESSAGE))
+        naive_small = _best_time(lambda: _naive_match(small_keywords, self.MESSAGE), number=200)
+        naive_large = _best_time(lambda: _naive_match(large_keywords, self.MESSAGE), number=200)
+
+        # Timings depend on the machine, they are printed only
+        print(f"\nmatcher: 10 keywords {small_time * 500:.2f}us/msg, 500 keywords {large_time * 500:.2f}us/msg")
+        print(f"naive:   10 keywords {naive_small * 5000:.2f}us/msg, 500 keywords {naive_large * 5000:.2f}us/msg")
+
+    def test_transitions_are_bounded_by_message_length(self):
+        # Per character one goto lookup plus at most one per failure link followed,
+        # and failure links never go back further than the characters read
+        lookups = [
+            _count_lookups(KeywordMatcher("agent", self._keywords(count)), self.MESSAGE)
+            for count in (10, 500, 5000)
+        ]
+        assert max(lookups) <= 3 * len(self.MESSAGE)
+        assert len(set(lookups)) == 1
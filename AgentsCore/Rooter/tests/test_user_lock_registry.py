@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import time
+from types import SimpleNamespace
+import pytest
+from ..user_lock_registry import UserLockRegistry
+from ..agent_rooter import AgentRooter, get_agent_rooter
+from TelegramBot.Tools.user_lock_decorator import serialized_per_user
+
+AGENT_LATENCY = 0.02
+MESSAGES_PER_USER = 5
+
+
+@pytest.fixture
+def rooter(monkeypatch):
+    monkeypatch.setenv("APP_KEYWORD", "agent")
+    AgentRooter._instance = None
+    yield get_agent_rooter()
+    AgentRooter._instance = None
+
+
+def _update(user: int, sequence: int):
+    return SimpleNamespace(effective_user=SimpleNamespace(id=user), sequence=sequence)
+
+
+class HandlerProbe:
+    """Update handler recording arrival order and how many updates run at once"""
+
+    def __init__(self, latency: float = AGENT_LATENCY):
+        self.latency = latency
+        self.processed = {}
+        self.active = {}
+        self.max_active = 0
+        self.max_active_per_user = 0
+
+    async def handle(self, update, context):
+        user = update.effective_user.id
+        self.active[user] = self.active.get(user, 0) + 1
+        self.max_active_per_user = max(self.max_active_per_user, self.active[user])
+        self.max_active = max(self.max_active, sum(self.active.values()))
+        try:
+            await asyncio.sleep(self.latency)
+            self.processed.setdefault(user, []).append(update.sequence)
+        finally:
+            self.active[user] -= 1
+
+
+async def _simulate(users: int, probe: HandlerProbe) -> float:
+    """Updates of every user arrive interleaved and go through the real handler decorator"""
+    handler = serialized_per_user(probe.handle)
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        handler(_update(user, sequence), None)
+        for sequence in range(MESSAGES_PER_USER)
+        for user in range(users)
+    ))
+    return time.perf_counter() - start
+
+
+class TestUserLockRegistry:
+    def test_same_user_shares_lock(self):
+        async def run():
+            registry = UserLockRegistry()
+            assert registry.lock(1) is registry.lock(1)
+            assert registry.lock(1) is not registry.lock(2)
+        asyncio.run(run())
+
+    def test_unused_locks_are_released(self):
+        async def run():
+            registry = UserLockRegistry()
+            async with registry.lock(1):
+                assert len(registry) == 1
+            assert len(registry) == 0
+        asyncio.run(run())
+
+    def test_messages_of_one_user_keep_order(self, rooter):
+        probe = HandlerProbe()
+        asyncio.run(_simulate(3, probe))
+
+        assert probe.max_active_per_user == 1
+        for sequences in probe.processed.values():
+            assert sequences == list(range(MESSAGES_PER_USER))
+
+    def test_different_users_run_in_parallel(self, rooter):
+        async def run():
+            entered = asyncio.Event()
+            release = asyncio.Event()
+            running = set()
+
+            async def handle(update, context):
+                running.add(update.effective_user.id)
+                if len(running) == 3:
+                    entered.set()
+                await release.wait()
+
+            handler = serialized_per_user(handle)
+            tasks = [asyncio.create_task(handler(_update(user, 0), None)) for user in (1, 2, 3)]
+            # Every user is inside the handler at the same time, none waits for another
+            await asyncio.wait_for(entered.wait(), timeout=1)
+            release.set()
+            await asyncio.gather(*tasks)
+
+        asyncio.run(run())
+
+    def test_second_update_of_a_user_waits_for_the_first(self, rooter):
+        async def run():
+            events = []
+            release = asyncio.Event()
+
+            async def handle(update, context):
+                events.append(('start', update.sequence))
+                if update.sequence == 0:
+                    await release.wait()
+                events.append(('end', update.sequence))
+
+            handler = serialized_per_user(handle)
+            first = asyncio.create_task(handler(_update(1, 0), None))
+            second = asyncio.create_task(handler(_update(1, 1), None))
+            for _ in range(5):
+                await asyncio.sleep(0)
+            assert events == [('start', 0)]
+            release.set()
+            await asyncio.gather(first, second)
+            return events
+
+        assert asyncio.run(run()) == [('start', 0), ('end', 0), ('start', 1), ('end', 1)]
+
+    @pytest.mark.parametrize("users", [1, 10, 50])
+    def test_throughput_scales_with_simultaneous_users(self, rooter, users):
+        probe = HandlerProbe()
+        elapsed = asyncio.run(_simulate(users, probe))
+        throughput = users * MESSAGES_PER_USER / elapsed
+        serial_throughput = 1 / AGENT_LATENCY
+        # Timings are printed only, concurrency is asserted from what the handler saw
+        print(f"\n{users} users: {throughput:.0f} msg/s (serial baseline {serial_throughput:.0f} msg/s)")
+        assert sum(len(sequences) for sequences in probe.processed.values()) == users * MESSAGES_PER_USER
+        assert probe.max_active_per_user == 1
+        assert probe.max_active == users
@@ -0,0 +1,25 @@
+import asyncio
+import weakref
+from typing import Hashable
+
+
+class UserLockRegistry:
+    """Hands out one asyncio.Lock per user.
+
+    Messages of one user are processed in arrival order while different users
+    run concurrently. Locks are weakly referenced, so a lock disappears as soon
+    as no update of that user is queued or running.
+    """
+
+    def __init__(self):
+        self._locks: weakref.WeakValueDictionary[Hashable, asyncio.Lock] = weakref.WeakValueDictionary()
+
+    def lock(self, user_key: Hashable) -> asyncio.Lock:
+        lock = self._locks.get(user_key)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._locks[user_key] = lock
+        return lock
+
+    def __len__(self) -> int:
+        return len(self._locks)
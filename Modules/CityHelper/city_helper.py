@@ -1,6 +1,7 @@
-from langchain_openai import ChatOpenAI
 from langchain_core.messages import HumanMessage, SystemMessage
 from config import Config
+from Modules.OpenAI.llm_client_registry import get_chat_model
+import asyncio
 import logging
 import requests
 
@@ -8,15 +9,11 @@ class CityHelper:
     
     def __init__(self, temperature: float = 0.7):
         config = Config.from_env()
-        self.llm = ChatOpenAI(
-            model=config.gpt_model,
-            temperature=temperature,
-            openai_api_key=config.openai_api_key
-        )
+        self.llm = get_chat_model(temperature=temperature)
         self.config = config
         self.logger = logging.getLogger(__name__)
     
-    def extract_city_from_message(self, message: str) -> str:
+    async def extract_city_from_message(self, message: str) -> str:
         system_prompt = """You are a geography assistant that extracts city names from user messages.
         Analyze the user's message and extract the city name if they are asking about a specific city.
         
@@ -37,14 +34,14 @@ class CityHelper:
         ]
         
         try:
-            response = self.llm.invoke(messages)
+            response = await self.llm.ainvoke(messages)
             city = response.content.strip()
             return city if city.lower() != "none" else None
         except Exception as e:
             self.logger.error(f"Error extracting city from message '{message}': {str(e)}")
             return None
     
-    def normalize_city_name(self, city_name: str) -> str:
+    async def normalize_city_name(self, city_name: str) -> str:
         system_prompt = """You are a geography expert. Normalize the given city name to its primary, standard form suitable for geocoding.
         
         Rules:
@@ -68,13 +65,17 @@ class CityHelper:
         ]
         
         try:
-            response = self.llm.invoke(messages)
+            response = await self.llm.ainvoke(messages)
             return response.content.strip()
         except Exception as e:
             self.logger.error(f"Error normalizing city name '{city_name}': {str(e)}")
             return city_name
     
-    def get_coordinates_from_geocoding(self, city_name: str) -> tuple:
+    async def get_coordinates_from_geocoding(self, city_name: str) -> tuple:
+        # requests blocks, run it off the event loop
+        return await asyncio.to_thread(self._get_coordinates, city_name)
+    
+    def _get_coordinates(self, city_name: str) -> tuple:
         url = "http://api.openweathermap.org/geo/1.0/direct"
         params = {
             "q": city_name,
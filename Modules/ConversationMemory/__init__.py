@@ -1,11 +1,17 @@
 from .conversation_memory import (
     DatabaseBackedChatMessageHistory,
     ConversationMemoryManager,
-    get_conversation_memory_manager
+    get_conversation_memory_manager,
+    to_chat_message
 )
+from .context_builder import ContextBuilder
+from .vector_memory import VectorMemory
 
 __all__ = [
     'DatabaseBackedChatMessageHistory',
     'ConversationMemoryManager',
-    'get_conversation_memory_manager'
+    'get_conversation_memory_manager',
+    'to_chat_message',
+    'ContextBuilder',
+    'VectorMemory'
 ]
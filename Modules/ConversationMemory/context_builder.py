@@ -0,0 +1,62 @@
+from typing import List, Sequence
+from langchain_core.messages import BaseMessage
+from Modules.OpenAI.token_counter import TokenCounter, get_token_counter
+
+TOKEN_COUNT_KEY = 'token_count'
+
+
+class ContextBuilder:
+    """Fits chat history into the token budget of an agent prompt.
+
+    The newest messages are kept, older ones are dropped once the budget is
+    used up and the oldest kept message is trimmed to what is left of it.
+    Token counts stored with the history are read from the message metadata,
+    only messages without one are tokenized, and then only once.
+    """
+    # Role and separators the chat format adds to every message
+    MESSAGE_OVERHEAD = 4
+    # A trimmed message shorter than this is dropped instead
+    MIN_TRIMMED_TOKENS = 32
+
+    def __init__(self, token_budget: int, counter: TokenCounter = None):
+        self.token_budget = token_budget
+        self.counter = counter or get_token_counter()
+
+    def count(self, message: BaseMessage) -> int:
+        token_count = message.response_metadata.get(TOKEN_COUNT_KEY)
+        if token_count is None:
+            token_count = self.counter.count(message.content)
+            message.response_metadata[TOKEN_COUNT_KEY] = token_count
+        return token_count + self.MESSAGE_OVERHEAD
+
+    def count_messages(self, messages: Sequence[BaseMessage]) -> int:
+        return sum(self.count(message) for message in messages)
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """Beginning of text that fits into max_tokens"""
+        return self.counter.truncate(text, max_tokens)
+
+    def build(self, history: Sequence[BaseMessage], reserved: int = 0) -> List[BaseMessage]:
+        """Newest messages of history, oldest first, that fit next to `reserved` tokens
+        of system prompt and current message"""
+        remaining = self.token_budget - reserved
+        kept = []
+        for message in reversed(history):
+            tokens = self.count(message)
+            if tokens <= remaining:
+                kept.append(message)
+                remaining -= tokens
+                continue
+
+            available = remaining - self.MESSAGE_OVERHEAD
+            if available >= self.MIN_TRIMMED_TOKENS:
+                # Keep the end of the message, it is the part closest to the kept conversation
+                content = self.counter.truncate(message.content, available, keep_end=True)
+                kept.append(message.model_copy(update={
+                    'content': content,
+                    'response_metadata': {**message.response_metadata, TOKEN_COUNT_KEY: available}
+                }))
+            break
+
+        kept.reverse()
+        return kept
@@ -1,84 +1,318 @@
 from langchain_core.chat_history import BaseChatMessageHistory
-from langchain_core.messages import BaseMessage, HumanMessage, AIMessage
-from langchain_core.runnables import RunnableWithMessageHistory
-from typing import List, Dict, Any, Optional
+from langchain_core.messages import BaseMessage, HumanMessage, AIMessage, SystemMessage
+from collections import OrderedDict, deque
+from datetime import datetime
+from itertools import islice
+from typing import Deque, List, Optional
+import asyncio
+from config import Config
+from Modules.OpenAI.token_counter import get_token_counter
 from SqlDB.conversation_history import ConversationHistoryService
-import uuid
+from SqlDB.conversation_storage import ConversationStorage
+from .context_builder import TOKEN_COUNT_KEY
+from .conversation_summarizer import ConversationSummarizer
+from .vector_memory import VectorMemory
+
+TIMESTAMP_KEY = 'timestamp'
+
+def to_chat_message(row: dict) -> Optional[BaseMessage]:
+    """Chat message of a stored user or assistant row carrying its stored token count and timestamp"""
+    metadata = {TIMESTAMP_KEY: row['timestamp']}
+    if row.get('token_count') is not None:
+        metadata[TOKEN_COUNT_KEY] = row['token_count']
+    if row['role'] == 'user':
+        return HumanMessage(content=row['content'], response_metadata=metadata)
+    if row['role'] == 'assistant':
+        return AIMessage(content=row['content'], response_metadata=metadata)
+    return None
+
+
+class ConversationMemoryStats:
+    __slots__ = ('loads', 'loads_avoided', 'summaries')
+
+    def __init__(self):
+        self.loads = 0
+        self.loads_avoided = 0
+        self.summaries = 0
+
 
 class DatabaseBackedChatMessageHistory(BaseChatMessageHistory):
-    def __init__(self, user_id: str, agent_id: str):
+    """Chat history of a user-agent pair with an optional rolling summary.
+
+    Messages are held in a ring buffer of `window` messages, adding one to a
+    full buffer drops the oldest. With a summarizer and a summary_threshold,
+    once more than summary_threshold messages (or a full window) are in memory
+    the older ones are folded into the stored running summary in the
+    background and the newest half stays verbatim. With a vector memory, added
+    messages are indexed for similarity search.
+    """
+    LOAD_LIMIT = 10
+
+    def __init__(self, user_id: str, agent_id: str, storage: ConversationStorage = None, stats: ConversationMemoryStats = None,
+                 summarizer: ConversationSummarizer = None, summary_threshold: int = 0, vector_memory: VectorMemory = None,
+                 window: int = 40):
         self.user_id = user_id
         self.agent_id = agent_id
-        self.conversation_service = ConversationHistoryService()
-        self._load_existing_history()
-    
-    def _load_existing_history(self):
-        """Load existing conversation history from database"""
-        history = self.conversation_service.get_conversation_history(
-            self.user_id, 
-            self.agent_id, 
-            limit=10,
+        self._messages: Deque[BaseMessage] = deque(maxlen=window)
+        self.conversation_service = ConversationHistoryService(storage)
+        self._stats = stats or ConversationMemoryStats()
+        self._loaded = False
+        self._summarizer = summarizer
+        self.summary_threshold = summary_threshold
+        self.summary: Optional[str] = None
+        self._summary_token_count: Optional[int] = None
+        self._summary_task = None
+        self._generation = 0
+        self._vector_memory = vector_memory
+        # Set by the manager when it drops this history, holders fetch a new one
+        self.evicted = False
+
+    async def _load_existing_history(self):
+        """Load the running summary and the messages newer than it from database"""
+        summary = await self.conversation_service.get_summary(self.user_id, self.agent_id)
+        limit = min(self.LOAD_LIMIT, self.window)
+        if summary is not None or self._summarizes():
+            # Messages not folded into the summary yet are nowhere else, all of them up to the window come back
+            limit = self.window
+        history = await self.conversation_service.get_conversation_history(
+            self.user_id,
+            self.agent_id,
+            limit=limit,
             exclude_tool_calls=True
         )
-        
-        for msg in reversed(history):
-            if msg['role'] == 'user':
-                self.messages.append(HumanMessage(content=msg['content']))
-            elif msg['role'] == 'assistant':
-                self.messages.append(AIMessage(content=msg['content']))
-    
-    def add_user_message(self, message: str) -> None:
+
+        summarized_until = None
+        if summary is not None:
+            self.summary = summary['summary']
+            self._summary_token_count = summary['token_count']
+            summarized_until = summary['summarized_until']
+
+        loaded = [
+            to_chat_message(msg) for msg in reversed(history)
+            if summarized_until is None or msg['timestamp'] > summarized_until
+        ]
+        self.messages.extend(message for message in loaded if message is not None)
+        self._loaded = True
+        self._stats.loads += 1
+        self._maybe_summarize()
+
+    async def aget_messages(self) -> Deque[BaseMessage]:
+        """Get all messages, loading the stored history on first read.
+
+        Messages added before the first read are not kept in memory, the
+        initial load picks them up from the database.
+        """
+        if not self._loaded:
+            await self._load_existing_history()
+        return self.messages
+
+    async def aadd_user_message(self, message: str) -> None:
         """Add a user message to the store."""
-        self.conversation_service.save_message(
-            self.user_id, 
-            self.agent_id, 
-            'user', 
-            message
+        token_count = get_token_counter().count(message)
+        await self.conversation_service.save_message(
+            self.user_id,
+            self.agent_id,
+            'user',
+            message,
+            token_count=token_count
         )
-        self.messages.append(HumanMessage(content=message))
-    
-    def add_ai_message(self, message: str) -> None:
+        metadata = self._metadata(token_count)
+        if self._loaded:
+            self.messages.append(HumanMessage(content=message, response_metadata=metadata))
+            self._maybe_summarize()
+        if self._vector_memory is not None:
+            self._vector_memory.add(self.user_id, self.agent_id, 'user', message, metadata[TIMESTAMP_KEY])
+
+    async def aadd_ai_message(self, message: str) -> None:
         """Add an AI message to the store."""
-        self.conversation_service.save_message(
-            self.user_id, 
-            self.agent_id, 
-            'assistant', 
-            message
+        token_count = get_token_counter().count(message)
+        await self.conversation_service.save_message(
+            self.user_id,
+            self.agent_id,
+            'assistant',
+            message,
+            token_count=token_count
         )
-        self.messages.append(AIMessage(content=message))
-    
-    def add_tool_call(self, content: str) -> None:
+        metadata = self._metadata(token_count)
+        if self._loaded:
+            self.messages.append(AIMessage(content=message, response_metadata=metadata))
+            self._maybe_summarize()
+        if self._vector_memory is not None:
+            self._vector_memory.add(self.user_id, self.agent_id, 'assistant', message, metadata[TIMESTAMP_KEY])
+
+    async def aadd_tool_call(self, content: str) -> None:
         """Add a tool call to the store (not part of chat history)"""
-        self.conversation_service.save_message(
-            self.user_id, 
-            self.agent_id, 
-            'tool', 
+        await self.conversation_service.save_message(
+            self.user_id,
+            self.agent_id,
+            'tool',
             content
         )
-    
+
+    @staticmethod
+    def _metadata(token_count: int) -> dict:
+        # Stamped after the save, so it is never before the stored timestamp
+        return {TOKEN_COUNT_KEY: token_count, TIMESTAMP_KEY: datetime.utcnow()}
+
+    def summary_message(self) -> Optional[SystemMessage]:
+        """The running summary as a prompt message, None while there is none"""
+        if not self.summary:
+            return None
+        metadata = {TOKEN_COUNT_KEY: self._summary_token_count} if self._summary_token_count is not None else {}
+        return SystemMessage(content=f"Summary of the earlier conversation:\n{self.summary}", response_metadata=metadata)
+
+    async def asearch_similar(self, text: str, k: int = None) -> List[BaseMessage]:
+        """Earlier messages most similar to text, oldest first, leaving out those already in memory"""
+        if self._vector_memory is None:
+            return []
+        if not self._loaded:
+            await self._load_existing_history()
+        in_memory = {message.response_metadata.get(TIMESTAMP_KEY) for message in self.messages}
+        rows = await self._vector_memory.search(self.user_id, self.agent_id, text, k, in_memory)
+        return [to_chat_message(row) for row in rows]
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    @property
+    def window(self) -> int:
+        return self._messages.maxlen
+
+    def _summary_limit(self) -> int:
+        # Fold before a full window starts dropping messages that were never summarized
+        return min(self.summary_threshold, self.window - 1)
+
+    def _summarizes(self) -> bool:
+        return self._summarizer is not None and bool(self.summary_threshold)
+
+    def _maybe_summarize(self) -> None:
+        if not self._summarizes() or len(self.messages) <= self._summary_limit():
+            return
+        if self._summary_task is not None and not self._summary_task.done():
+            return
+        self._summary_task = asyncio.get_running_loop().create_task(self._summarize())
+
+    async def _summarize(self) -> None:
+        """Fold all but the newest messages into the summary.
+
+        The folded messages stay in memory until the new summary is stored, so
+        prompts built meanwhile still see them.
+        """
+        generation = self._generation
+        folded = list(islice(self.messages, len(self.messages) - self._summary_limit() // 2))
+        try:
+            summary = await self._summarizer.summarize(self.summary, folded)
+            summarized_until = folded[-1].response_metadata.get(TIMESTAMP_KEY) or datetime.utcnow()
+            token_count = await self.conversation_service.save_summary(self.user_id, self.agent_id, summary, summarized_until)
+        except Exception as e:
+            print(f"Error summarizing conversation {self.user_id}:{self.agent_id}: {e}")
+            return
+
+        self._stats.summaries += 1
+        if generation != self._generation:
+            # clear() ran meanwhile, the summary is stored but no longer part of this history
+            return
+        # Messages added meanwhile may have pushed some of the folded ones out already
+        folded_ids = {id(message) for message in folded}
+        while self.messages and id(self.messages[0]) in folded_ids:
+            self.messages.popleft()
+        self.summary = summary
+        self._summary_token_count = token_count
+
     def clear(self) -> None:
         """Clear the store."""
         self.messages.clear()
-    
+        self.summary = None
+        self._summary_token_count = None
+        self._generation += 1
+        self._loaded = True
+
     @property
-    def messages(self) -> List[BaseMessage]:
-        """Get all messages."""
-        if not hasattr(self, '_messages'):
-            self._messages = []
+    def messages(self) -> Deque[BaseMessage]:
+        """Get all messages, oldest first."""
         return self._messages
 
 class ConversationMemoryManager:
-    def __init__(self):
-        self.histories = {}
-    
-    def get_chat_history(self, user_id: str, agent_id: str) -> BaseChatMessageHistory:
-        """Get or create a chat message history for a user-agent pair"""
+    """Process-wide LRU cache of chat histories shared by all agent instances.
+
+    A history loads its messages from the database on the first read only,
+    later reads and agents of the same user-agent pair reuse them. Agents
+    hold on to the history they got, so a hit is a new agent instance reusing
+    it, and a load is avoided when that history was loaded already.
+    """
+    _instance = None
+
+    @classmethod
+    def get_instance(cls) -> 'ConversationMemoryManager':
+        if cls._instance is None:
+            config = Config.from_env()
+            vector_memory = None
+            if config.conversation_vector_top_k > 0:
+                vector_memory = VectorMemory(
+                    top_k=config.conversation_vector_top_k,
+                    max_indexes=config.conversation_memory_max_histories,
+                    max_messages=config.conversation_vector_max_messages
+                )
+            cls._instance = cls(
+                config.conversation_memory_max_histories,
+                summarizer=ConversationSummarizer(),
+                summary_threshold=config.conversation_summary_threshold,
+                vector_memory=vector_memory,
+                window=config.conversation_history_window
+            )
+        return cls._instance
+
+    def __init__(self, max_histories: int = 1024, storage: ConversationStorage = None, summarizer: ConversationSummarizer = None,
+                 summary_threshold: int = 0, vector_memory: VectorMemory = None, window: int = 40):
+        self.max_histories = max_histories
+        self.window = window
+        self.storage = storage
+        self.summarizer = summarizer
+        self.summary_threshold = summary_threshold
+        self.vector_memory = vector_memory
+        self.histories: 'OrderedDict[str, DatabaseBackedChatMessageHistory]' = OrderedDict()
+        self._stats = ConversationMemoryStats()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_chat_history(self, user_id: str, agent_id: str, window: Optional[int] = None) -> BaseChatMessageHistory:
+        """Get or create a chat message history for a user-agent pair, window defaults to the manager's"""
         memory_key = f"{user_id}:{agent_id}"
-        
-        if memory_key not in self.histories:
-            self.histories[memory_key] = DatabaseBackedChatMessageHistory(user_id, agent_id)
-        
-        return self.histories[memory_key]
+
+        history = self.histories.get(memory_key)
+        if history is not None:
+            self.hits += 1
+            if history.loaded:
+                self._stats.loads_avoided += 1
+            self.histories.move_to_end(memory_key)
+            return history
+
+        self.misses += 1
+        history = DatabaseBackedChatMessageHistory(
+            user_id, agent_id, self.storage, self._stats, self.summarizer, self.summary_threshold, self.vector_memory,
+            window or self.window
+        )
+        self.histories[memory_key] = history
+        while len(self.histories) > self.max_histories:
+            _, evicted = self.histories.popitem(last=False)
+            evicted.evicted = True
+            self.evictions += 1
+        return history
+
+    @property
+    def stats(self) -> dict:
+        return {
+            'size': len(self.histories),
+            'max_size': self.max_histories,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'loads': self._stats.loads,
+            'loads_avoided': self._stats.loads_avoided,
+            'summaries': self._stats.summaries
+        }
 
 def get_conversation_memory_manager() -> ConversationMemoryManager:
-    return ConversationMemoryManager()
+    return ConversationMemoryManager.get_instance()
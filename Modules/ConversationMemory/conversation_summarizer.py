@@ -0,0 +1,41 @@
+from typing import Optional, Sequence
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
+from Modules.OpenAI.llm_client_registry import get_chat_model
+
+
+class ConversationSummarizer:
+    """Folds chat messages into a running summary.
+
+    Every call sends only the previous summary and the messages to fold, so
+    its cost does not grow with the length of the conversation.
+    """
+    MAX_SUMMARY_WORDS = 200
+    SYSTEM_PROMPT = (
+        "You maintain a running summary of a conversation between a user and an assistant. "
+        "Extend the current summary with the new lines and return only the updated summary. "
+        "Keep facts about the user, their requests, decisions and open questions, drop small talk. "
+        "Write it in the language of the conversation, in at most {max_words} words."
+    )
+
+    def __init__(self, llm=None):
+        self._llm = llm
+
+    def _get_llm(self):
+        if self._llm is None:
+            self._llm = get_chat_model(temperature=0)
+        return self._llm
+
+    @staticmethod
+    def _format_lines(messages: Sequence[BaseMessage]) -> str:
+        return '\n'.join(
+            f"{'User' if isinstance(message, HumanMessage) else 'Assistant'}: {message.content}"
+            for message in messages
+        )
+
+    async def summarize(self, previous_summary: Optional[str], messages: Sequence[BaseMessage]) -> str:
+        prompt = f"Current summary:\n{previous_summary or '(empty)'}\n\nNew lines:\n{self._format_lines(messages)}"
+        response = await self._get_llm().ainvoke([
+            SystemMessage(content=self.SYSTEM_PROMPT.format(max_words=self.MAX_SUMMARY_WORDS)),
+            HumanMessage(content=prompt)
+        ])
+        return response.content.strip()
@@ -0,0 +1,52 @@
+import re
+import zlib
+from abc import ABC, abstractmethod
+from typing import Sequence
+import numpy as np
+
+
+class Embedder(ABC):
+    """Turns texts into L2 normalized float32 vectors of `dimensions` values"""
+    dimensions: int
+
+    @abstractmethod
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """Matrix with one row per text"""
+
+
+class HashingEmbedder(Embedder):
+    """Offline embedder hashing words and character n-grams into a fixed number of buckets.
+
+    Buckets are picked with crc32, so vectors are the same in every process and
+    never have to be stored. A second hash bit gives each feature a sign, which
+    keeps collisions from adding up.
+    """
+    WORD_PATTERN = re.compile(r'\w+', re.UNICODE)
+
+    def __init__(self, dimensions: int = 256, ngram: int = 3):
+        self.dimensions = dimensions
+        self.ngram = ngram
+
+    def _features(self, text: str):
+        for word in self.WORD_PATTERN.findall(text.lower()):
+            yield word
+            padded = f"#{word}#"
+            for start in range(max(len(padded) - self.ngram + 1, 1)):
+                yield padded[start:start + self.ngram]
+
+    def _embed_one(self, text: str) -> np.ndarray:
+        hashes = np.fromiter(
+            (zlib.crc32(feature.encode('utf-8')) for feature in self._features(text)),
+            dtype=np.uint32
+        )
+        if hashes.size == 0:
+            return np.zeros(self.dimensions, dtype=np.float32)
+        signs = np.where(hashes & 0x80000000, -1.0, 1.0)
+        vector = np.bincount(hashes % self.dimensions, weights=signs, minlength=self.dimensions).astype(np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, self.dimensions), dtype=np.float32)
+        return np.stack([self._embed_one(text) for text in texts])
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+
+import asyncio
+from langchain_core.messages import AIMessage, HumanMessage
+from SqlDB.memory_conversation_storage import MemoryConversationStorage
+from Modules.ConversationMemory.context_builder import ContextBuilder, TOKEN_COUNT_KEY
+from Modules.ConversationMemory.conversation_memory import DatabaseBackedChatMessageHistory
+
+
+class WordCounter:
+    """One token per word, remembers how often it tokenized"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def count(self, text: str) -> int:
+        self.calls += 1
+        return len(text.split())
+
+    def truncate(self, text: str, max_tokens: int, keep_end: bool = False) -> str:
+        words = text.split()
+        return ' '.join(words[-max_tokens:] if keep_end else words[:max_tokens])
+
+
+def words(count: int, word: str = 'word') -> str:
+    return ' '.join([word] * count)
+
+
+class TestContextBuilder:
+    def test_history_within_budget_is_kept(self):
+        builder = ContextBuilder(100, WordCounter())
+        history = [HumanMessage(content='hello'), AIMessage(content='hi there')]
+
+        assert builder.build(history) == history
+
+    def test_oldest_messages_are_dropped_first(self):
+        builder = ContextBuilder(2 * (10 + ContextBuilder.MESSAGE_OVERHEAD), WordCounter())
+        history = [HumanMessage(content=words(10, 'old')), AIMessage(content=words(10, 'middle')), HumanMessage(content=words(10, 'new'))]
+
+        assert builder.build(history) == history[1:]
+
+    def test_reserved_tokens_are_left_free(self):
+        builder = ContextBuilder(2 * (10 + ContextBuilder.MESSAGE_OVERHEAD), WordCounter())
+        history = [HumanMessage(content=words(10, 'old')), AIMessage(content=words(10, 'new'))]
+
+        assert builder.build(history, reserved=10 + ContextBuilder.MESSAGE_OVERHEAD) == history[1:]
+
+    def test_oldest_kept_message_is_trimmed_from_its_start(self):
+        budget = 10 + ContextBuilder.MIN_TRIMMED_TOKENS + 2 * ContextBuilder.MESSAGE_OVERHEAD
+        builder = ContextBuilder(budget, WordCounter())
+        history = [HumanMessage(content=words(100, 'old') + ' end'), AIMessage(content=words(10, 'new'))]
+
+        context = builder.build(history)
+
+        assert len(context) == 2
+        assert context[0].content.endswith('end')
+        assert len(context[0].content.split()) == ContextBuilder.MIN_TRIMMED_TOKENS
+        assert context[0].response_metadata[TOKEN_COUNT_KEY] == ContextBuilder.MIN_TRIMMED_TOKENS
+        assert history[0].content.startswith('old')
+        assert builder.count_messages(context) <= budget
+
+    def test_stored_token_counts_are_not_recounted(self):
+        counter = WordCounter()
+        builder = ContextBuilder(1000, counter)
+        history = [HumanMessage(content='hello world', response_metadata={TOKEN_COUNT_KEY: 2})]
+
+        builder.build(history)
+
+        assert counter.calls == 0
+
+    def test_messages_are_counted_once(self):
+        counter = WordCounter()
+        builder = ContextBuilder(1000, counter)
+        history = [HumanMessage(content='hello world')]
+
+        builder.build(history)
+        builder.build(history)
+
+        assert counter.calls == 1
+        assert history[0].response_metadata[TOKEN_COUNT_KEY] == 2
+
+
+class TestStoredTokenCounts:
+    def test_token_counts_are_stored_and_loaded(self):
+        storage = MemoryConversationStorage()
+        history = DatabaseBackedChatMessageHistory('user', 'agent', storage)
+
+        asyncio.run(history.aadd_user_message('hello'))
+        stored = asyncio.run(storage.get_conversation_history('user', 'agent'))
+        loaded = asyncio.run(history.aget_messages())
+
+        assert stored[0]['token_count'] > 0
+        assert loaded[0].response_metadata[TOKEN_COUNT_KEY] == stored[0]['token_count']
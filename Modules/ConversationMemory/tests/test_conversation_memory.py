@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+
+import asyncio
+import tracemalloc
+import pytest
+from SqlDB.memory_conversation_storage import MemoryConversationStorage
+from Modules.ConversationMemory.conversation_memory import (
+    ConversationMemoryManager,
+    get_conversation_memory_manager
+)
+
+
+@pytest.fixture
+def storage():
+    return MemoryConversationStorage()
+
+
+@pytest.fixture
+def manager(storage):
+    return ConversationMemoryManager(max_histories=2, storage=storage)
+
+
+class TestConversationMemoryManager:
+    def test_manager_is_shared(self):
+        assert get_conversation_memory_manager() is get_conversation_memory_manager()
+
+    def test_history_is_loaded_once(self, manager, storage):
+        asyncio.run(storage.save_message('user', 'agent', 'user', 'hello'))
+        history = manager.get_chat_history('user', 'agent')
+
+        first = asyncio.run(history.aget_messages())
+        asyncio.run(history.aadd_ai_message('hi'))
+        second = asyncio.run(manager.get_chat_history('user', 'agent').aget_messages())
+
+        assert [message.content for message in first] == ['hello', 'hi']
+        assert second is first
+        assert manager.stats['loads'] == 1
+        assert manager.stats['loads_avoided'] == 1
+        assert manager.stats['hits'] == 1
+
+    def test_reads_of_a_held_history_are_not_counted(self, manager, storage):
+        history = manager.get_chat_history('user', 'agent')
+        for _ in range(3):
+            asyncio.run(history.aget_messages())
+        # Reused before its first read, nothing was loaded that could be avoided
+        manager.get_chat_history('other', 'agent')
+        manager.get_chat_history('other', 'agent')
+
+        assert manager.stats['loads'] == 1
+        assert manager.stats['loads_avoided'] == 0
+        assert manager.stats['hits'] == 1
+
+    def test_evicted_history_is_marked(self, manager):
+        first = manager.get_chat_history('user', 'first')
+        manager.get_chat_history('user', 'second')
+        manager.get_chat_history('user', 'third')
+
+        assert first.evicted
+        assert manager.get_chat_history('user', 'first') is not first
+
+    def test_nothing_is_loaded_before_first_read(self, manager):
+        history = manager.get_chat_history('user', 'agent')
+        asyncio.run(history.aadd_user_message('hello'))
+
+        assert manager.stats['loads'] == 0
+        assert list(history.messages) == []
+
+    def test_least_recently_used_history_is_evicted(self, manager):
+        first = manager.get_chat_history('user', 'first')
+        manager.get_chat_history('user', 'second')
+        manager.get_chat_history('user', 'first')
+        manager.get_chat_history('user', 'third')
+
+        assert manager.get_chat_history('user', 'first') is first
+        assert manager.stats['evictions'] >= 1
+        assert 'user:second' not in manager.histories
+
+
+SESSION_TURNS = 10_000
+
+
+class TestMessageWindow:
+    async def _chat(self, history, turns):
+        for turn in range(turns):
+            await history.aadd_user_message(f"question {turn}")
+            await history.aadd_ai_message(f"answer {turn}")
+
+    def test_oldest_messages_are_dropped(self, storage):
+        history = ConversationMemoryManager(storage=storage, window=4).get_chat_history('user', 'agent')
+
+        async def run():
+            await history.aget_messages()
+            await self._chat(history, 3)
+
+        asyncio.run(run())
+
+        assert [message.content for message in history.messages] == ['question 1', 'answer 1', 'question 2', 'answer 2']
+
+    def test_window_per_agent(self, manager):
+        assert manager.get_chat_history('user', 'agent', window=6).window == 6
+        assert manager.get_chat_history('user', 'other').window == manager.window
+
+    def test_full_window_is_summarized(self, storage):
+        summarizer = FakeSummarizer()
+        history = ConversationMemoryManager(storage=storage, summarizer=summarizer, summary_threshold=20, window=4).get_chat_history('user', 'agent')
+
+        async def run():
+            await history.aget_messages()
+            await self._chat(history, 2)
+            await history._summary_task
+
+        asyncio.run(run())
+
+        assert summarizer.calls == [(None, ['question 0', 'answer 0', 'question 1'])]
+        assert [message.content for message in history.messages] == ['answer 1']
+
+    def test_memory_of_10k_turn_session(self, storage):
+        """Memory in use after 1k turns and after 10k turns of one session is the same"""
+        history = ConversationMemoryManager(storage=storage, window=40).get_chat_history('user', 'agent')
+
+        async def run():
+            await history.aget_messages()
+            tracemalloc.start()
+            await self._chat(history, SESSION_TURNS // 10)
+            after_1k = tracemalloc.get_traced_memory()[0]
+            await self._chat(history, SESSION_TURNS - SESSION_TURNS // 10)
+            after_10k = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+            return after_1k, after_10k
+
+        after_1k, after_10k = asyncio.run(run())
+        print(f"\nTraced memory after {SESSION_TURNS // 10} turns: {after_1k} bytes, "
+              f"after {SESSION_TURNS} turns: {after_10k} bytes, {len(history.messages)} messages kept")
+
+        assert len(history.messages) == 40
+        assert after_10k - after_1k < 64 * 1024
+
+
+class FakeSummarizer:
+    def __init__(self):
+        self.calls = []
+
+    async def summarize(self, previous_summary, messages):
+        self.calls.append((previous_summary, [message.content for message in messages]))
+        return ' '.join(filter(None, [previous_summary] + [message.content for message in messages]))
+
+
+class TestRollingSummary:
+    async def _add_messages(self, history, count, start=0):
+        for index in range(start, start + count):
+            await history.aadd_user_message(f"m{index}")
+        await history._summary_task
+
+    def test_older_messages_are_folded_into_summary(self, storage):
+        summarizer = FakeSummarizer()
+        manager = ConversationMemoryManager(storage=storage, summarizer=summarizer, summary_threshold=4)
+        history = manager.get_chat_history('user', 'agent')
+
+        async def run():
+            await history.aget_messages()
+            await self._add_messages(history, 5)
+
+        asyncio.run(run())
+
+        assert summarizer.calls == [(None, ['m0', 'm1', 'm2'])]
+        assert [message.content for message in history.messages] == ['m3', 'm4']
+        assert history.summary == 'm0 m1 m2'
+        assert 'm0 m1 m2' in history.summary_message().content
+        assert manager.stats['summaries'] == 1
+
+    def test_summary_builds_on_previous_summary(self, storage):
+        summarizer = FakeSummarizer()
+        history = ConversationMemoryManager(storage=storage, summarizer=summarizer, summary_threshold=4).get_chat_history('user', 'agent')
+
+        async def run():
+            await history.aget_messages()
+            await self._add_messages(history, 5)
+            await self._add_messages(history, 3, start=5)
+
+        asyncio.run(run())
+
+        assert summarizer.calls[1] == ('m0 m1 m2', ['m3', 'm4', 'm5'])
+        assert history.summary == 'm0 m1 m2 m3 m4 m5'
+
+    def test_summary_is_loaded_with_newer_messages_only(self, storage):
+        summarizer = FakeSummarizer()
+        history = ConversationMemoryManager(storage=storage, summarizer=summarizer, summary_threshold=4).get_chat_history('user', 'agent')
+
+        async def run():
+            await history.aget_messages()
+            await self._add_messages(history, 5)
+            reloaded = ConversationMemoryManager(storage=storage).get_chat_history('user', 'agent')
+            return reloaded, await reloaded.aget_messages()
+
+        reloaded, messages = asyncio.run(run())
+
+        assert reloaded.summary == 'm0 m1 m2'
+        assert [message.content for message in messages] == ['m3', 'm4']
+
+    def test_reload_keeps_every_message_newer_than_summary(self, storage):
+        async def run():
+            for index in range(15):
+                await storage.save_message('user', 'agent', 'user', f"m{index}")
+                # Distinct timestamps, the summary boundary compares them
+                await asyncio.sleep(0.001)
+            oldest_first = list(reversed(await storage.get_conversation_history('user', 'agent', limit=None)))
+            await storage.save_summary('user', 'agent', 'm0 m1 m2', None, oldest_first[2]['timestamp'])
+            history = ConversationMemoryManager(storage=storage, summarizer=FakeSummarizer(), summary_threshold=20).get_chat_history('user', 'agent')
+            return await history.aget_messages()
+
+        messages = asyncio.run(run())
+
+        # More than LOAD_LIMIT messages were never folded, none of them may be lost
+        assert [message.content for message in messages] == [f"m{index}" for index in range(3, 15)]
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+
+import asyncio
+import statistics
+import threading
+import time
+from datetime import datetime, timedelta
+import numpy as np
+import pytest
+from SqlDB.memory_conversation_storage import MemoryConversationStorage
+from Modules.ConversationMemory.conversation_memory import ConversationMemoryManager
+from Modules.ConversationMemory.embedder import HashingEmbedder
+from Modules.ConversationMemory.vector_memory import VectorIndex, VectorMemory
+
+STORED_MESSAGES = 100_000
+TOPICS = ['pizza recipe with mozzarella', 'flight to Lisbon in May', 'python list comprehension', 'running shoes for marathon', 'birthday gift for my sister']
+
+
+@pytest.fixture
+def storage():
+    return MemoryConversationStorage()
+
+
+def _message(index: int) -> str:
+    return f"{TOPICS[index % len(TOPICS)]} note {index}"
+
+
+class ThreadRecordingEmbedder(HashingEmbedder):
+    def __init__(self):
+        super().__init__()
+        self.threads = []
+
+    def embed(self, texts):
+        self.threads.append(threading.get_ident())
+        return super().embed(texts)
+
+
+class TestHashingEmbedder:
+    def test_vectors_are_normalized_and_stable(self):
+        embedder = HashingEmbedder()
+        first = embedder.embed(['Where is my flight to Lisbon?'])
+        second = HashingEmbedder().embed(['Where is my flight to Lisbon?'])
+
+        assert first.shape == (1, embedder.dimensions)
+        assert np.isclose(np.linalg.norm(first[0]), 1.0)
+        assert np.array_equal(first, second)
+
+    def test_similar_texts_score_higher(self):
+        query, similar, other = HashingEmbedder().embed(['flight to Lisbon', 'my flights to lisbon', 'pizza with mozzarella'])
+        assert query @ similar > query @ other
+
+    def test_empty_text(self):
+        assert not HashingEmbedder().embed([''])[0].any()
+
+
+class TestVectorMemory:
+    def test_index_is_built_from_stored_history(self, storage):
+        memory = VectorMemory(storage, top_k=1)
+
+        async def run():
+            for index in range(10):
+                await storage.save_message('user', 'agent', 'user', _message(index))
+            return await memory.search('user', 'agent', 'cheap flight to Lisbon')
+
+        results = asyncio.run(run())
+
+        assert len(results) == 1
+        assert 'Lisbon' in results[0]['content']
+        assert memory.stats['builds'] == 1
+
+    def test_history_adds_messages_incrementally(self, storage):
+        memory = VectorMemory(storage, top_k=2)
+        history = ConversationMemoryManager(storage=storage, vector_memory=memory).get_chat_history('user', 'agent')
+
+        async def run():
+            await memory.search('user', 'agent', 'anything')
+            await history.aadd_user_message('Recommend running shoes for a marathon')
+            await history.aadd_ai_message('Try a cushioned marathon shoe')
+            return await memory.search('user', 'agent', 'marathon shoes')
+
+        results = asyncio.run(run())
+
+        assert memory.stats['builds'] == 1
+        assert memory.stats['messages'] == 2
+        assert {result['role'] for result in results} == {'user', 'assistant'}
+
+    def test_messages_in_memory_are_not_returned(self, storage):
+        memory = VectorMemory(storage, top_k=4)
+        history = ConversationMemoryManager(storage=storage, vector_memory=memory).get_chat_history('user', 'agent')
+
+        async def run():
+            for index in range(15):
+                await storage.save_message('user', 'agent', 'user', _message(index))
+            return await history.asearch_similar('flight to Lisbon')
+
+        results = asyncio.run(run())
+
+        # The 10 newest messages are already in the chat history
+        assert [message.content for message in results] == [_message(1)]
+
+    def test_index_grows(self):
+        index = VectorIndex(4)
+        vectors = np.eye(4, dtype=np.float32)[np.arange(VectorIndex.INITIAL_CAPACITY + 1) % 4]
+        start = datetime(2026, 1, 1)
+        index.add(vectors, ['user'] * len(vectors), ['text'] * len(vectors), [start + timedelta(seconds=i) for i in range(len(vectors))])
+
+        assert len(index) == VectorIndex.INITIAL_CAPACITY + 1
+        assert [position % 4 for _, position in index.search(np.eye(4, dtype=np.float32)[2], 3)] == [2, 2, 2]
+
+    def test_index_keeps_newest_messages(self):
+        index = VectorIndex(4, max_size=3)
+        vectors = np.eye(4, dtype=np.float32)
+        start = datetime(2026, 1, 1)
+        for position in range(5):
+            index.add(vectors[[position % 4]], ['user'], [f"m{position}"], [start + timedelta(seconds=position)])
+
+        assert len(index) == 3
+        assert sorted(index.contents) == ['m2', 'm3', 'm4']
+        assert [index.contents[position] for _, position in index.search(vectors[0], 1)] == ['m4']
+
+    def test_stored_history_is_embedded_off_the_event_loop(self, storage):
+        embedder = ThreadRecordingEmbedder()
+        memory = VectorMemory(storage, embedder, top_k=1)
+
+        async def run():
+            for index in range(5):
+                await storage.save_message('user', 'agent', 'user', _message(index))
+            await memory.search('user', 'agent', 'flight to Lisbon')
+            return threading.get_ident()
+
+        loop_thread = asyncio.run(run())
+
+        build_thread, query_thread = embedder.threads
+        assert build_thread != loop_thread
+        assert query_thread == loop_thread
+
+    def test_messages_added_during_build_are_indexed(self, storage):
+        memory = VectorMemory(storage, top_k=4)
+        history = ConversationMemoryManager(storage=storage, vector_memory=memory).get_chat_history('user', 'agent')
+
+        async def run():
+            await storage.save_message('user', 'agent', 'user', _message(0))
+            searches = [asyncio.create_task(memory.search('user', 'agent', 'pizza')) for _ in range(2)]
+            await asyncio.sleep(0)
+            await history.aadd_user_message('Lisbon flight in May again')
+            # Still embedding the stored message in the worker thread
+            assert ('user', 'agent') not in memory.indexes
+            await asyncio.gather(*searches)
+            return await memory.search('user', 'agent', 'flight to Lisbon')
+
+        results = asyncio.run(run())
+
+        assert memory.stats['builds'] == 1
+        assert memory.stats['messages'] == 2
+        assert [result['content'] for result in results] == ['Lisbon flight in May again']
+
+    def test_backfill_is_capped(self, storage):
+        memory = VectorMemory(storage, top_k=1, max_messages=5)
+
+        async def run():
+            for index in range(12):
+                await storage.save_message('user', 'agent', 'user', _message(index))
+            return await memory.search('user', 'agent', 'flight to Lisbon')
+
+        results = asyncio.run(run())
+
+        assert memory.stats['messages'] == 5
+        assert results[0]['content'] == _message(11)
+
+    def test_indexes_are_dropped_over_total_messages(self, storage):
+        memory = VectorMemory(storage, max_messages=5, max_total_messages=8)
+
+        async def run():
+            for agent in ('first', 'second'):
+                for index in range(5):
+                    await storage.save_message('user', agent, 'user', _message(index))
+                await memory.search('user', agent, 'pizza')
+
+        asyncio.run(run())
+
+        assert list(memory.indexes) == [('user', 'second')]
+        assert memory.stats['messages'] == 5
+
+    def test_retrieval_in_a_chat_of_100k_stored_messages(self):
+        """One chat with 100k stored messages, the search covers its newest max_messages.
+
+        Prints the build and search times, timings are not asserted.
+        """
+        storage = MemoryConversationStorage(max_messages=STORED_MESSAGES)
+        memory = VectorMemory(storage, top_k=4)
+
+        async def run():
+            for index in range(STORED_MESSAGES):
+                await storage.save_message('user', 'agent', 'user', _message(index))
+            began = time.perf_counter()
+            await memory.search('user', 'agent', 'gift for my sister birthday')
+            build = time.perf_counter() - began
+
+            durations = []
+            for _ in range(1000):
+                began = time.perf_counter()
+                await memory.search('user', 'agent', 'gift for my sister birthday')
+                durations.append(time.perf_counter() - began)
+            return build, durations
+
+        build, durations = asyncio.run(run())
+        median = statistics.median(durations) * 1000
+        print(f"\nChat of {STORED_MESSAGES} stored messages: index of {memory.stats['messages']} built in {build:.2f} s, "
+              f"search median {median:.3f} ms")
+
+        assert memory.stats['messages'] == memory.max_messages
+        assert memory.stats['builds'] == 1
@@ -0,0 +1,202 @@
+import asyncio
+from collections import OrderedDict
+from datetime import datetime
+from typing import Collection, Dict, List, Optional, Tuple
+import numpy as np
+from SqlDB.conversation_history import ConversationHistoryService
+from SqlDB.conversation_storage import ConversationStorage
+from .embedder import Embedder, HashingEmbedder
+
+
+class VectorIndex:
+    """Embeddings of the newest max_size messages of one user-agent pair in a NumPy matrix.
+
+    The matrix grows up to max_size rows, then it is used as a ring buffer and
+    every added message replaces the oldest one.
+    """
+    INITIAL_CAPACITY = 64
+
+    def __init__(self, dimensions: int, max_size: int = 10_000):
+        self.max_size = max_size
+        self._vectors = np.zeros((min(self.INITIAL_CAPACITY, max_size), dimensions), dtype=np.float32)
+        self.roles: List[Optional[str]] = [None] * len(self._vectors)
+        self.contents: List[Optional[str]] = [None] * len(self._vectors)
+        self.timestamps: List[Optional[datetime]] = [None] * len(self._vectors)
+        self._size = 0
+        self._next = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _grow(self, needed: int) -> None:
+        capacity = min(max(needed, 2 * len(self._vectors)), self.max_size)
+        grown = np.zeros((capacity, self._vectors.shape[1]), dtype=np.float32)
+        grown[:self._size] = self._vectors[:self._size]
+        self._vectors = grown
+        added = capacity - len(self.roles)
+        self.roles.extend([None] * added)
+        self.contents.extend([None] * added)
+        self.timestamps.extend([None] * added)
+
+    def add(self, vectors: np.ndarray, roles: List[str], contents: List[str], timestamps: List[datetime]) -> None:
+        if len(vectors) > self.max_size:
+            vectors, roles, contents, timestamps = (
+                vectors[-self.max_size:], roles[-self.max_size:], contents[-self.max_size:], timestamps[-self.max_size:]
+            )
+        needed = self._size + len(vectors)
+        if needed > len(self._vectors) and len(self._vectors) < self.max_size:
+            # Rows are contiguous until the matrix is full, so _next is still _size here
+            self._grow(needed)
+        capacity = len(self._vectors)
+        positions = (self._next + np.arange(len(vectors))) % capacity
+        self._vectors[positions] = vectors
+        for position, role, content, timestamp in zip(positions.tolist(), roles, contents, timestamps):
+            self.roles[position] = role
+            self.contents[position] = content
+            self.timestamps[position] = timestamp
+        self._next = (self._next + len(vectors)) % capacity
+        self._size = min(needed, capacity)
+
+    def search(self, query: np.ndarray, k: int, exclude_timestamps: Collection[datetime] = ()) -> List[Tuple[float, int]]:
+        """(cosine similarity, position) of the k most similar messages, best first"""
+        size = len(self)
+        if size == 0 or k <= 0:
+            return []
+        scores = self._vectors[:size] @ query
+        # Excluded messages can only take places of the candidates
+        candidates = min(size, k + len(exclude_timestamps))
+        if candidates < size:
+            top = np.argpartition(scores, -candidates)[-candidates:]
+        else:
+            top = np.arange(size)
+        top = top[np.argsort(scores[top])[::-1]]
+        results = []
+        for position in top:
+            if self.timestamps[position] in exclude_timestamps:
+                continue
+            results.append((float(scores[position]), int(position)))
+            if len(results) == k:
+                break
+        return results
+
+
+class VectorMemory:
+    """Similarity search over the conversation history of each user-agent pair.
+
+    The index of a pair is built from its newest max_messages stored messages
+    on first search, then kept up to date by the chat history as messages are
+    added. Embedding the stored messages runs in a worker thread, messages
+    added meanwhile are indexed once the build is done. The least recently
+    searched indexes are dropped when more than max_indexes are held or they
+    hold more than max_total_messages messages.
+
+    Search time grows with the size of the index, max_messages keeps it short.
+    """
+    # Matches below this similarity share little more than common words
+    MIN_SCORE = 0.2
+
+    def __init__(self, storage: ConversationStorage = None, embedder: Embedder = None, top_k: int = 4, max_indexes: int = 1024,
+                 max_messages: int = 10_000, max_total_messages: int = 200_000):
+        self.conversation_service = ConversationHistoryService(storage)
+        self.embedder = embedder or HashingEmbedder()
+        self.top_k = top_k
+        self.max_indexes = max_indexes
+        self.max_messages = max_messages
+        self.max_total_messages = max_total_messages
+        self.indexes: 'OrderedDict[Tuple[str, str], VectorIndex]' = OrderedDict()
+        self._builds: Dict[Tuple[str, str], asyncio.Task] = {}
+        self._buffered: Dict[Tuple[str, str], List[Tuple[str, str, datetime]]] = {}
+        self._total_messages = 0
+        self.builds = 0
+        self.searches = 0
+
+    async def _get_index(self, user_id: str, agent_id: str) -> VectorIndex:
+        key = (user_id, agent_id)
+        index = self.indexes.get(key)
+        if index is not None:
+            self.indexes.move_to_end(key)
+            return index
+
+        build = self._builds.get(key)
+        if build is None:
+            build = self._builds[key] = asyncio.get_running_loop().create_task(self._build(key))
+        # Searches of the same pair share the build, a cancelled search does not stop it
+        return await asyncio.shield(build)
+
+    async def _build(self, key: Tuple[str, str]) -> VectorIndex:
+        # Messages stored from now on reach the index through add()
+        self._buffered[key] = []
+        started = datetime.utcnow()
+        try:
+            history = await self.conversation_service.get_conversation_history(
+                *key,
+                limit=self.max_messages,
+                exclude_tool_calls=True
+            )
+            history = [row for row in reversed(history) if row['timestamp'] < started]
+
+            index = VectorIndex(self.embedder.dimensions, self.max_messages)
+            if history:
+                contents = [row['content'] for row in history]
+                # Embedding thousands of messages would stall every chat, it runs off the event loop
+                vectors = await asyncio.to_thread(self.embedder.embed, contents)
+                index.add(vectors, [row['role'] for row in history], contents, [row['timestamp'] for row in history])
+
+            buffered = self._buffered[key]
+            if buffered:
+                roles, contents, timestamps = (list(values) for values in zip(*buffered))
+                index.add(self.embedder.embed(contents), roles, contents, timestamps)
+
+            self.indexes[key] = index
+            self._total_messages += len(index)
+            self.builds += 1
+            self._evict()
+            return index
+        finally:
+            self._buffered.pop(key, None)
+            self._builds.pop(key, None)
+
+    def _evict(self) -> None:
+        while self.indexes and (len(self.indexes) > self.max_indexes or self._total_messages > self.max_total_messages):
+            _, index = self.indexes.popitem(last=False)
+            self._total_messages -= len(index)
+
+    def add(self, user_id: str, agent_id: str, role: str, content: str, timestamp: datetime) -> None:
+        """Add a stored message to the index of its pair, pairs without an index pick it up when built"""
+        key = (user_id, agent_id)
+        index = self.indexes.get(key)
+        if index is not None:
+            size = len(index)
+            index.add(self.embedder.embed([content]), [role], [content], [timestamp])
+            self._total_messages += len(index) - size
+            if self._total_messages > self.max_total_messages:
+                self._evict()
+        elif key in self._buffered:
+            self._buffered[key].append((role, content, timestamp))
+
+    async def search(self, user_id: str, agent_id: str, text: str, k: Optional[int] = None, exclude_timestamps: Collection[datetime] = ()) -> List[dict]:
+        """Messages most similar to text, oldest first"""
+        index = await self._get_index(user_id, agent_id)
+        self.searches += 1
+        query = self.embedder.embed([text])[0]
+        results = index.search(query, self.top_k if k is None else k, exclude_timestamps)
+        results = [result for result in results if result[0] >= self.MIN_SCORE]
+        results.sort(key=lambda result: index.timestamps[result[1]])
+        return [
+            {
+                'role': index.roles[position],
+                'content': index.contents[position],
+                'timestamp': index.timestamps[position],
+                'score': score
+            }
+            for score, position in results
+        ]
+
+    @property
+    def stats(self) -> dict:
+        return {
+            'indexes': len(self.indexes),
+            'messages': self._total_messages,
+            'builds': self.builds,
+            'searches': self.searches
+        }
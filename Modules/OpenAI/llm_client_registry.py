@@ -0,0 +1,109 @@
+import threading
+from typing import Optional
+import httpx
+from langchain_openai import ChatOpenAI
+from config import Config
+
+
+class LLMClientRegistry:
+    """Process-wide pool of ChatOpenAI clients keyed by (model, temperature, max_tokens).
+
+    All clients share one sync and one async connection pool, so the number of
+    sockets and TLS handshakes no longer grows with the number of users.
+    """
+    MAX_CONNECTIONS = 100
+    MAX_KEEPALIVE_CONNECTIONS = 20
+    KEEPALIVE_EXPIRY = 30.0
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls) -> 'LLMClientRegistry':
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+        return cls._instance
+
+    def __init__(self):
+        self.config = Config.from_env()
+        self._clients: dict[tuple, ChatOpenAI] = {}
+        self._lock = threading.Lock()
+        self._http_client = None
+        self._http_async_client = None
+        self.hits = 0
+        self.misses = 0
+
+    def _limits(self) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=self.MAX_CONNECTIONS,
+            max_keepalive_connections=self.MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=self.KEEPALIVE_EXPIRY
+        )
+
+    def _get_http_clients(self) -> tuple[httpx.Client, httpx.AsyncClient]:
+        if self._http_client is None:
+            self._http_client = httpx.Client(limits=self._limits())
+            self._http_async_client = httpx.AsyncClient(limits=self._limits())
+        return self._http_client, self._http_async_client
+
+    def get_chat_model(self, temperature: Optional[float] = None, max_tokens: Optional[int] = None, model: Optional[str] = None) -> ChatOpenAI:
+        model = model or self.config.gpt_model
+        key = (model, temperature, max_tokens)
+
+        client = self._clients.get(key)
+        if client is not None:
+            self.hits += 1
+            return client
+
+        with self._lock:
+            client = self._clients.get(key)
+            if client is not None:
+                self.hits += 1
+                return client
+
+            http_client, http_async_client = self._get_http_clients()
+            kwargs = {
+                'api_key': self.config.openai_api_key,
+                'model': model,
+                'temperature': temperature,
+                'http_client': http_client,
+                'http_async_client': http_async_client
+            }
+            if max_tokens is not None:
+                kwargs['max_tokens'] = max_tokens
+
+            client = ChatOpenAI(**kwargs)
+            self._clients[key] = client
+            self.misses += 1
+            return client
+
+    @property
+    def stats(self) -> dict:
+        return {
+            'clients': len(self._clients),
+            'keys': sorted(self._clients.keys(), key=str),
+            'hits': self.hits,
+            'misses': self.misses,
+            'http_connections': self._connection_count(self._http_client),
+            'http_async_connections': self._connection_count(self._http_async_client)
+        }
+
+    @staticmethod
+    def _connection_count(http_client) -> int:
+        pool = getattr(getattr(http_client, '_transport', None), '_pool', None)
+        return len(getattr(pool, 'connections', []) or [])
+
+    async def aclose(self) -> None:
+        if self._http_async_client is not None:
+            await self._http_async_client.aclose()
+        if self._http_client is not None:
+            self._http_client.close()
+        self._http_client = None
+        self._http_async_client = None
+        self._clients.clear()
+
+
+def get_chat_model(temperature: Optional[float] = None, max_tokens: Optional[int] = None, model: Optional[str] = None) -> ChatOpenAI:
+    return LLMClientRegistry.get_instance().get_chat_model(temperature=temperature, max_tokens=max_tokens, model=model)
@@ -4,6 +4,7 @@ from config import Config
 class OpenAIClient:
     _instance = None
     _client = None
+    _async_client = None
 
     @classmethod
     def get_instance(cls):
@@ -15,7 +16,12 @@ class OpenAIClient:
         if OpenAIClient._client is None:
             config = Config.from_env()
             OpenAIClient._client = openai.OpenAI(api_key=config.openai_api_key)
+            OpenAIClient._async_client = openai.AsyncOpenAI(api_key=config.openai_api_key)
 
     @property
     def client(self):
         return self._client
+
+    @property
+    def async_client(self):
+        return self._async_client
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+
+import asyncio
+import pytest
+from Modules.OpenAI.llm_client_registry import LLMClientRegistry
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    monkeypatch.setenv("GPT_MODEL", "gpt-test")
+    return LLMClientRegistry()
+
+
+class TestLLMClientRegistry:
+    def test_same_settings_share_client(self, registry):
+        first = registry.get_chat_model(temperature=0.7)
+        second = registry.get_chat_model(temperature=0.7)
+        assert first is second
+        assert registry.stats['clients'] == 1
+        assert registry.stats['hits'] == 1
+        assert registry.stats['misses'] == 1
+
+    def test_different_settings_share_connection_pool(self, registry):
+        default = registry.get_chat_model(temperature=0.7)
+        configuration = registry.get_chat_model(temperature=0.1, max_tokens=500)
+        assert default is not configuration
+        assert default.http_client is configuration.http_client
+        assert default.http_async_client is configuration.http_async_client
+        assert registry.stats['clients'] == 2
+
+    def test_client_count_does_not_grow_with_users(self, registry):
+        for _ in range(1000):
+            registry.get_chat_model(temperature=0.7)
+            registry.get_chat_model(temperature=0.2)
+        assert registry.stats['clients'] == 2
+        assert registry.stats['misses'] == 2
+
+    def test_aclose_closes_shared_pools(self, registry):
+        model = registry.get_chat_model(temperature=0.7)
+        http_client, http_async_client = model.http_client, model.http_async_client
+
+        asyncio.run(registry.aclose())
+
+        assert http_client.is_closed
+        assert http_async_client.is_closed
+        assert registry.stats['clients'] == 0
@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+
+import pytest
+from Modules.OpenAI.token_counter import TokenCounter
+
+
+@pytest.fixture
+def estimating_counter(monkeypatch):
+    counter = TokenCounter('gpt-test')
+    monkeypatch.setattr(counter, '_load_encoding', lambda: None)
+    return counter
+
+
+class TestTokenCounter:
+    def test_empty_text_has_no_tokens(self, estimating_counter):
+        assert estimating_counter.count('') == 0
+
+    def test_estimate_without_encoding(self, estimating_counter):
+        assert estimating_counter.count('a' * 9) == 3
+
+    def test_truncate_without_encoding(self, estimating_counter):
+        text = 'abcdefghij'
+        assert estimating_counter.truncate(text, 2) == 'abcdefgh'
+        assert estimating_counter.truncate(text, 1, keep_end=True) == 'ghij'
+        assert estimating_counter.truncate(text, 0) == ''
+
+    def test_truncated_text_fits(self):
+        counter = TokenCounter('gpt-test')
+        text = 'The quick brown fox jumps over the lazy dog. ' * 50
+
+        truncated = counter.truncate(text, 20)
+
+        assert counter.count(truncated) <= 20
+        assert text.startswith(truncated)
@@ -0,0 +1,73 @@
+import threading
+from typing import Optional
+import tiktoken
+from config import Config
+
+
+class TokenCounter:
+    """Counts tokens locally with the tiktoken encoding of the chat model.
+
+    The encoding is loaded on first use. When it can not be loaded (tiktoken
+    downloads encodings once and caches them) an estimate of one token per
+    four characters is used instead, so budgets still hold approximately.
+    """
+    FALLBACK_ENCODING = 'o200k_base'
+    CHARS_PER_TOKEN = 4
+
+    def __init__(self, model: Optional[str] = None):
+        self.model = model
+        self._encoding = None
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    def _get_encoding(self):
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    self._encoding = self._load_encoding()
+                    self._loaded = True
+        return self._encoding
+
+    def _load_encoding(self):
+        try:
+            if self.model:
+                try:
+                    return tiktoken.encoding_for_model(self.model)
+                except KeyError:
+                    pass
+            return tiktoken.get_encoding(self.FALLBACK_ENCODING)
+        except Exception as e:
+            print(f"Tokenizer for {self.model or self.FALLBACK_ENCODING} not available, estimating token counts: {e}")
+            return None
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        encoding = self._get_encoding()
+        if encoding is None:
+            return -(-len(text) // self.CHARS_PER_TOKEN)
+        return len(encoding.encode(text, disallowed_special=()))
+
+    def truncate(self, text: str, max_tokens: int, keep_end: bool = False) -> str:
+        """First (or last) max_tokens tokens of text"""
+        if max_tokens <= 0:
+            return ''
+        encoding = self._get_encoding()
+        if encoding is None:
+            max_chars = max_tokens * self.CHARS_PER_TOKEN
+            return text[-max_chars:] if keep_end else text[:max_chars]
+        tokens = encoding.encode(text, disallowed_special=())
+        if len(tokens) <= max_tokens:
+            return text
+        return encoding.decode(tokens[-max_tokens:] if keep_end else tokens[:max_tokens])
+
+
+_token_counter: Optional[TokenCounter] = None
+
+
+def get_token_counter() -> TokenCounter:
+    """Process-wide counter for the model set in GPT_MODEL"""
+    global _token_counter
+    if _token_counter is None:
+        _token_counter = TokenCounter(Config.from_env().gpt_model)
+    return _token_counter
@@ -4,8 +4,11 @@ import os
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
 from telegram import Bot
-from SqlDB.database import get_db
+from sqlalchemy import select
+from SqlDB.database import get_async_db
 from SqlDB.models import Scheduler, User
+from SqlDB.user_cache import UserCache
+from SqlDB.partition_maintenance import PartitionMaintenance
 from uuid import UUID
 from AgentsCore.Rooter.agent_rooter import get_agent_rooter
 from Modules.MessageProcessor.message_processor import MessageProcessor
@@ -14,6 +17,8 @@ from config import Config
 from Modules.MessageProcessor.message_processor import Message
 
 class SchedulerService:
+    PARTITION_MAINTENANCE_HOUR = 3
+    
     def __init__(self, config: Config):
         self.config = config
         self.bot = Bot(token=config.telegram_bot_token)
@@ -24,7 +29,10 @@ class SchedulerService:
     async def start(self):
         self.logger.info("Starting Scheduler Service")
         try:
+            await get_agent_rooter().load_agents()
             self.scheduler.start()
+            await self._run_partition_maintenance()
+            self._schedule_partition_maintenance()
             await self._load_scheduler_configuration()
             self.running = True
             self.logger.info("Scheduler Service started successfully")
@@ -39,11 +47,27 @@ class SchedulerService:
             self.running = False
             self.logger.info("Scheduler Service stopped")
     
+    def _schedule_partition_maintenance(self):
+        self.scheduler.add_job(
+            func=self._run_partition_maintenance,
+            trigger=CronTrigger(hour=self.PARTITION_MAINTENANCE_HOUR, minute=0),
+            id='partition_maintenance',
+            name='Conversation history partition maintenance',
+            replace_existing=True
+        )
+    
+    async def _run_partition_maintenance(self):
+        try:
+            result = await PartitionMaintenance().run()
+            self.logger.info(f"Partition maintenance created {result['created']} and archived {result['archived']}")
+        except Exception as e:
+            self.logger.error(f"Error running partition maintenance: {e}")
+    
     async def _load_scheduler_configuration(self):
         self.logger.info("Loading scheduler configuration from database")
-        db = next(get_db())
         try:
-            scheduler_configs = db.query(Scheduler).all()
+            async with get_async_db() as db:
+                scheduler_configs = (await db.execute(select(Scheduler))).scalars().all()
             
             for config in scheduler_configs:
                 await self._schedule_message(config)
@@ -52,8 +76,6 @@ class SchedulerService:
         except Exception as e:
             self.logger.error(f"Error loading scheduler configuration: {e}")
             raise e
-        finally:
-            db.close()
     
     async def _schedule_message(self, scheduler_config: Scheduler):
         try:
@@ -79,41 +101,48 @@ class SchedulerService:
     
     async def _send_scheduled_message(self, user_id: str, prompt: str, message_type: str = 'text'):
         try:
-            db = next(get_db())
-            try:
-                user_uuid = UUID(user_id)
-                user = db.query(User).filter(User.id == user_uuid).first()
-                
-                if not user:
-                    self.logger.warning(f"User with id {user_id} not found")
-                    return
-                
-                user_language = 'en'
-                if user.configuration and user.configuration.get('language'):
-                    user_language = user.configuration['language']
-                
-                text = MessageProcessor.clean_message(prompt)
-                agent_rooter = get_agent_rooter()
-                
-                message_obj = Message(text=text, language=user_language, ui_language='en', user_id=user_id)
-                
-                async def send_message(text: str):
-                    await self.bot.send_message(chat_id=user.chat_id, text=text)
-                
-                agent_rooter.switch(message_obj)
-                response = await agent_rooter.ask_current_agent(message_obj, send_message)
-                
-                if message_type == 'voice':
-                    await self._send_voice_message(user.chat_id, response, user.telegram_id)
+            user_uuid = UUID(user_id)
+            # The session is released before the agent runs, LLM calls must not hold a connection
+            async with get_async_db() as db:
+                user = (await db.execute(select(User).where(User.id == user_uuid))).scalar_one_or_none()
+            
+            if not user:
+                self.logger.warning(f"User with id {user_id} not found")
+                return
+            
+            # Routing reads the user configuration from the cache, the fresh row replaces an expired entry
+            UserCache().add_user(user.telegram_id, user)
+            
+            user_language = 'en'
+            if user.configuration and user.configuration.get('language'):
+                user_language = user.configuration['language']
+            
+            text = MessageProcessor.clean_message(prompt)
+            agent_rooter = get_agent_rooter()
+            
+            message_obj = Message(text=text, language=user_language, ui_language='en', user_id=user_id)
+            
+            async def send_message(text: str):
+                await self.bot.send_message(chat_id=user.chat_id, text=text)
+            
+            async with agent_rooter.user_lock(user.telegram_id):
+                decision = agent_rooter.route(message_obj)
+                if decision.forward:
+                    response = await agent_rooter.dispatch(decision, send_message)
                 else:
-                    await self.bot.send_message(
-                        chat_id=user.chat_id,
-                        text=response
-                    )
-                    self.logger.info(f"Sent scheduled text message to user {user.telegram_id}")
-                    
-            finally:
-                db.close()
+                    response = decision.reply
+            
+            if not response:
+                return
+            
+            if message_type == 'voice':
+                await self._send_voice_message(user.chat_id, response, user.telegram_id)
+            else:
+                await self.bot.send_message(
+                    chat_id=user.chat_id,
+                    text=response
+                )
+                self.logger.info(f"Sent scheduled text message to user {user.telegram_id}")
                 
         except Exception as e:
             self.logger.error(f"Error sending scheduled message to user {user_id}: {e}")
@@ -1,3 +1,4 @@
+import asyncio
 import os
 import requests
 from Modules.OpenAI.openai_client import OpenAIClient
@@ -12,14 +13,14 @@ class SpeechHelper:
 
     async def transcribe_voice(self, voice_file_path: str) -> str:
         with open(voice_file_path, "rb") as file:
-            transcription = OpenAIClient.get_instance().client.audio.transcriptions.create(
+            transcription = await OpenAIClient.get_instance().async_client.audio.transcriptions.create(
                 model="whisper-1",
                 file=file
             )
         return transcription.text
 
     async def text_to_speech(self, text: str, output_path: str) -> None:
-        speech_response = OpenAIClient.get_instance().client.audio.speech.create(
+        speech_response = await OpenAIClient.get_instance().async_client.audio.speech.create(
             model="tts-1",
             voice="alloy",
             input=text
@@ -31,6 +32,7 @@ class SpeechHelper:
     async def download_voice_file(self, file_path: str, output_path: str) -> None:
         os.makedirs(os.path.dirname(output_path), exist_ok=True)
         
+        # requests blocks, run it off the event loop
+        response = await asyncio.to_thread(requests.get, file_path)
         with open(output_path, 'wb') as f:
-            response = requests.get(file_path)
             f.write(response.content) 
\ No newline at end of file
@@ -0,0 +1,114 @@
+import gettext
+import threading
+from pathlib import Path
+from types import MappingProxyType
+from typing import Mapping, Optional
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+ROOTER_COMPONENT = 'Rooter'
+
+
+class TranslationCatalog:
+    """Read-only gettext catalog shared by every user of a (component, language)"""
+    __slots__ = ('component', 'language', '_translations')
+
+    def __init__(self, component: str, language: str, translations: Optional[gettext.NullTranslations] = None):
+        self.component = component
+        self.language = language
+        self._translations = translations or gettext.NullTranslations()
+
+    def gettext(self, message: str) -> str:
+        return self._translations.gettext(message)
+
+    def ngettext(self, singular: str, plural: str, n: int) -> str:
+        return self._translations.ngettext(singular, plural, n)
+
+
+class TranslationCatalogRegistry:
+    """Loads every locale/<lang>/LC_MESSAGES/messages.mo of the rooter and agents once.
+
+    Catalogs are indexed by (component, language), where component is
+    'Rooter' or an agent folder name such as 'WeatherAgent'. A catalog falls
+    back to the English catalog of its component, if there is one, and then
+    to the source text.
+    """
+    FALLBACK_LANGUAGE = 'en'
+    _instance = None
+    _lock = threading.Lock()
+
+    def __new__(cls):
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    instance = super().__new__(cls)
+                    instance._catalogs = None
+                    instance._empty = {}
+                    cls._instance = instance
+        return cls._instance
+
+    @staticmethod
+    def _locale_dirs(root: Path) -> dict[str, Path]:
+        dirs = {ROOTER_COMPONENT: root / 'AgentsCore' / 'Rooter' / 'locale'}
+        agents_dir = root / 'Agents'
+        if agents_dir.is_dir():
+            for agent_dir in sorted(agents_dir.iterdir()):
+                if agent_dir.is_dir() and agent_dir.name.endswith('Agent'):
+                    dirs[agent_dir.name] = agent_dir / 'locale'
+        return dirs
+
+    @staticmethod
+    def _load_translations(locale_dir: Path, language: str) -> Optional[gettext.NullTranslations]:
+        """Translations of locale_dir/<language>/LC_MESSAGES/messages.mo, None when there is no catalog"""
+        try:
+            translations = gettext.translation('messages', localedir=str(locale_dir), languages=[language], fallback=True)
+        except Exception as e:
+            print(f"Exception loading translations {locale_dir / language}: {e}")
+            return None
+        # gettext gives a plain NullTranslations when no .mo file was found
+        return translations if isinstance(translations, gettext.GNUTranslations) else None
+
+    def load(self, root: Path = ROOT_DIR) -> int:
+        catalogs = {}
+        for component, locale_dir in self._locale_dirs(root).items():
+            if not locale_dir.is_dir():
+                continue
+            loaded = {}
+            for lang_dir in sorted(locale_dir.iterdir()):
+                translations = self._load_translations(locale_dir, lang_dir.name)
+                if translations is not None:
+                    loaded[lang_dir.name] = translations
+
+            fallback = loaded.get(self.FALLBACK_LANGUAGE)
+            for language, translations in loaded.items():
+                if fallback is not None and language != self.FALLBACK_LANGUAGE:
+                    translations.add_fallback(fallback)
+                catalogs[(component, language)] = TranslationCatalog(component, language, translations)
+
+        self._catalogs = MappingProxyType(catalogs)
+        self._empty = {}
+        print(f"Loaded {len(catalogs)} translation catalogs")
+        return len(catalogs)
+
+    def get(self, component: str, language: str) -> TranslationCatalog:
+        if self._catalogs is None:
+            self.load()
+        catalog = self._catalogs.get((component, language))
+        if catalog is None:
+            key = (component, language)
+            catalog = self._empty.get(key)
+            if catalog is None:
+                # Untranslated language of a translated component still gets the English fallback
+                fallback = self._catalogs.get((component, self.FALLBACK_LANGUAGE))
+                catalog = fallback or TranslationCatalog(component, language)
+                self._empty[key] = catalog
+        return catalog
+
+    @property
+    def catalogs(self) -> Mapping[tuple[str, str], TranslationCatalog]:
+        if self._catalogs is None:
+            self.load()
+        return self._catalogs
+
+
+def get_catalog(component: str, language: str) -> TranslationCatalog:
+    return TranslationCatalogRegistry().get(component, language)
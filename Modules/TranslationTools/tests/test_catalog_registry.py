@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+
+import struct
+import pytest
+from Modules.TranslationTools.catalog_registry import TranslationCatalogRegistry, ROOTER_COMPONENT
+
+
+def _write_mo(path, messages: dict):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    messages = {'': 'Content-Type: text/plain; charset=UTF-8\n', **messages}
+    keys = sorted(messages)
+    ids = b''.join(k.encode() + b'\0' for k in keys)
+    strs = b''.join(messages[k].encode() + b'\0' for k in keys)
+    header_size = 7 * 4
+    ids_start = header_size + 16 * len(keys)
+    strs_start = ids_start + len(ids)
+    offsets = []
+    id_offset, str_offset = ids_start, strs_start
+    for k in keys:
+        offsets.append((len(k.encode()), id_offset, len(messages[k].encode()), str_offset))
+        id_offset += len(k.encode()) + 1
+        str_offset += len(messages[k].encode()) + 1
+    data = struct.pack('Iiiiiii', 0x950412de, 0, len(keys), header_size, header_size + 8 * len(keys), 0, 0)
+    data += b''.join(struct.pack('ii', length, offset) for length, offset, _, _ in offsets)
+    data += b''.join(struct.pack('ii', length, offset) for _, _, length, offset in offsets)
+    path.write_bytes(data + ids + strs)
+
+
+PL_HEADER = (
+    'Content-Type: text/plain; charset=UTF-8\n'
+    'Plural-Forms: nplurals=3; plural=(n==1 ? 0 : n%10>=2 && n%10<=4 && (n%100<10 || n%100>=20) ? 1 : 2);\n'
+)
+
+
+@pytest.fixture
+def registry(tmp_path):
+    _write_mo(tmp_path / 'AgentsCore/Rooter/locale/pl/LC_MESSAGES/messages.mo', {'which,what': 'jaki,który'})
+    _write_mo(tmp_path / 'Agents/WeatherAgent/locale/pl/LC_MESSAGES/messages.mo', {'Weather': 'Pogoda'})
+    _write_mo(tmp_path / 'Agents/WeatherAgent/locale/en/LC_MESSAGES/messages.mo', {'Weather': 'Weather forecast', 'Wind': 'Wind speed'})
+    _write_mo(tmp_path / 'Agents/TimeAgent/locale/pl/LC_MESSAGES/messages.mo', {
+        '': PL_HEADER,
+        'minute\0minutes': 'minuta\0minuty\0minut'
+    })
+    (tmp_path / 'Agents/DefaultAgent/locale/pl/LC_MESSAGES').mkdir(parents=True)
+    TranslationCatalogRegistry._instance = None
+    registry = TranslationCatalogRegistry()
+    registry.load(root=tmp_path)
+    yield registry
+    TranslationCatalogRegistry._instance = None
+
+
+class TestTranslationCatalogRegistry:
+    def test_loads_catalogs_by_component_and_language(self, registry):
+        assert set(registry.catalogs) == {
+            (ROOTER_COMPONENT, 'pl'), ('WeatherAgent', 'pl'), ('WeatherAgent', 'en'), ('TimeAgent', 'pl')
+        }
+        assert registry.get(ROOTER_COMPONENT, 'pl').gettext('which,what') == 'jaki,który'
+        assert registry.get('WeatherAgent', 'pl').gettext('Weather') == 'Pogoda'
+
+    def test_missing_catalog_falls_back_to_source_text(self, registry):
+        assert registry.get('DefaultAgent', 'pl').gettext('Hello') == 'Hello'
+        assert registry.get('TimeAgent', 'de').gettext('minute') == 'minute'
+
+    def test_catalog_falls_back_to_english_catalog(self, registry):
+        assert registry.get('WeatherAgent', 'pl').gettext('Wind') == 'Wind speed'
+        assert registry.get('WeatherAgent', 'de').gettext('Weather') == 'Weather forecast'
+
+    def test_ngettext_uses_catalog_plural_forms(self, registry):
+        catalog = registry.get('TimeAgent', 'pl')
+        assert [catalog.ngettext('minute', 'minutes', n) for n in (1, 3, 5)] == ['minuta', 'minuty', 'minut']
+        assert registry.get('DefaultAgent', 'pl').ngettext('minute', 'minutes', 2) == 'minutes'
+
+    def test_catalogs_are_shared_and_read_only(self, registry):
+        assert registry.get('WeatherAgent', 'pl') is TranslationCatalogRegistry().get('WeatherAgent', 'pl')
+        assert registry.get('DefaultAgent', 'de') is registry.get('DefaultAgent', 'de')
+        with pytest.raises(TypeError):
+            registry.catalogs[('WeatherAgent', 'de')] = None
@@ -1,18 +1,13 @@
-from langchain_openai import ChatOpenAI
 from langchain_core.messages import HumanMessage, SystemMessage
 from config import Config
+from Modules.OpenAI.llm_client_registry import get_chat_model
 
 class Translator:
     def __init__(self):
         self.config = Config.from_env()
-        self.llm = ChatOpenAI(
-            api_key=self.config.openai_api_key,
-            model=self.config.gpt_model,
-            temperature=0.1,  # Low temperature for accurate translation
-            max_tokens=2000
-        )
+        self.llm = get_chat_model(temperature=0.1, max_tokens=2000)  # Low temperature for accurate translation
     
-    def translate_to_polish(self, english_text: str) -> str:
+    async def translate_to_polish(self, english_text: str) -> str:
         """
         Translate English text to Polish while preserving the exact meaning.
         This is used for translating tool responses (weather, time, etc.) to Polish.
@@ -34,7 +29,7 @@ Translate the following English text to Polish:"""
         ]
         
         try:
-            response = self.llm.invoke(messages)
+            response = await self.llm.ainvoke(messages)
             return response.content.strip()
         except Exception as e:
             # Fallback: return original text if translation fails
@@ -1,6 +1,8 @@
 from typing import Optional, Tuple
+from uuid import UUID
 from SqlDB.user_cache import UserCache
-from SqlDB.database import Session, engine
+from sqlalchemy import update
+from SqlDB.database import get_async_db
 from SqlDB.models import User
 
 class UserManager:
@@ -46,20 +48,18 @@ class UserManager:
         
         return language_ok and city_ok
     
-    def update_user_configuration(self, user_id: str, configuration: dict) -> None:
-        user = self.cache.get_user_by_id(user_id)
-        if user:
-            user.configuration = configuration
-            # Update in database
-            db = Session(engine)
-            try:
-                db_user = db.query(User).filter(User.id == user.id).first()
-                if db_user:
-                    db_user.configuration = configuration
-                    db.commit()
-                    print(f"Updated configuration for user {user_id}")
-            finally:
-                db.close()
+    async def update_user_configuration(self, user_id: str, configuration: dict) -> None:
+        async with get_async_db() as db:
+            updated_user = (await db.execute(
+                update(User).where(User.id == UUID(user_id)).values(configuration=configuration).returning(User)
+            )).scalar_one_or_none()
+            await db.commit()
+        
+        # The cached entry is stale now, replace it with the committed row
+        self.cache.invalidate_user_id(user_id)
+        if updated_user:
+            self.cache.add_user(updated_user.telegram_id, updated_user)
+            print(f"Updated configuration for user {user_id}")
     
     def get_user_city_info(self, user_id: str) -> Tuple[str, float, float]:
         user = self.cache.get_user_by_id(user_id)
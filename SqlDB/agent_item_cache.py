@@ -0,0 +1,61 @@
+import copy
+from typing import Dict, Iterable
+from sqlalchemy import select
+from .database import AsyncSessionLocal
+from .models import AgentItem, User
+
+class AgentItemCache:
+    _instance = None
+    _answers: Dict[str, Dict[str, dict]] = {}  # user_id -> agent_id -> questionnaire_answers
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+
+    async def get_answers(self, user_id: str, agent_id: str) -> dict:
+        """Get questionnaire answers for user and agent, loading all user's agent items on first access"""
+        user_items = self._answers.get(user_id)
+        if user_items is None:
+            user_items = await self.load_user(user_id)
+        # Agents mutate their answers while collecting them, never hand out the cached dict
+        return copy.deepcopy(user_items.get(agent_id, {}))
+
+    async def load_user(self, user_id: str) -> Dict[str, dict]:
+        """Load all agent items of a user in a single query"""
+        async with AsyncSessionLocal() as session:
+            agent_items = (await session.execute(
+                select(AgentItem.agent_id, AgentItem.questionnaire_answers).where(AgentItem.user_id == user_id)
+            )).all()
+        user_items = {str(agent_id): answers or {} for agent_id, answers in agent_items}
+        self._answers[user_id] = user_items
+        return user_items
+
+    async def warm_up(self, telegram_ids: Iterable[int]) -> int:
+        """Load agent items of all given users in a single query"""
+        telegram_ids = list(telegram_ids)
+        if not telegram_ids:
+            return 0
+
+        async with AsyncSessionLocal() as session:
+            rows = (await session.execute(
+                select(User.id, AgentItem.agent_id, AgentItem.questionnaire_answers).outerjoin(
+                    AgentItem, AgentItem.user_id == User.id
+                ).where(User.telegram_id.in_(telegram_ids))
+            )).all()
+
+        loaded: Dict[str, Dict[str, dict]] = {}
+        for user_id, agent_id, answers in rows:
+            user_items = loaded.setdefault(str(user_id), {})
+            if agent_id is not None:
+                user_items[str(agent_id)] = answers or {}
+
+        self._answers.update(loaded)
+        return len(loaded)
+
+    def invalidate(self, user_id: str) -> None:
+        """Drop cached answers of a user, next access reloads them"""
+        self._answers.pop(user_id, None)
+
+    def has_user(self, user_id: str) -> bool:
+        return user_id in self._answers
@@ -1,79 +1,31 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import desc
-from .database import engine
-from .models import ConversationHistory
+from datetime import datetime
 from typing import List, Optional
-import uuid
+from Modules.OpenAI.token_counter import get_token_counter
+from .conversation_storage import ConversationStorage, get_conversation_storage
 
 class ConversationHistoryService:
-    def __init__(self):
-        self.engine = engine
-    
-    def _get_session(self) -> Session:
-        return Session(self.engine)
-    
-    def save_message(self, user_id: str, agent_id: str, role: str, content: str, session_id: str = None) -> str:
-        session = self._get_session()
-        try:
-            if session_id is None:
-                session_id = f"{user_id}:{agent_id}"
-            
-            conversation_message = ConversationHistory(
-                user_id=uuid.UUID(user_id),
-                agent_id=uuid.UUID(agent_id),
-                role=role,
-                content=content,
-                session_id=session_id
-            )
-            
-            session.add(conversation_message)
-            session.commit()
-            
-            return str(conversation_message.id)
-        finally:
-            session.close()
-    
-    def get_conversation_history(self, user_id: str, agent_id: str, limit: Optional[int] = 10, exclude_tool_calls: bool = True, session_id: str = None) -> List[dict]:
-        session = self._get_session()
-        try:
-            query = session.query(ConversationHistory).filter(
-                ConversationHistory.user_id == uuid.UUID(user_id),
-                ConversationHistory.agent_id == uuid.UUID(agent_id)
-            )
-            
-            if session_id is not None:
-                query = query.filter(ConversationHistory.session_id == session_id)
-            
-            if exclude_tool_calls:
-                query = query.filter(ConversationHistory.role != 'tool')
-            
-            query = query.order_by(desc(ConversationHistory.timestamp))
-            
-            if limit is not None:
-                messages = query.limit(limit).all()
-            else:
-                messages = query.all()
-            
-            return [
-                {
-                    'role': msg.role,
-                    'content': msg.content,
-                    'timestamp': msg.timestamp,
-                    'session_id': msg.session_id
-                }
-                for msg in messages
-            ]
-        finally:
-            session.close()
-    
-    def get_last_session_id(self, user_id: str, agent_id: str) -> str | None:
-        session = self._get_session()
-        try:
-            last_message = session.query(ConversationHistory).filter(
-                ConversationHistory.user_id == uuid.UUID(user_id),
-                ConversationHistory.agent_id == uuid.UUID(agent_id)
-            ).order_by(desc(ConversationHistory.timestamp)).first()
-            
-            return last_message.session_id if last_message else None
-        finally:
-            session.close()
\ No newline at end of file
+    """Conversation history of agents, stored by the backend set in CONVERSATION_STORAGE"""
+
+    def __init__(self, storage: ConversationStorage = None):
+        self.storage = storage or get_conversation_storage()
+
+    async def save_message(self, user_id: str, agent_id: str, role: str, content: str, session_id: str = None, token_count: Optional[int] = None) -> str:
+        """Store a message with its token count, counted here unless the caller already has it"""
+        if token_count is None:
+            token_count = get_token_counter().count(content)
+        return await self.storage.save_message(user_id, agent_id, role, content, session_id, token_count)
+
+    async def get_conversation_history(self, user_id: str, agent_id: str, limit: Optional[int] = 10, exclude_tool_calls: bool = True, session_id: str = None) -> List[dict]:
+        return await self.storage.get_conversation_history(user_id, agent_id, limit, exclude_tool_calls, session_id)
+
+    async def get_last_session_id(self, user_id: str, agent_id: str) -> str | None:
+        return await self.storage.get_last_session_id(user_id, agent_id)
+
+    async def get_summary(self, user_id: str, agent_id: str) -> Optional[dict]:
+        return await self.storage.get_summary(user_id, agent_id)
+
+    async def save_summary(self, user_id: str, agent_id: str, summary: str, summarized_until: datetime) -> int:
+        """Store the running summary, returns its token count"""
+        token_count = get_token_counter().count(summary)
+        await self.storage.save_summary(user_id, agent_id, summary, token_count, summarized_until)
+        return token_count
@@ -0,0 +1,60 @@
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import List, Optional
+from config import Config
+
+POSTGRES_STORAGE = 'postgres'
+MEMORY_STORAGE = 'memory'
+
+
+class ConversationStorage(ABC):
+    """Where conversation history lives, selected with CONVERSATION_STORAGE.
+
+    History is returned newest first as dicts with role, content, timestamp,
+    session_id and token_count. token_count is None for messages stored
+    without one.
+    """
+
+    @abstractmethod
+    async def save_message(self, user_id: str, agent_id: str, role: str, content: str, session_id: str = None, token_count: Optional[int] = None) -> str:
+        """Store a message and return its id, session_id defaults to user_id:agent_id"""
+
+    @abstractmethod
+    async def get_conversation_history(self, user_id: str, agent_id: str, limit: Optional[int] = 10, exclude_tool_calls: bool = True, session_id: str = None) -> List[dict]:
+        """Latest messages of a user-agent pair, newest first"""
+
+    @abstractmethod
+    async def get_last_session_id(self, user_id: str, agent_id: str) -> Optional[str]:
+        """Session of the latest message of a user-agent pair"""
+
+    @abstractmethod
+    async def get_summary(self, user_id: str, agent_id: str) -> Optional[dict]:
+        """Running summary of a user-agent pair as a dict with summary, token_count and summarized_until"""
+
+    @abstractmethod
+    async def save_summary(self, user_id: str, agent_id: str, summary: str, token_count: Optional[int], summarized_until: datetime) -> None:
+        """Replace the running summary of a user-agent pair"""
+
+    async def close(self) -> None:
+        """Write everything that is still buffered"""
+
+
+_storage: Optional[ConversationStorage] = None
+
+
+def create_conversation_storage(kind: str) -> ConversationStorage:
+    if kind == POSTGRES_STORAGE:
+        from .postgres_conversation_storage import PostgresConversationStorage
+        return PostgresConversationStorage()
+    if kind == MEMORY_STORAGE:
+        from .memory_conversation_storage import MemoryConversationStorage
+        return MemoryConversationStorage()
+    raise ValueError(f"Unknown conversation storage: {kind}")
+
+
+def get_conversation_storage() -> ConversationStorage:
+    """Process-wide storage of the kind set in CONVERSATION_STORAGE"""
+    global _storage
+    if _storage is None:
+        _storage = create_conversation_storage(Config.from_env().conversation_storage)
+    return _storage
@@ -0,0 +1,231 @@
+import asyncio
+import uuid
+from collections import deque
+from datetime import datetime
+from typing import Callable, List, Optional
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import InterfaceError, OperationalError
+from config import Config
+from .database import AsyncSessionLocal
+from .models import AgentSession, ConversationHistory
+
+
+class ConversationHistoryWriter:
+    """Write-behind queue for conversation_history inserts.
+
+    Rows get their id and timestamp on the client and are written with one
+    multi-row INSERT per flush. The agent_sessions pointers of the batch are
+    upserted in the same transaction. A flush happens when batch_size rows are
+    pending, every flush_interval seconds and on close(). Rows stay visible
+    through pending() until their batch is committed.
+
+    When the database cannot be reached the batch stays queued for the next
+    flush. Any other error makes the batch be written again row by row, rows
+    that fail max_attempts flushes are dropped into dead_letters.
+    """
+    _instance = None
+    # Errors of the connection rather than of the rows being written
+    CONNECTION_ERRORS = (OperationalError, InterfaceError, OSError, asyncio.TimeoutError)
+    MAX_DEAD_LETTERS = 1000
+
+    @classmethod
+    def get_instance(cls) -> 'ConversationHistoryWriter':
+        if cls._instance is None:
+            config = Config.from_env()
+            cls._instance = cls(
+                batch_size=config.history_batch_size,
+                flush_interval=config.history_flush_interval
+            )
+        return cls._instance
+
+    def __init__(self, session_factory: Callable = None, batch_size: int = 100, flush_interval: float = 1.0, max_attempts: int = 3):
+        self.session_factory = session_factory or AsyncSessionLocal
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_attempts = max_attempts
+        self._pending: List[dict] = []
+        self._attempts = {}
+        self.dead_letters = deque(maxlen=self.MAX_DEAD_LETTERS)
+        self._in_flight: List[dict] = []
+        self._retry: List[dict] = []
+        self._flush_lock = asyncio.Lock()
+        self._wake = None
+        self._flusher = None
+        self.flushes = 0
+        self.rows_written = 0
+
+    def enqueue(self, user_id: str, agent_id: str, role: str, content: str, session_id: str, token_count: Optional[int] = None) -> dict:
+        row = {
+            'id': uuid.uuid4(),
+            'user_id': uuid.UUID(user_id),
+            'agent_id': uuid.UUID(agent_id),
+            'role': role,
+            'content': content,
+            'timestamp': datetime.utcnow(),
+            'session_id': session_id,
+            'token_count': token_count
+        }
+        self._pending.append(row)
+        self._ensure_flusher()
+        if len(self._pending) >= self.batch_size and self._wake is not None:
+            self._wake.set()
+        return row
+
+    def pending(self, user_id: str, agent_id: str) -> List[dict]:
+        """Rows of a user-agent pair that are not committed yet, oldest first"""
+        user_uuid = uuid.UUID(user_id)
+        agent_uuid = uuid.UUID(agent_id)
+        return [
+            row for row in self._in_flight + self._retry + self._pending
+            if row['user_id'] == user_uuid and row['agent_id'] == agent_uuid
+        ]
+
+    def _ensure_flusher(self) -> None:
+        if self._flusher is not None and not self._flusher.done():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No loop yet, rows are written by the first flush() call
+            return
+        self._wake = asyncio.Event()
+        self._flusher = loop.create_task(self._run())
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            await self.flush()
+
+    async def flush(self) -> int:
+        """Write all pending rows, returns the number of rows written"""
+        async with self._flush_lock:
+            written = 0
+            try:
+                while self._pending:
+                    batch = self._pending[:self.batch_size]
+                    del self._pending[:self.batch_size]
+                    self._in_flight = batch
+                    try:
+                        await self._write(batch)
+                        written += len(batch)
+                    except self.CONNECTION_ERRORS as e:
+                        # Keep the rows queued, the next flush retries them
+                        print(f"Error writing conversation history batch of {len(batch)} rows: {e}")
+                        self._pending[:0] = batch
+                        break
+                    except Exception as e:
+                        print(f"Error writing conversation history batch of {len(batch)} rows, writing rows one by one: {e}")
+                        batch_written, failed, unwritten = await self._write_rows(batch)
+                        written += batch_written
+                        self._retry.extend(failed)
+                        if unwritten:
+                            self._pending[:0] = unwritten
+                            break
+                    except BaseException:
+                        # Rows committed before the cancellation are no longer in flight
+                        self._pending[:0] = self._in_flight
+                        raise
+                    finally:
+                        self._in_flight = []
+            finally:
+                # Rows that failed on their own wait behind the queue for the next flush
+                self._pending.extend(self._retry)
+                self._retry = []
+                self.rows_written += written
+            return written
+
+    async def _write(self, rows: List[dict]) -> None:
+        async with self.session_factory() as session:
+            await session.execute(insert(ConversationHistory).values(rows))
+            await session.execute(self._agent_sessions_upsert(rows))
+            await session.commit()
+            committed = {id(row) for row in rows}
+            self._in_flight = [row for row in self._in_flight if id(row) not in committed]
+        self.flushes += 1
+
+    async def _write_rows(self, batch: List[dict]) -> tuple:
+        """Write rows of a failed batch one at a time.
+
+        Returns the number of rows written, the rows to retry on the next
+        flush and the rows left unwritten because the connection failed.
+        """
+        written = 0
+        failed = []
+        for position, row in enumerate(batch):
+            try:
+                await self._write([row])
+                written += 1
+                self._attempts.pop(row['id'], None)
+            except self.CONNECTION_ERRORS as e:
+                print(f"Error writing conversation history row {row['id']}: {e}")
+                return written, failed, batch[position:]
+            except Exception as e:
+                attempts = self._attempts.get(row['id'], 0) + 1
+                if attempts < self.max_attempts:
+                    self._attempts[row['id']] = attempts
+                    failed.append(row)
+                    print(f"Error writing conversation history row {row['id']} (attempt {attempts} of {self.max_attempts}): {e}")
+                else:
+                    self._attempts.pop(row['id'], None)
+                    self.dead_letters.append(row)
+                    print(f"Dropped conversation history row {row['id']} after {attempts} attempts: {e}")
+        return written, failed, []
+
+    @staticmethod
+    def _agent_sessions_upsert(batch: List[dict]):
+        """Upsert the latest session of every user-agent pair in the batch"""
+        latest = {}
+        for row in batch:
+            key = (row['user_id'], row['agent_id'])
+            if key not in latest or latest[key]['timestamp'] <= row['timestamp']:
+                latest[key] = row
+
+        statement = insert(AgentSession).values([
+            {
+                'user_id': row['user_id'],
+                'agent_id': row['agent_id'],
+                'session_id': row['session_id'],
+                'updated_at': row['timestamp']
+            }
+            for row in latest.values()
+        ])
+        # A batch retried after a newer one was written must not move the pointer back
+        return statement.on_conflict_do_update(
+            index_elements=[AgentSession.user_id, AgentSession.agent_id],
+            set_={'session_id': statement.excluded.session_id, 'updated_at': statement.excluded.updated_at},
+            where=AgentSession.updated_at <= statement.excluded.updated_at
+        )
+
+    async def close(self) -> None:
+        """Stop the background flusher and write everything that is still queued"""
+        if self._flusher is not None:
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+            self._flusher = None
+        # Rows failing on their own get all their attempts before the writer gives up on them
+        for _ in range(self.max_attempts):
+            await self.flush()
+            if not self._pending:
+                break
+        if self._pending:
+            print(f"Conversation history writer closed with {len(self._pending)} unwritten rows")
+
+    @property
+    def stats(self) -> dict:
+        return {
+            'pending': len(self._pending),
+            'flushes': self.flushes,
+            'rows_written': self.rows_written,
+            'dead_letters': len(self.dead_letters)
+        }
+
+
+def get_conversation_writer() -> ConversationHistoryWriter:
+    return ConversationHistoryWriter.get_instance()
@@ -1,5 +1,7 @@
+from contextlib import asynccontextmanager
 from sqlalchemy import create_engine
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from config import Config
 
 def get_database_url(): 
@@ -13,11 +15,29 @@ def get_database_url():
     
     return f'postgresql://{config.postgres_user}:{config.postgres_password}@{config.postgres_host}:{config.postgres_port}/{config.postgres_db}'
 
-engine = create_engine(get_database_url())
+def get_async_database_url(database_url: str) -> str:
+    return database_url.replace('postgresql://', 'postgresql+asyncpg://', 1)
+
+_database_url = get_database_url()
+
+# Synchronous engine is kept for migrations and offline maintenance scripts only
+engine = create_engine(_database_url)
+
+async_engine = create_async_engine(get_async_database_url(_database_url), pool_pre_ping=True)
+AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False)
 
 def get_db():
     db = Session(engine)
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+@asynccontextmanager
+async def get_async_db():
+    async with AsyncSessionLocal() as session:
+        yield session
+
+async def dispose_engines():
+    await async_engine.dispose()
+    engine.dispose()
@@ -0,0 +1,68 @@
+import uuid
+from collections import deque
+from datetime import datetime
+from typing import Deque, Dict, List, Optional, Tuple
+from .conversation_storage import ConversationStorage
+
+
+class MemoryConversationStorage(ConversationStorage):
+    """In-process storage for benchmarks and load tests, nothing leaves the process.
+
+    Every user-agent pair keeps its last max_messages messages in a ring buffer.
+    """
+    MAX_MESSAGES = 1000
+
+    def __init__(self, max_messages: int = MAX_MESSAGES):
+        self.max_messages = max_messages
+        self._messages: Dict[Tuple[str, str], Deque[dict]] = {}
+        self._summaries: Dict[Tuple[str, str], dict] = {}
+
+    async def save_message(self, user_id: str, agent_id: str, role: str, content: str, session_id: str = None, token_count: Optional[int] = None) -> str:
+        if session_id is None:
+            session_id = f"{user_id}:{agent_id}"
+
+        key = (user_id, agent_id)
+        messages = self._messages.get(key)
+        if messages is None:
+            messages = self._messages[key] = deque(maxlen=self.max_messages)
+
+        message_id = str(uuid.uuid4())
+        messages.append({
+            'role': role,
+            'content': content,
+            'timestamp': datetime.utcnow(),
+            'session_id': session_id,
+            'token_count': token_count
+        })
+        return message_id
+
+    async def get_conversation_history(self, user_id: str, agent_id: str, limit: Optional[int] = 10, exclude_tool_calls: bool = True, session_id: str = None) -> List[dict]:
+        history = []
+        for message in reversed(self._messages.get((user_id, agent_id), ())):
+            if exclude_tool_calls and message['role'] == 'tool':
+                continue
+            if session_id is not None and message['session_id'] != session_id:
+                continue
+            history.append(dict(message))
+            if limit is not None and len(history) >= limit:
+                break
+        return history
+
+    async def get_last_session_id(self, user_id: str, agent_id: str) -> Optional[str]:
+        messages = self._messages.get((user_id, agent_id))
+        return messages[-1]['session_id'] if messages else None
+
+    async def get_summary(self, user_id: str, agent_id: str) -> Optional[dict]:
+        summary = self._summaries.get((user_id, agent_id))
+        return dict(summary) if summary else None
+
+    async def save_summary(self, user_id: str, agent_id: str, summary: str, token_count: Optional[int], summarized_until: datetime) -> None:
+        self._summaries[(user_id, agent_id)] = {
+            'summary': summary,
+            'token_count': token_count,
+            'summarized_until': summarized_until
+        }
+
+    def clear(self) -> None:
+        self._messages.clear()
+        self._summaries.clear()
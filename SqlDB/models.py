@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, UUID, BigInteger, ForeignKey, Integer, Float, JSON, Boolean, Time, Text, DateTime
+from sqlalchemy import Column, String, UUID, BigInteger, ForeignKey, Integer, Float, JSON, Boolean, Time, Text, DateTime, Index, LargeBinary
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.dialects.postgresql import UUID as PostgresUUID
 from sqlalchemy import text
@@ -54,6 +54,7 @@ class Scheduler(Base):
 
 class ConversationHistory(Base):
     __tablename__ = 'conversation_history'
+    __table_args__ = {'postgresql_partition_by': 'RANGE (timestamp)'}
 
     id = Column(PostgresUUID(as_uuid=True), primary_key=True,
                 server_default=text('uuid_generate_v4()'))
@@ -61,5 +62,64 @@ class ConversationHistory(Base):
     agent_id = Column(PostgresUUID(as_uuid=True), ForeignKey('agents.id'), nullable=False)
     role = Column(String(50), nullable=False)
     content = Column(Text, nullable=False)
-    timestamp = Column(DateTime, default=datetime.utcnow, nullable=False)
+    # Part of the key because the table is range partitioned by month on timestamp (revision 002)
+    timestamp = Column(DateTime, default=datetime.utcnow, nullable=False, primary_key=True)
     session_id = Column(String(255), nullable=False)
+    # Tokens of content, counted once on write so prompts can be fitted to a budget (revision 005)
+    token_count = Column(Integer, nullable=True)
+
+
+class AgentSession(Base):
+    __tablename__ = 'agent_sessions'
+
+    user_id = Column(PostgresUUID(as_uuid=True), ForeignKey('users.id'), primary_key=True)
+    agent_id = Column(PostgresUUID(as_uuid=True), ForeignKey('agents.id'), primary_key=True)
+    session_id = Column(String(255), nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class ConversationSummary(Base):
+    __tablename__ = 'conversation_summaries'
+
+    user_id = Column(PostgresUUID(as_uuid=True), ForeignKey('users.id'), primary_key=True)
+    agent_id = Column(PostgresUUID(as_uuid=True), ForeignKey('agents.id'), primary_key=True)
+    summary = Column(Text, nullable=False)
+    token_count = Column(Integer, nullable=True)
+    # Messages up to this time are folded into the summary
+    summarized_until = Column(DateTime, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class YoutubeTranscript(Base):
+    __tablename__ = 'youtube_transcripts'
+
+    video_id = Column(String(32), primary_key=True)
+    language = Column(String(10), primary_key=True)
+    content = Column(LargeBinary, nullable=False)  # zlib compressed UTF-8 text
+    content_sha256 = Column(String(64), nullable=False)
+    original_size = Column(Integer, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+# Built concurrently by alembic revision 001, declared here so autogenerate keeps them
+Index(
+    'ix_conversation_history_user_agent_timestamp',
+    ConversationHistory.user_id,
+    ConversationHistory.agent_id,
+    ConversationHistory.timestamp.desc(),
+    postgresql_include=['session_id']
+)
+Index(
+    'ix_conversation_history_user_agent_chat_timestamp',
+    ConversationHistory.user_id,
+    ConversationHistory.agent_id,
+    ConversationHistory.timestamp.desc(),
+    postgresql_where=text("role <> 'tool'")
+)
+Index(
+    'ix_conversation_history_user_agent_session_timestamp',
+    ConversationHistory.user_id,
+    ConversationHistory.agent_id,
+    ConversationHistory.session_id,
+    ConversationHistory.timestamp.desc()
+)
@@ -0,0 +1,186 @@
+import asyncio
+import gzip
+import os
+import re
+import shutil
+from datetime import datetime
+from typing import List, Optional, Tuple
+from sqlalchemy import select, text
+from config import Config
+from .database import AsyncSessionLocal, async_engine
+from .models import Agent, ConversationHistory
+from .retention_policy import RetentionPolicy
+
+PARENT_TABLE = 'conversation_history'
+PARTITION_PREFIX = f'{PARENT_TABLE}_y'
+PARTITION_PATTERN = re.compile(rf'^{PARTITION_PREFIX}(\d{{4}})m(\d{{2}})$')
+# Catches rows of months without a partition, see migration 007
+DEFAULT_PARTITION = f'{PARENT_TABLE}_default'
+
+
+def month_start(value: datetime) -> datetime:
+    return datetime(value.year, value.month, 1)
+
+
+def add_months(month: datetime, months: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: datetime) -> str:
+    return f"{PARTITION_PREFIX}{month:%Y}m{month:%m}"
+
+
+def parse_partition_name(name: str) -> Optional[datetime]:
+    match = PARTITION_PATTERN.match(name)
+    if not match:
+        return None
+    return datetime(int(match.group(1)), int(match.group(2)), 1)
+
+
+def partition_months(now: datetime, months_ahead: int, default_months: List[datetime] = ()) -> List[datetime]:
+    """Months that need a partition: the current one, months_ahead after it and
+    every month with rows in the default partition, oldest first"""
+    current = month_start(now)
+    months = {add_months(current, offset) for offset in range(months_ahead + 1)}
+    months.update(month_start(month) for month in default_months)
+    return sorted(months)
+
+
+def expired_partitions(names: List[str], cutoff: Optional[datetime]) -> List[str]:
+    """Partitions whose whole month lies before the cutoff, oldest first"""
+    if cutoff is None:
+        return []
+    expired = []
+    for name in names:
+        month = parse_partition_name(name)
+        if month is not None and add_months(month, 1) <= cutoff:
+            expired.append((month, name))
+    return [name for _, name in sorted(expired)]
+
+
+class PartitionMaintenance:
+    """Keeps the monthly partitions of conversation_history in shape.
+
+    Creates the partitions of the coming months and archives partitions that
+    only hold expired rows: the partition is detached, copied to a gzipped CSV
+    file with COPY and dropped, no row-by-row DELETE. Rows that went to the
+    default partition because their month had none are moved into a new
+    partition of their month.
+    """
+    MONTHS_AHEAD = 3
+
+    def __init__(self, archive_dir: str = None, retention_policy: RetentionPolicy = None):
+        self.archive_dir = archive_dir or Config.from_env().history_archive_dir
+        self.retention_policy = retention_policy or RetentionPolicy()
+
+    async def _list_tables(self) -> List[Tuple[str, bool]]:
+        """(name, attached) of every conversation_history partition table, attached or not"""
+        async with AsyncSessionLocal() as session:
+            rows = (await session.execute(text(
+                "SELECT c.relname, c.relispartition FROM pg_class c "
+                "JOIN pg_namespace n ON n.oid = c.relnamespace "
+                "WHERE n.nspname = current_schema() AND c.relkind = 'r' AND c.relname LIKE :prefix"
+            ), {'prefix': f"{PARTITION_PREFIX}%"})).all()
+        return [(name, attached) for name, attached in rows if PARTITION_PATTERN.match(name)]
+
+    async def ensure_partitions(self, now: Optional[datetime] = None) -> List[str]:
+        """Create the partitions of the current month, MONTHS_AHEAD months after it
+        and of the months with rows in the default partition"""
+        existing = {name for name, _ in await self._list_tables()}
+        created = []
+        async with AsyncSessionLocal() as session:
+            default_months = await self._default_partition_months(session)
+            for month in partition_months(now or datetime.utcnow(), self.MONTHS_AHEAD, default_months):
+                name = partition_name(month)
+                if name in existing:
+                    continue
+                if month in default_months:
+                    await self._drain_default_partition(session, name, month)
+                else:
+                    await session.execute(text(
+                        f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {PARENT_TABLE} "
+                        f"FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{add_months(month, 1):%Y-%m-%d}')"
+                    ))
+                created.append(name)
+            await session.commit()
+        return created
+
+    @staticmethod
+    async def _default_partition_months(session) -> List[datetime]:
+        exists = (await session.execute(text("SELECT to_regclass(:name) IS NOT NULL"), {'name': DEFAULT_PARTITION})).scalar()
+        if not exists:
+            return []
+        rows = (await session.execute(text(
+            f'SELECT DISTINCT date_trunc(\'month\', "timestamp") FROM {DEFAULT_PARTITION}'
+        ))).scalars().all()
+        return [month_start(month) for month in rows]
+
+    @staticmethod
+    async def _drain_default_partition(session, name: str, month: datetime) -> None:
+        """Move the rows of month out of the default partition into a new partition.
+
+        A partition cannot be created while the default partition holds rows of
+        its range, so the table is filled first and attached afterwards.
+        """
+        columns = ', '.join(f'"{column.name}"' for column in ConversationHistory.__table__.columns)
+        bounds = f"FROM ('{month:%Y-%m-%d}') TO ('{add_months(month, 1):%Y-%m-%d}')"
+        await session.execute(text(f"CREATE TABLE {name} (LIKE {PARENT_TABLE} INCLUDING DEFAULTS)"))
+        moved = await session.execute(text(
+            f"WITH moved AS ("
+            f"DELETE FROM {DEFAULT_PARTITION} WHERE \"timestamp\" >= '{month:%Y-%m-%d}' "
+            f"AND \"timestamp\" < '{add_months(month, 1):%Y-%m-%d}' RETURNING {columns}"
+            f") INSERT INTO {name} ({columns}) SELECT {columns} FROM moved"
+        ))
+        await session.execute(text(f"ALTER TABLE {PARENT_TABLE} ATTACH PARTITION {name} FOR VALUES {bounds}"))
+        print(f"Moved {moved.rowcount} rows from {DEFAULT_PARTITION} to new partition {name}")
+
+    async def load_retention(self) -> None:
+        async with AsyncSessionLocal() as session:
+            rows = (await session.execute(select(Agent.id, Agent.configuration))).all()
+        self.retention_policy.update({str(agent_id): configuration for agent_id, configuration in rows})
+
+    async def archive_expired(self, now: Optional[datetime] = None) -> List[str]:
+        """Detach, archive and drop partitions older than the longest retention"""
+        tables = await self._list_tables()
+        attached = [name for name, is_attached in tables if is_attached]
+        # Left over by a run that failed after the detach, they are archived first
+        detached = [name for name, is_attached in tables if not is_attached]
+
+        archived = []
+        for name in detached + expired_partitions(attached, self.retention_policy.partition_cutoff(now)):
+            await self._archive_partition(name, detach=name in attached)
+            archived.append(name)
+        return archived
+
+    async def _archive_partition(self, name: str, detach: bool) -> None:
+        os.makedirs(self.archive_dir, exist_ok=True)
+        csv_path = os.path.join(self.archive_dir, f"{name}.csv")
+
+        if detach:
+            # DETACH ... CONCURRENTLY is refused while the table has a default
+            # partition (migration 007), the plain DETACH locks conversation_history
+            # only until its own transaction commits
+            async with async_engine.begin() as connection:
+                await connection.execute(text(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {name}"))
+            print(f"Detached partition {name}")
+
+        async with async_engine.begin() as connection:
+            raw_connection = await connection.get_raw_connection()
+            await raw_connection.driver_connection.copy_from_table(name, output=csv_path, format='csv', header=True)
+            await asyncio.to_thread(self._compress, csv_path)
+
+            await connection.execute(text(f"DROP TABLE {name}"))
+        print(f"Archived partition {name} to {csv_path}.gz")
+
+    @staticmethod
+    def _compress(path: str) -> None:
+        with open(path, 'rb') as source, gzip.open(f"{path}.gz", 'wb') as target:
+            shutil.copyfileobj(source, target)
+        os.remove(path)
+
+    async def run(self, now: Optional[datetime] = None) -> dict:
+        await self.load_retention()
+        created = await self.ensure_partitions(now)
+        archived = await self.archive_expired(now)
+        return {'created': created, 'archived': archived}
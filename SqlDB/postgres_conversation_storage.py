@@ -0,0 +1,169 @@
+from sqlalchemy import desc, select, Select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from .database import AsyncSessionLocal
+from .models import AgentSession, ConversationHistory, ConversationSummary
+from .conversation_writer import ConversationHistoryWriter, get_conversation_writer
+from .retention_policy import RetentionPolicy
+from .conversation_storage import ConversationStorage
+from datetime import datetime
+from typing import List, Optional
+import uuid
+
+class PostgresConversationStorage(ConversationStorage):
+    """conversation_history in PostgreSQL, writes go through the write-behind writer"""
+
+    def __init__(self, writer: ConversationHistoryWriter = None):
+        self.session_factory = AsyncSessionLocal
+        self.writer = writer or get_conversation_writer()
+        self.retention_policy = RetentionPolicy()
+
+    def _get_session(self) -> AsyncSession:
+        return self.session_factory()
+
+    async def save_message(self, user_id: str, agent_id: str, role: str, content: str, session_id: str = None, token_count: Optional[int] = None) -> str:
+        """Queue a message on the write-behind writer, it is visible to reads immediately"""
+        if session_id is None:
+            session_id = f"{user_id}:{agent_id}"
+
+        row = self.writer.enqueue(user_id, agent_id, role, content, session_id, token_count)
+        return str(row['id'])
+
+    @staticmethod
+    def history_query(user_id: str, agent_id: str, limit: Optional[int] = 10, exclude_tool_calls: bool = True, session_id: str = None, since: Optional[datetime] = None) -> Select:
+        """Served by the conversation_history indexes of migration 001, see SqlDB/query_plans.py.
+
+        `since` is the retention cutoff of the agent, it lets the planner skip older partitions.
+        """
+        query = select(ConversationHistory).where(
+            ConversationHistory.user_id == uuid.UUID(user_id),
+            ConversationHistory.agent_id == uuid.UUID(agent_id)
+        )
+
+        if since is not None:
+            query = query.where(ConversationHistory.timestamp >= since)
+
+        if session_id is not None:
+            query = query.where(ConversationHistory.session_id == session_id)
+
+        if exclude_tool_calls:
+            query = query.where(ConversationHistory.role != 'tool')
+
+        query = query.order_by(desc(ConversationHistory.timestamp))
+
+        if limit is not None:
+            query = query.limit(limit)
+
+        return query
+
+    @staticmethod
+    def last_session_query(user_id: str, agent_id: str, since: Optional[datetime] = None) -> Select:
+        """Primary key fetch of the session pointer kept by the writer in agent_sessions"""
+        query = select(AgentSession.session_id).where(
+            AgentSession.user_id == uuid.UUID(user_id),
+            AgentSession.agent_id == uuid.UUID(agent_id)
+        )
+
+        if since is not None:
+            query = query.where(AgentSession.updated_at >= since)
+
+        return query
+
+    def _get_pending(self, user_id: str, agent_id: str, exclude_tool_calls: bool, session_id: str = None) -> List[dict]:
+        return [
+            row for row in self.writer.pending(user_id, agent_id)
+            if (session_id is None or row['session_id'] == session_id)
+            and not (exclude_tool_calls and row['role'] == 'tool')
+        ]
+
+    async def get_conversation_history(self, user_id: str, agent_id: str, limit: Optional[int] = 10, exclude_tool_calls: bool = True, session_id: str = None) -> List[dict]:
+        # Taken before the query: a row committed in between is then seen at least once
+        pending = self._get_pending(user_id, agent_id, exclude_tool_calls, session_id)
+
+        async with self._get_session() as session:
+            since = self.retention_policy.cutoff(agent_id)
+            query = self.history_query(user_id, agent_id, limit, exclude_tool_calls, session_id, since)
+            messages = (await session.execute(query)).scalars().all()
+
+        rows = [
+            {
+                'id': msg.id,
+                'role': msg.role,
+                'content': msg.content,
+                'timestamp': msg.timestamp,
+                'session_id': msg.session_id,
+                'token_count': msg.token_count
+            }
+            for msg in messages
+        ]
+
+        if pending:
+            # A batch may commit between the two reads, drop rows seen twice
+            stored_ids = {row['id'] for row in rows}
+            rows.extend(row for row in pending if row['id'] not in stored_ids)
+            rows.sort(key=lambda row: row['timestamp'], reverse=True)
+            if limit is not None:
+                rows = rows[:limit]
+
+        return [
+            {
+                'role': row['role'],
+                'content': row['content'],
+                'timestamp': row['timestamp'],
+                'session_id': row['session_id'],
+                'token_count': row['token_count']
+            }
+            for row in rows
+        ]
+
+    async def get_last_session_id(self, user_id: str, agent_id: str) -> str | None:
+        pending = self.writer.pending(user_id, agent_id)
+        if pending:
+            return pending[-1]['session_id']
+
+        async with self._get_session() as session:
+            query = self.last_session_query(user_id, agent_id, self.retention_policy.cutoff(agent_id))
+            return (await session.execute(query)).scalar_one_or_none()
+
+    async def get_summary(self, user_id: str, agent_id: str) -> Optional[dict]:
+        async with self._get_session() as session:
+            row = (await session.execute(
+                select(ConversationSummary.summary, ConversationSummary.token_count, ConversationSummary.summarized_until).where(
+                    ConversationSummary.user_id == uuid.UUID(user_id),
+                    ConversationSummary.agent_id == uuid.UUID(agent_id)
+                )
+            )).one_or_none()
+
+        if row is None:
+            return None
+        return {
+            'summary': row.summary,
+            'token_count': row.token_count,
+            'summarized_until': row.summarized_until
+        }
+
+    async def save_summary(self, user_id: str, agent_id: str, summary: str, token_count: Optional[int], summarized_until: datetime) -> None:
+        """Written directly, a summary replaces the previous one and is rare compared to messages"""
+        statement = insert(ConversationSummary).values(
+            user_id=uuid.UUID(user_id),
+            agent_id=uuid.UUID(agent_id),
+            summary=summary,
+            token_count=token_count,
+            summarized_until=summarized_until,
+            updated_at=datetime.utcnow()
+        )
+        statement = statement.on_conflict_do_update(
+            index_elements=[ConversationSummary.user_id, ConversationSummary.agent_id],
+            set_={
+                'summary': statement.excluded.summary,
+                'token_count': statement.excluded.token_count,
+                'summarized_until': statement.excluded.summarized_until,
+                'updated_at': statement.excluded.updated_at
+            }
+        )
+        async with self._get_session() as session:
+            await session.execute(statement)
+            await session.commit()
+
+    async def close(self) -> None:
+        await self.writer.close()
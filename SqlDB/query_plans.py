@@ -0,0 +1,108 @@
+"""EXPLAIN check for the conversation_history service queries.
+
+Run against a migrated database with: python -m SqlDB.query_plans
+Sequential scans are disabled for the check session, so on a small table the
+planner still shows which index it would use once the table grows. Every
+partition the planner keeps has to be read through an index.
+"""
+import asyncio
+import json
+import sys
+from typing import Iterator, List
+from sqlalchemy import select, text
+from sqlalchemy.dialects import postgresql
+from .database import AsyncSessionLocal, dispose_engines
+from .models import ConversationHistory
+from .postgres_conversation_storage import PostgresConversationStorage
+
+TABLE_NAME = 'conversation_history'
+INDEX_SCANS = ('Index Only Scan', 'Index Scan', 'Bitmap Index Scan')
+
+
+def iter_plan_nodes(plan: dict) -> Iterator[dict]:
+    yield plan
+    for child in plan.get('Plans', []):
+        yield from iter_plan_nodes(child)
+
+
+def _belongs_to(relation_name: str, table_name: str) -> bool:
+    """The table itself, one of its monthly partitions or one of their indexes"""
+    return relation_name == table_name or relation_name.startswith((f"{table_name}_", f"ix_{table_name}_"))
+
+
+def table_scans(plan: dict, table_name: str = TABLE_NAME) -> List[dict]:
+    """Scan nodes that read the given table, bitmap index scans are matched by their index name"""
+    return [
+        node for node in iter_plan_nodes(plan)
+        if _belongs_to(node.get('Relation Name', ''), table_name)
+        or (node.get('Node Type') == 'Bitmap Index Scan' and _belongs_to(node.get('Index Name', ''), table_name))
+    ]
+
+
+def uses_index(plan: dict, table_name: str = TABLE_NAME) -> bool:
+    """True when the table is read only through index range or index-only scans"""
+    node_types = [node['Node Type'] for node in table_scans(plan, table_name)]
+    return (
+        any(node_type in INDEX_SCANS for node_type in node_types)
+        and all(node_type in INDEX_SCANS or node_type == 'Bitmap Heap Scan' for node_type in node_types)
+    )
+
+
+def describe_plan(plan: dict, table_name: str = TABLE_NAME) -> str:
+    return ', '.join(
+        f"{node['Node Type']}" + (f" using {node['Index Name']}" if node.get('Index Name') else '')
+        for node in table_scans(plan, table_name)
+    )
+
+
+async def explain(session, query) -> dict:
+    compiled = query.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True})
+    result = await session.execute(text(f"EXPLAIN (FORMAT JSON) {compiled}"))
+    document = result.scalar_one()
+    if isinstance(document, str):
+        document = json.loads(document)
+    return document[0]['Plan']
+
+
+async def check_conversation_queries() -> bool:
+    async with AsyncSessionLocal() as session:
+        sample = (await session.execute(
+            select(ConversationHistory.user_id, ConversationHistory.agent_id, ConversationHistory.session_id).limit(1)
+        )).first()
+        if sample is None:
+            print(f"{TABLE_NAME} is empty, nothing to check")
+            return True
+
+        user_id, agent_id, session_id = str(sample[0]), str(sample[1]), sample[2]
+        # name -> (query, table the query has to reach through an index)
+        queries = {
+            'get_conversation_history': (PostgresConversationStorage.history_query(user_id, agent_id), TABLE_NAME),
+            'get_conversation_history (with tool calls)': (PostgresConversationStorage.history_query(
+                user_id, agent_id, exclude_tool_calls=False
+            ), TABLE_NAME),
+            'get_conversation_history (session)': (PostgresConversationStorage.history_query(
+                user_id, agent_id, session_id=session_id
+            ), TABLE_NAME),
+            'get_last_session_id': (PostgresConversationStorage.last_session_query(user_id, agent_id), 'agent_sessions')
+        }
+
+        await session.execute(text("SET LOCAL enable_seqscan = off"))
+        all_indexed = True
+        for name, (query, table_name) in queries.items():
+            plan = await explain(session, query)
+            indexed = uses_index(plan, table_name)
+            all_indexed = all_indexed and indexed
+            print(f"{'OK  ' if indexed else 'FAIL'} {name}: {describe_plan(plan, table_name) or plan['Node Type']}")
+        await session.rollback()
+        return all_indexed
+
+
+async def main() -> int:
+    try:
+        return 0 if await check_conversation_queries() else 1
+    finally:
+        await dispose_engines()
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
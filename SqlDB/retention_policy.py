@@ -0,0 +1,49 @@
+import json
+from datetime import datetime, timedelta
+from typing import Dict, Mapping, Optional
+from config import Config
+
+class RetentionPolicy:
+    """How long conversation history is kept, per agent.
+
+    An agent sets `retention_days` in its configuration, other agents use
+    HISTORY_RETENTION_DAYS. 0 keeps history forever.
+    """
+    _instance = None
+    _agent_days: Dict[str, Optional[int]] = {}  # agent_id -> retention_days from the agent configuration
+    default_days: int = 0
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance.default_days = Config.from_env().history_retention_days
+        return cls._instance
+
+    def update(self, agent_configurations: Mapping[str, dict]) -> None:
+        """Replace the per-agent retention with the given agent_id -> configuration mapping"""
+        agent_days = {}
+        for agent_id, configuration in agent_configurations.items():
+            if isinstance(configuration, str):
+                configuration = json.loads(configuration)
+            days = (configuration or {}).get('retention_days')
+            agent_days[str(agent_id)] = int(days) if days is not None else None
+        self._agent_days.clear()
+        self._agent_days.update(agent_days)
+
+    def retention_days(self, agent_id: str) -> int:
+        days = self._agent_days.get(agent_id)
+        return self.default_days if days is None else days
+
+    def cutoff(self, agent_id: str, now: Optional[datetime] = None) -> Optional[datetime]:
+        """Oldest timestamp still visible for the agent, None when history is kept forever"""
+        days = self.retention_days(agent_id)
+        if days <= 0:
+            return None
+        return (now or datetime.utcnow()) - timedelta(days=days)
+
+    def partition_cutoff(self, now: Optional[datetime] = None) -> Optional[datetime]:
+        """Partitions ending before this timestamp hold only expired rows of every agent"""
+        retention = [self.retention_days(agent_id) for agent_id in self._agent_days] or [self.default_days]
+        if any(days <= 0 for days in retention):
+            return None
+        return (now or datetime.utcnow()) - timedelta(days=max(retention))
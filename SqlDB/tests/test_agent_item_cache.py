@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+
+import asyncio
+import pytest
+from SqlDB import agent_item_cache
+from SqlDB.agent_item_cache import AgentItemCache
+
+
+class FakeSession:
+    """Session returning the configured rows and counting the queries"""
+
+    def __init__(self, database):
+        self.database = database
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, statement):
+        self.database.queries += 1
+        rows = list(self.database.rows)
+        return type('Result', (), {'all': lambda _: rows})()
+
+
+class FakeDatabase:
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = 0
+
+    def session(self):
+        return FakeSession(self)
+
+
+@pytest.fixture
+def database(monkeypatch):
+    database = FakeDatabase([('agent-1', {'city': {'name': 'Kraków'}}), ('agent-2', None)])
+    monkeypatch.setattr(agent_item_cache, 'AsyncSessionLocal', database.session)
+    monkeypatch.setattr(AgentItemCache, '_answers', {})
+    return database
+
+
+class TestAgentItemCache:
+    def test_first_access_loads_all_items_of_the_user(self, database):
+        cache = AgentItemCache()
+
+        answers = asyncio.run(cache.get_answers('user', 'agent-1'))
+
+        assert answers == {'city': {'name': 'Kraków'}}
+        assert database.queries == 1
+        assert cache.has_user('user')
+
+    def test_repeated_access_does_not_query(self, database):
+        cache = AgentItemCache()
+        asyncio.run(cache.get_answers('user', 'agent-1'))
+
+        assert asyncio.run(cache.get_answers('user', 'agent-2')) == {}
+        assert asyncio.run(cache.get_answers('user', 'agent-3')) == {}
+        assert asyncio.run(cache.get_answers('user', 'agent-1')) == {'city': {'name': 'Kraków'}}
+        assert database.queries == 1
+
+    def test_invalidate_forces_a_reload(self, database):
+        cache = AgentItemCache()
+        asyncio.run(cache.get_answers('user', 'agent-1'))
+        database.rows = [('agent-1', {'city': {'name': 'Gdańsk'}})]
+
+        cache.invalidate('user')
+
+        assert not cache.has_user('user')
+        assert asyncio.run(cache.get_answers('user', 'agent-1')) == {'city': {'name': 'Gdańsk'}}
+        assert database.queries == 2
+
+    def test_returned_answers_are_copies(self, database):
+        cache = AgentItemCache()
+        answers = asyncio.run(cache.get_answers('user', 'agent-1'))
+
+        answers['city']['name'] = 'Warszawa'
+        answers['language'] = 'pl'
+        missing = asyncio.run(cache.get_answers('user', 'agent-3'))
+        missing['language'] = 'pl'
+
+        assert asyncio.run(cache.get_answers('user', 'agent-1')) == {'city': {'name': 'Kraków'}}
+        assert asyncio.run(cache.get_answers('user', 'agent-3')) == {}
+        assert database.queries == 1
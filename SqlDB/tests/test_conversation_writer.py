@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+
+import asyncio
+import uuid
+from datetime import datetime
+import pytest
+from sqlalchemy.dialects import postgresql
+from SqlDB.conversation_writer import ConversationHistoryWriter
+
+USER_ID = str(uuid.uuid4())
+AGENT_ID = str(uuid.uuid4())
+SESSION_ID = f"{USER_ID}:{AGENT_ID}"
+
+
+class FakeSession:
+    def __init__(self, store: 'FakeStore'):
+        self.store = store
+        self.statements = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+    async def execute(self, statement):
+        if self.store.fail:
+            raise ConnectionRefusedError("database unavailable")
+        if self.store.reject is not None and statement.table.name == 'conversation_history':
+            params = statement.compile(dialect=postgresql.dialect()).params
+            if self.store.reject in params.values():
+                raise RuntimeError("foreign key violation")
+        self.statements.append(statement)
+
+    async def commit(self):
+        self.store.batches.append([statement.table.name for statement in self.statements])
+        self.statements = []
+
+
+class FakeStore:
+    def __init__(self):
+        self.batches = []
+        self.fail = False
+        self.reject = None
+
+    def __call__(self):
+        return FakeSession(self)
+
+
+@pytest.fixture
+def store():
+    return FakeStore()
+
+
+def _enqueue(writer: ConversationHistoryWriter, count: int, role: str = 'user'):
+    return [writer.enqueue(USER_ID, AGENT_ID, role, f"message {i}", SESSION_ID) for i in range(count)]
+
+
+class TestConversationHistoryWriter:
+    def test_rows_are_written_in_one_transaction(self, store):
+        writer = ConversationHistoryWriter(session_factory=store, batch_size=100)
+        _enqueue(writer, 3)
+
+        written = asyncio.run(writer.flush())
+
+        assert written == 3
+        assert store.batches == [['conversation_history', 'agent_sessions']]
+        assert writer.stats == {'pending': 0, 'flushes': 1, 'rows_written': 3, 'dead_letters': 0}
+
+    def test_agent_session_points_to_latest_row(self):
+        rows = [
+            {'user_id': USER_ID, 'agent_id': AGENT_ID, 'session_id': 'first', 'timestamp': datetime(2026, 10, 1, 12, 0)},
+            {'user_id': USER_ID, 'agent_id': AGENT_ID, 'session_id': 'second', 'timestamp': datetime(2026, 10, 1, 12, 5)}
+        ]
+        params = ConversationHistoryWriter._agent_sessions_upsert(rows).compile(dialect=postgresql.dialect()).params
+
+        assert params['session_id_m0'] == 'second'
+        assert 'session_id_m1' not in params
+
+    def test_flush_splits_batches(self, store):
+        writer = ConversationHistoryWriter(session_factory=store, batch_size=2)
+        _enqueue(writer, 5)
+
+        asyncio.run(writer.flush())
+
+        assert len(store.batches) == 3
+
+    def test_pending_rows_are_visible_until_written(self, store):
+        writer = ConversationHistoryWriter(session_factory=store)
+        rows = _enqueue(writer, 2)
+
+        assert writer.pending(USER_ID, AGENT_ID) == rows
+        assert writer.pending(USER_ID, str(uuid.uuid4())) == []
+
+        asyncio.run(writer.flush())
+        assert writer.pending(USER_ID, AGENT_ID) == []
+
+    def test_failed_flush_keeps_rows_queued(self, store):
+        writer = ConversationHistoryWriter(session_factory=store)
+        rows = _enqueue(writer, 2)
+        store.fail = True
+
+        assert asyncio.run(writer.flush()) == 0
+        assert writer.pending(USER_ID, AGENT_ID) == rows
+
+        store.fail = False
+        assert asyncio.run(writer.flush()) == 2
+
+    def test_background_flush_on_size_and_close(self, store):
+        async def run():
+            writer = ConversationHistoryWriter(session_factory=store, batch_size=3, flush_interval=60)
+            _enqueue(writer, 3)
+            await asyncio.sleep(0.01)
+            assert writer.stats['rows_written'] == 3
+
+            _enqueue(writer, 1)
+            await writer.close()
+            assert writer.stats['rows_written'] == 4
+            assert writer.stats['pending'] == 0
+
+        asyncio.run(run())
+
+    def test_rejected_row_does_not_hold_back_the_batch(self, store):
+        writer = ConversationHistoryWriter(session_factory=store, batch_size=100, max_attempts=2)
+        _enqueue(writer, 3)
+        store.reject = "message 1"
+
+        assert asyncio.run(writer.flush()) == 2
+        assert [row['content'] for row in writer.pending(USER_ID, AGENT_ID)] == ["message 1"]
+
+        _enqueue(writer, 1, role='assistant')
+        assert asyncio.run(writer.flush()) == 1
+        assert writer.pending(USER_ID, AGENT_ID) == []
+        assert [row['content'] for row in writer.dead_letters] == ["message 1"]
+        assert writer.stats['dead_letters'] == 1
+        assert writer.stats['rows_written'] == 3
+
+    def test_close_gives_rejected_rows_all_attempts(self, store):
+        async def run():
+            writer = ConversationHistoryWriter(session_factory=store, flush_interval=60, max_attempts=3)
+            _enqueue(writer, 2)
+            store.reject = "message 0"
+            await writer.close()
+            assert writer.stats['pending'] == 0
+            assert writer.stats['rows_written'] == 1
+            assert writer.stats['dead_letters'] == 1
+
+        asyncio.run(run())
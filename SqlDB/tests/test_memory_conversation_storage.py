@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+
+import asyncio
+import pytest
+from SqlDB.conversation_history import ConversationHistoryService
+from SqlDB.conversation_storage import MEMORY_STORAGE, create_conversation_storage
+from SqlDB.memory_conversation_storage import MemoryConversationStorage
+
+USER_ID = 'user'
+AGENT_ID = 'agent'
+
+
+@pytest.fixture
+def service():
+    return ConversationHistoryService(MemoryConversationStorage(max_messages=5))
+
+
+def _save(service, *messages):
+    for role, content, session_id in messages:
+        asyncio.run(service.save_message(USER_ID, AGENT_ID, role, content, session_id))
+
+
+class TestMemoryConversationStorage:
+    def test_history_is_newest_first_without_tool_calls(self, service):
+        _save(service, ('user', 'question', None), ('tool', 'lookup', None), ('assistant', 'answer', None))
+
+        history = asyncio.run(service.get_conversation_history(USER_ID, AGENT_ID))
+
+        assert [message['content'] for message in history] == ['answer', 'question']
+        assert history[0]['session_id'] == f"{USER_ID}:{AGENT_ID}"
+
+    def test_limit_and_session_filter(self, service):
+        _save(service, ('user', 'a', 'first'), ('user', 'b', 'second'), ('user', 'c', 'second'), ('tool', 'd', 'second'))
+
+        history = asyncio.run(service.get_conversation_history(
+            USER_ID, AGENT_ID, limit=2, exclude_tool_calls=False, session_id='second'
+        ))
+
+        assert [message['content'] for message in history] == ['d', 'c']
+        assert asyncio.run(service.get_last_session_id(USER_ID, AGENT_ID)) == 'second'
+
+    def test_ring_buffer_keeps_latest_messages(self, service):
+        _save(service, *[('user', str(index), None) for index in range(8)])
+
+        history = asyncio.run(service.get_conversation_history(USER_ID, AGENT_ID, limit=None))
+
+        assert [message['content'] for message in history] == ['7', '6', '5', '4', '3']
+
+    def test_unknown_pair_is_empty(self, service):
+        assert asyncio.run(service.get_conversation_history(USER_ID, 'other')) == []
+        assert asyncio.run(service.get_last_session_id(USER_ID, 'other')) is None
+
+    def test_storage_is_selected_by_name(self):
+        assert isinstance(create_conversation_storage(MEMORY_STORAGE), MemoryConversationStorage)
+        with pytest.raises(ValueError):
+            create_conversation_storage('redis')
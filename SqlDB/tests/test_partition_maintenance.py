@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+
+import asyncio
+import gzip
+from datetime import datetime
+import pytest
+from SqlDB import partition_maintenance
+from SqlDB.partition_maintenance import (
+    PartitionMaintenance,
+    add_months,
+    expired_partitions,
+    month_start,
+    parse_partition_name,
+    partition_months,
+    partition_name
+)
+from SqlDB.retention_policy import RetentionPolicy
+
+NOW = datetime(2026, 10, 17, 12, 30)
+
+
+@pytest.fixture
+def policy():
+    policy = RetentionPolicy()
+    default_days = policy.default_days
+    policy.default_days = 0
+    policy.update({})
+    yield policy
+    policy.default_days = default_days
+    policy.update({})
+
+
+class TestPartitionNames:
+    def test_month_arithmetic(self):
+        assert month_start(NOW) == datetime(2026, 10, 1)
+        assert add_months(datetime(2026, 11, 1), 2) == datetime(2027, 1, 1)
+        assert add_months(datetime(2026, 1, 1), -1) == datetime(2025, 12, 1)
+
+    def test_name_round_trip(self):
+        assert partition_name(datetime(2026, 3, 1)) == 'conversation_history_y2026m03'
+        assert parse_partition_name('conversation_history_y2026m03') == datetime(2026, 3, 1)
+        assert parse_partition_name('conversation_history_legacy') is None
+
+    def test_only_whole_months_before_cutoff_expire(self):
+        names = ['conversation_history_y2026m08', 'conversation_history_y2026m06', 'conversation_history_y2026m07']
+        assert expired_partitions(names, datetime(2026, 8, 1)) == [
+            'conversation_history_y2026m06',
+            'conversation_history_y2026m07'
+        ]
+        assert expired_partitions(names, None) == []
+
+
+    def test_partition_months_include_default_partition_rows(self):
+        assert partition_months(NOW, 2) == [datetime(2026, 10, 1), datetime(2026, 11, 1), datetime(2026, 12, 1)]
+        # Rows of months the scheduler missed got into the default partition
+        assert partition_months(NOW, 0, [datetime(2027, 2, 1), datetime(2026, 10, 1)]) == [
+            datetime(2026, 10, 1),
+            datetime(2027, 2, 1)
+        ]
+
+
+class TestRetentionPolicy:
+    def test_history_is_kept_forever_by_default(self, policy):
+        assert policy.cutoff('agent') is None
+        assert policy.partition_cutoff(NOW) is None
+
+    def test_agent_configuration_overrides_default(self, policy):
+        policy.default_days = 90
+        policy.update({'youtube': {'retention_days': 30}, 'weather': '{"temperature": 0.2}'})
+
+        assert policy.cutoff('youtube', NOW) == datetime(2026, 9, 17, 12, 30)
+        assert policy.retention_days('weather') == 90
+        # Partitions are shared by all agents, the longest retention wins
+        assert policy.partition_cutoff(NOW) == datetime(2026, 7, 19, 12, 30)
+
+    def test_agent_keeping_history_blocks_archival(self, policy):
+        policy.update({'youtube': {'retention_days': 30}, 'weather': {}})
+
+        assert policy.cutoff('youtube', NOW) is not None
+        assert policy.partition_cutoff(NOW) is None
+
+
+class FakeConnection:
+    """Connection recording the statements of each transaction, refusing
+    DETACH ... CONCURRENTLY like PostgreSQL does when a default partition exists"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.driver_connection = self
+        self.statements = []
+
+    async def execute(self, statement):
+        sql = str(statement)
+        if 'CONCURRENTLY' in sql and self.engine.has_default_partition:
+            raise RuntimeError('cannot detach partitions concurrently when a default partition exists')
+        self.statements.append(sql)
+
+    async def get_raw_connection(self):
+        return self
+
+    async def copy_from_table(self, table, output, format, header):
+        self.statements.append(f"COPY {table} TO STDOUT")
+        with open(output, 'w') as csv_file:
+            csv_file.write('id,content\n1,hello\n')
+
+
+class FakeTransaction:
+    def __init__(self, engine):
+        self.connection = FakeConnection(engine)
+        self.engine = engine
+
+    async def __aenter__(self):
+        return self.connection
+
+    async def __aexit__(self, exc_type, *exc):
+        if exc_type is None:
+            self.engine.committed.append(self.connection.statements)
+        return False
+
+
+class FakeEngine:
+    def __init__(self, has_default_partition: bool = True):
+        self.has_default_partition = has_default_partition
+        self.committed = []
+
+    def begin(self):
+        return FakeTransaction(self)
+
+
+class TestArchivePartitions:
+    def test_detaches_without_concurrently_when_a_default_partition_exists(self, policy, monkeypatch, tmp_path):
+        engine = FakeEngine(has_default_partition=True)
+        monkeypatch.setattr(partition_maintenance, 'async_engine', engine)
+        maintenance = PartitionMaintenance(archive_dir=str(tmp_path), retention_policy=policy)
+
+        async def list_tables():
+            return [('conversation_history_y2026m01', True), ('conversation_history_y2026m10', True)]
+        monkeypatch.setattr(maintenance, '_list_tables', list_tables)
+        policy.update({'youtube': {'retention_days': 30}})
+
+        archived = asyncio.run(maintenance.archive_expired(NOW))
+
+        assert archived == ['conversation_history_y2026m01']
+        assert engine.committed == [
+            ['ALTER TABLE conversation_history DETACH PARTITION conversation_history_y2026m01'],
+            ['COPY conversation_history_y2026m01 TO STDOUT', 'DROP TABLE conversation_history_y2026m01'],
+        ]
+        with gzip.open(tmp_path / 'conversation_history_y2026m01.csv.gz', 'rt') as archive:
+            assert archive.read() == 'id,content\n1,hello\n'
+
+    def test_detached_leftovers_are_archived_without_detach(self, policy, monkeypatch, tmp_path):
+        engine = FakeEngine()
+        monkeypatch.setattr(partition_maintenance, 'async_engine', engine)
+        maintenance = PartitionMaintenance(archive_dir=str(tmp_path), retention_policy=policy)
+
+        async def list_tables():
+            return [('conversation_history_y2025m12', False)]
+        monkeypatch.setattr(maintenance, '_list_tables', list_tables)
+
+        assert asyncio.run(maintenance.archive_expired(NOW)) == ['conversation_history_y2025m12']
+        assert engine.committed == [
+            ['COPY conversation_history_y2025m12 TO STDOUT', 'DROP TABLE conversation_history_y2025m12'],
+        ]
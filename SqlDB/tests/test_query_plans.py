@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+
+from SqlDB.query_plans import uses_index, describe_plan
+
+INDEX_ONLY_PLAN = {
+    'Node Type': 'Limit',
+    'Plans': [{
+        'Node Type': 'Index Only Scan',
+        'Relation Name': 'conversation_history',
+        'Index Name': 'ix_conversation_history_user_agent_timestamp'
+    }]
+}
+
+BITMAP_PLAN = {
+    'Node Type': 'Limit',
+    'Plans': [{
+        'Node Type': 'Sort',
+        'Plans': [{
+            'Node Type': 'Bitmap Heap Scan',
+            'Relation Name': 'conversation_history',
+            'Plans': [{
+                'Node Type': 'Bitmap Index Scan',
+                'Index Name': 'ix_conversation_history_user_agent_chat_timestamp'
+            }]
+        }]
+    }]
+}
+
+SEQ_SCAN_PLAN = {
+    'Node Type': 'Limit',
+    'Plans': [{
+        'Node Type': 'Sort',
+        'Plans': [{'Node Type': 'Seq Scan', 'Relation Name': 'conversation_history'}]
+    }]
+}
+
+
+PARTITIONED_PLAN = {
+    'Node Type': 'Limit',
+    'Plans': [{
+        'Node Type': 'Append',
+        'Plans': [
+            {
+                'Node Type': 'Index Scan',
+                'Relation Name': 'conversation_history_y2026m10',
+                'Index Name': 'conversation_history_y2026m10_user_id_agent_id_timestamp_idx'
+            },
+            {'Node Type': 'Seq Scan', 'Relation Name': 'conversation_history_y2026m09'}
+        ]
+    }]
+}
+
+
+class TestQueryPlans:
+    def test_index_only_scan_is_accepted(self):
+        assert uses_index(INDEX_ONLY_PLAN)
+        assert describe_plan(INDEX_ONLY_PLAN) == 'Index Only Scan using ix_conversation_history_user_agent_timestamp'
+
+    def test_bitmap_scan_is_accepted(self):
+        assert uses_index(BITMAP_PLAN)
+
+    def test_sequential_scan_is_rejected(self):
+        assert not uses_index(SEQ_SCAN_PLAN)
+
+    def test_plan_without_table_is_rejected(self):
+        assert not uses_index({'Node Type': 'Result'})
+
+    def test_every_partition_must_use_an_index(self):
+        assert not uses_index(PARTITIONED_PLAN)
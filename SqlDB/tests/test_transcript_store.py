@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+
+import asyncio
+from SqlDB.transcript_store import (
+    TranscriptStore,
+    compress,
+    decompress,
+    make_reference,
+    parse_reference
+)
+
+
+class TestTranscriptStore:
+    def test_reference_round_trip(self):
+        reference = make_reference('dQw4w9WgXcQ', 'pl')
+        assert reference == 'transcript:dQw4w9WgXcQ:pl'
+        assert parse_reference(reference) == ('dQw4w9WgXcQ', 'pl')
+
+    def test_plain_content_is_not_a_reference(self):
+        assert parse_reference('Full transcript text') is None
+        assert parse_reference('transcript:') is None
+
+    def test_compression_round_trip(self):
+        text = "Zażółć gęślą jaźń. " * 1000
+        content = compress(text)
+        assert len(content) < len(text.encode('utf-8')) / 10
+        assert decompress(content) == text
+
+    def test_resolve_keeps_legacy_rows(self):
+        assert asyncio.run(TranscriptStore().resolve('Full transcript text')) == 'Full transcript text'
+
+    def test_cache_is_bounded(self):
+        store = TranscriptStore()
+        for index in range(store.MAX_CACHED + 5):
+            store._remember((f"video{index}", 'en'), 'text')
+        assert len(store._cache) == store.MAX_CACHED
+        assert asyncio.run(store.get(f"video{store.MAX_CACHED + 4}", 'en')) == 'text'
+        store._cache.clear()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+
+import uuid
+from types import SimpleNamespace
+import pytest
+from SqlDB.user_cache import UserCache
+from SqlDB.user_record import UserRecord
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _user(telegram_id: int):
+    return SimpleNamespace(id=uuid.uuid4(), telegram_id=telegram_id, chat_id=telegram_id, name='User', configuration=None)
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def cache(clock):
+    cache = UserCache()
+    cache.clear()
+    cache.configure(max_size=2, ttl=60, clock=clock)
+    yield cache
+    cache.clear()
+
+
+class TestUserCache:
+    def test_lookup_by_both_ids(self, cache):
+        user = cache.add_user(1, _user(1))
+
+        assert cache.get_user(1) is user
+        assert cache.get_user_by_id(str(user.id)) is user
+        assert cache.get_user_id(1) == str(user.id)
+        assert cache.stats['hits'] == 3
+
+    def test_stale_entries_miss_by_telegram_id_only(self, cache, clock):
+        user = cache.add_user(1, _user(1))
+        clock.now = 61
+
+        assert not cache.has_user(1)
+        assert cache.get_user(1) is None
+        assert cache.stats['expirations'] == 1
+        # A request that already passed the middleware keeps seeing the user
+        assert cache.get_user_by_id(str(user.id)) is user
+        assert cache.get_user_id(1) == str(user.id)
+        assert cache.stats['size'] == 1
+
+    def test_pinned_users_are_not_evicted(self, cache):
+        first, second = _user(1), _user(2)
+        cache.add_user(1, first)
+        cache.add_user(2, second)
+        with cache.pin(1), cache.pin(2):
+            cache.add_user(3, _user(3))
+
+            assert cache.get_user_by_id(str(first.id)) is not None
+            assert cache.get_user_by_id(str(second.id)) is not None
+            assert not cache.has_user(3)
+            assert cache.stats['evictions'] == 1
+
+            # The middleware pins a user before loading it
+            with cache.pin(4):
+                cache.add_user(4, _user(4))
+                assert cache.stats['size'] == 3
+                assert cache.stats['pinned'] == 3
+        # Back to max_size once the requests are done
+        assert cache.stats['size'] == 2
+        assert cache.stats['pinned'] == 0
+
+    def test_least_recently_used_is_evicted(self, cache):
+        first, second, third = _user(1), _user(2), _user(3)
+        cache.add_user(1, first)
+        cache.add_user(2, second)
+        cache.get_user(1)
+        cache.add_user(3, third)
+
+        assert cache.has_user(1)
+        assert not cache.has_user(2)
+        assert cache.get_telegram_id(str(second.id)) is None
+        assert cache.stats['evictions'] == 1
+
+    def test_invalidate_drops_both_indexes(self, cache):
+        user = _user(1)
+        cache.add_user(1, user)
+        cache.invalidate_user_id(str(user.id))
+
+        assert cache.get_user(1) is None
+        assert cache.get_telegram_id(str(user.id)) is None
+        assert cache.stats['misses'] == 1
+
+    def test_replacing_user_resets_ttl(self, cache, clock):
+        cache.add_user(1, _user(1))
+        clock.now = 50
+        replacement = cache.add_user(1, _user(1))
+        clock.now = 100
+
+        assert cache.get_user(1) is replacement
+
+    def test_orm_users_are_cached_as_snapshots(self, cache):
+        user = _user(1)
+        user.configuration = {'language': 'pl'}
+        record = cache.add_user(1, user)
+        user.configuration['language'] = 'en'
+
+        assert isinstance(record, UserRecord)
+        assert record.id == user.id
+        assert cache.get_user(1).configuration == {'language': 'pl'}
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+
+import gc
+import tracemalloc
+import uuid
+import pytest
+from SqlDB.models import User
+from SqlDB.user_record import UserRecord
+
+CACHED_USERS = 100_000
+
+
+def _configuration(index: int) -> dict:
+    return {'language': 'pl', 'city': {'name': f"City {index}", 'lat': 52.23, 'lon': 21.01}}
+
+
+def _footprint(factory) -> tuple[int, list]:
+    gc.collect()
+    tracemalloc.start()
+    items = [factory(index) for index in range(CACHED_USERS)]
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size // CACHED_USERS, items
+
+
+def _orm_user(index: int) -> User:
+    return User(id=uuid.uuid4(), telegram_id=index, chat_id=index, name=f"User {index}", configuration=_configuration(index))
+
+
+def _user_record(index: int) -> UserRecord:
+    return UserRecord(uuid.uuid4(), index, index, f"User {index}", _configuration(index))
+
+
+class TestUserRecord:
+    def test_record_is_immutable(self):
+        record = _user_record(1)
+        with pytest.raises(AttributeError):
+            record.name = 'Other'
+        with pytest.raises(AttributeError):
+            record.extra = 'value'
+
+    def test_replace_copies_on_write(self):
+        record = _user_record(1)
+        updated = record.replace(configuration={'language': 'en'})
+
+        assert updated is not record
+        assert updated.configuration == {'language': 'en'}
+        assert record.configuration['language'] == 'pl'
+        assert updated.id == record.id
+
+    def test_from_model_parses_configuration(self):
+        user = User(id=uuid.uuid4(), telegram_id=1, chat_id=2, name='User', configuration='{"language": "en"}')
+        assert UserRecord.from_model(user).configuration == {'language': 'en'}
+
+    def test_memory_footprint_at_100k_users(self):
+        orm_size, orm_users = _footprint(_orm_user)
+        record_size, records = _footprint(_user_record)
+        print(f"\nPer user: ORM User {orm_size} bytes, UserRecord {record_size} bytes "
+              f"({CACHED_USERS} users: {orm_size * CACHED_USERS // 2**20} MiB -> {record_size * CACHED_USERS // 2**20} MiB)")
+
+        assert len(orm_users) == len(records) == CACHED_USERS
+        assert record_size < orm_size * 0.6
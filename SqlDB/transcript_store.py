@@ -0,0 +1,101 @@
+import hashlib
+import zlib
+from collections import OrderedDict
+from typing import Optional, Tuple
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from .database import AsyncSessionLocal
+from .models import YoutubeTranscript
+
+REFERENCE_PREFIX = 'transcript:'
+
+
+def make_reference(video_id: str, language: str) -> str:
+    return f"{REFERENCE_PREFIX}{video_id}:{language}"
+
+
+def parse_reference(content: str) -> Optional[Tuple[str, str]]:
+    """(video_id, language) of a transcript reference, None for any other content"""
+    if not content.startswith(REFERENCE_PREFIX):
+        return None
+    video_id, _, language = content[len(REFERENCE_PREFIX):].rpartition(':')
+    if not video_id or not language:
+        return None
+    return video_id, language
+
+
+def compress(text: str) -> bytes:
+    return zlib.compress(text.encode('utf-8'), 9)
+
+
+def decompress(content: bytes) -> str:
+    return zlib.decompress(content).decode('utf-8')
+
+
+class TranscriptStore:
+    """Compressed YouTube transcripts stored once per (video_id, language).
+
+    Conversation history only keeps a `transcript:<video_id>:<language>`
+    reference, so a video summarized by many users is stored a single time.
+    Recently used transcripts are kept decompressed in memory.
+    """
+    _instance = None
+    MAX_CACHED = 32
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance._cache = OrderedDict()
+        return cls._instance
+
+    def _remember(self, key: Tuple[str, str], text: str) -> None:
+        self._cache[key] = text
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.MAX_CACHED:
+            self._cache.popitem(last=False)
+
+    async def get(self, video_id: str, language: str) -> Optional[str]:
+        key = (video_id, language)
+        text = self._cache.get(key)
+        if text is not None:
+            self._cache.move_to_end(key)
+            return text
+
+        async with AsyncSessionLocal() as session:
+            content = (await session.execute(
+                select(YoutubeTranscript.content).where(
+                    YoutubeTranscript.video_id == video_id,
+                    YoutubeTranscript.language == language
+                )
+            )).scalar_one_or_none()
+
+        if content is None:
+            return None
+        text = decompress(content)
+        self._remember(key, text)
+        return text
+
+    async def put(self, video_id: str, language: str, text: str) -> str:
+        """Store a transcript unless it is already stored, returns its reference"""
+        encoded = text.encode('utf-8')
+        async with AsyncSessionLocal() as session:
+            await session.execute(
+                insert(YoutubeTranscript).values(
+                    video_id=video_id,
+                    language=language,
+                    content=compress(text),
+                    content_sha256=hashlib.sha256(encoded).hexdigest(),
+                    original_size=len(encoded)
+                ).on_conflict_do_nothing(index_elements=['video_id', 'language'])
+            )
+            await session.commit()
+
+        self._remember((video_id, language), text)
+        return make_reference(video_id, language)
+
+    async def resolve(self, content: str) -> Optional[str]:
+        """Transcript text of a conversation history tool row, old rows hold the text itself"""
+        reference = parse_reference(content)
+        if reference is None:
+            return content
+        return await self.get(*reference)
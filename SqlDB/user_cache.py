@@ -1,30 +1,81 @@
-from typing import Dict, Optional
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, Optional, Tuple, Union
+from sqlalchemy import select
+from config import Config
+from .database import AsyncSessionLocal
 from .models import User
+from .user_record import UserRecord
 
 class UserCache:
+    """Bounded LRU cache of users with a time to live.
+
+    Entries go stale ttl seconds after they were added: get_user() then
+    misses, so the next update of the user reloads it from the database,
+    while lookups by user_id keep returning the stale record until then.
+    When the cache is full the least recently used user that is not pinned
+    by a running request is evicted. Users are held as immutable UserRecord
+    snapshots, never as ORM objects.
+    """
     _instance = None
-    _cache: Dict[int, User] = {}  # telegram_id -> User
+    _cache: 'OrderedDict[int, Tuple[UserRecord, float]]' = OrderedDict()  # telegram_id -> (UserRecord, expires_at)
     _user_id_cache: Dict[str, int] = {}  # user_id -> telegram_id
+    _pins: Dict[int, int] = {}  # telegram_id -> requests using the user
 
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super().__new__(cls)
+            config = Config.from_env()
+            cls._instance.configure(config.user_cache_max_size, config.user_cache_ttl_seconds)
         return cls._instance
 
-    def get_user(self, telegram_id: int) -> Optional[User]:
-        """Get user by telegram_id - O(1) access"""
-        return self._cache.get(telegram_id)
+    def configure(self, max_size: int, ttl: float, clock: Callable[[], float] = time.monotonic) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        self._clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _lookup(self, telegram_id: int, allow_stale: bool) -> Optional[UserRecord]:
+        entry = self._cache.get(telegram_id)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        user, expires_at = entry
+        if not allow_stale and expires_at <= self._clock():
+            # Kept for lookups by user_id until the caller reloads the user
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        self._cache.move_to_end(telegram_id)
+        self.hits += 1
+        return user
 
-    def get_user_by_id(self, user_id: str) -> Optional[User]:
-        """Get user by user_id (from DB) - O(1) access"""
+    def _remove(self, telegram_id: int) -> None:
+        entry = self._cache.pop(telegram_id, None)
+        if entry is not None:
+            self._user_id_cache.pop(str(entry[0].id), None)
+
+    def get_user(self, telegram_id: int) -> Optional[UserRecord]:
+        """Get a user that is not stale by telegram_id - O(1) access"""
+        return self._lookup(telegram_id, allow_stale=False)
+
+    def get_user_by_id(self, user_id: str) -> Optional[UserRecord]:
+        """Get user by user_id (from DB), stale or not - O(1) access"""
         telegram_id = self._user_id_cache.get(user_id)
         if telegram_id:
-            return self._cache.get(telegram_id)
+            return self._lookup(telegram_id, allow_stale=True)
+        self.misses += 1
         return None
 
     def get_user_id(self, telegram_id: int) -> str:
         """Get user_id (from DB) by telegram_id - O(1) access"""
-        user = self.get_user(telegram_id)
+        user = self._lookup(telegram_id, allow_stale=True)
         if user is None:
             raise ValueError(f"User with telegram_id {telegram_id} not found in cache")
         return str(user.id)
@@ -33,11 +84,89 @@ class UserCache:
         """Get telegram_id by user_id (from DB) - O(1) access"""
         return self._user_id_cache.get(user_id)
 
-    def add_user(self, telegram_id: int, user: User) -> None:
-        """Add user to both caches - O(1) operation"""
-        self._cache[telegram_id] = user
+    def add_user(self, telegram_id: int, user: Union[User, UserRecord]) -> UserRecord:
+        """Add or replace user in both caches - O(1) operation. ORM users are turned into snapshots"""
+        if not isinstance(user, UserRecord):
+            user = UserRecord.from_model(user)
+        self._remove(telegram_id)
+        self._cache[telegram_id] = (user, self._clock() + self.ttl)
         self._user_id_cache[str(user.id)] = telegram_id
+        self._evict()
+        return user
+
+    def _evict(self) -> None:
+        """Drop least recently used users until the cache fits, pinned users are skipped"""
+        excess = len(self._cache) - self.max_size
+        if excess <= 0:
+            return
+        evicted = []
+        for telegram_id in self._cache:
+            if telegram_id not in self._pins:
+                evicted.append(telegram_id)
+                if len(evicted) == excess:
+                    break
+        for telegram_id in evicted:
+            self._remove(telegram_id)
+        self.evictions += len(evicted)
+
+    @contextmanager
+    def pin(self, telegram_id: int) -> Iterator[None]:
+        """Keep the user from being evicted while a request is using it"""
+        self._pins[telegram_id] = self._pins.get(telegram_id, 0) + 1
+        try:
+            yield
+        finally:
+            remaining = self._pins[telegram_id] - 1
+            if remaining:
+                self._pins[telegram_id] = remaining
+            else:
+                del self._pins[telegram_id]
+                self._evict()
 
     def has_user(self, telegram_id: int) -> bool:
-        """Check if user exists by telegram_id - O(1) access"""
-        return telegram_id in self._cache
+        """Check if an entry that is not stale exists by telegram_id - O(1) access"""
+        entry = self._cache.get(telegram_id)
+        return entry is not None and entry[1] > self._clock()
+
+    def invalidate(self, telegram_id: int) -> None:
+        """Drop a user, the next update reloads it from the database"""
+        self._remove(telegram_id)
+
+    def invalidate_user_id(self, user_id: str) -> None:
+        telegram_id = self._user_id_cache.get(user_id)
+        if telegram_id is not None:
+            self._remove(telegram_id)
+
+    def clear(self) -> None:
+        self._cache.clear()
+        self._user_id_cache.clear()
+        self._pins.clear()
+
+    async def warm_up(self, telegram_ids: Iterable[int]) -> int:
+        """Load all given users in a single query"""
+        telegram_ids = list(telegram_ids)
+        if not telegram_ids:
+            return 0
+
+        async with AsyncSessionLocal() as session:
+            rows = (await session.execute(
+                select(User.id, User.telegram_id, User.chat_id, User.name, User.configuration).where(
+                    User.telegram_id.in_(telegram_ids)
+                )
+            )).all()
+
+        for row in rows:
+            self.add_user(row.telegram_id, UserRecord(*row))
+        return len(rows)
+
+    @property
+    def stats(self) -> dict:
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'size': len(self._cache),
+            'max_size': self.max_size,
+            'pinned': len(self._pins)
+        }
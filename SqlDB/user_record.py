@@ -0,0 +1,47 @@
+import copy
+import json
+import uuid
+from typing import Optional
+
+class UserRecord:
+    """Immutable snapshot of a users row, what UserCache holds instead of ORM objects.
+
+    Attributes can not be assigned, replace() returns an updated copy. The
+    configuration is a private deep copy of the stored JSON and must not be
+    mutated either.
+    """
+    __slots__ = ('id', 'telegram_id', 'chat_id', 'name', 'configuration')
+
+    def __init__(self, id: uuid.UUID, telegram_id: int, chat_id: int, name: Optional[str], configuration: Optional[dict]):
+        if isinstance(configuration, str):
+            configuration = json.loads(configuration)
+        object.__setattr__(self, 'id', id)
+        object.__setattr__(self, 'telegram_id', telegram_id)
+        object.__setattr__(self, 'chat_id', chat_id)
+        object.__setattr__(self, 'name', name)
+        object.__setattr__(self, 'configuration', configuration)
+
+    @classmethod
+    def from_model(cls, user) -> 'UserRecord':
+        return cls(user.id, user.telegram_id, user.chat_id, user.name, copy.deepcopy(user.configuration))
+
+    def replace(self, **changes) -> 'UserRecord':
+        values = {name: getattr(self, name) for name in self.__slots__}
+        values.update(changes)
+        return UserRecord(**values)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"UserRecord is immutable, use replace({name}=...)")
+
+    def __delattr__(self, name):
+        raise AttributeError("UserRecord is immutable")
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, UserRecord):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"UserRecord(id={self.id!r}, telegram_id={self.telegram_id!r})"
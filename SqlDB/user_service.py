@@ -1,12 +1,17 @@
-from sqlalchemy.orm import Session
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
 from .models import User
 
-def create_user(db: Session, telegram_id: int, chat_id: int, first_name: str) -> User:
-    user = User(telegram_id=telegram_id, chat_id=chat_id, name=first_name)
-    db.add(user)
-    db.commit()
-    db.refresh(user)
-    return user
+async def upsert_user(db: AsyncSession, telegram_id: int, chat_id: int, first_name: str) -> User:
+    """Insert the user or update its chat_id and name in one statement, returns the stored row.
 
-def get_user_by_telegram_id(db: Session, telegram_id: int) -> User | None:
-    return db.query(User).filter(User.telegram_id == telegram_id).first() 
\ No newline at end of file
+    New users start with NULL configuration, the configuration of existing users is left untouched.
+    """
+    statement = insert(User).values(telegram_id=telegram_id, chat_id=chat_id, name=first_name)
+    statement = statement.on_conflict_do_update(
+        index_elements=[User.telegram_id],
+        set_={'chat_id': statement.excluded.chat_id, 'name': statement.excluded.name}
+    ).returning(User)
+    user = (await db.execute(statement)).scalar_one()
+    await db.commit()
+    return user
@@ -3,4 +3,5 @@ from telegram.ext import ContextTypes
 
 async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await update.message.reply_text("/start - Start the bot")
-    await update.message.reply_text("/help - Get help")
\ No newline at end of file
+    await update.message.reply_text("/help - Get help")
+    await update.message.reply_text("/reload_agents - Reload agents after changing the agents table")
\ No newline at end of file
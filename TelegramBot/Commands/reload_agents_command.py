@@ -0,0 +1,15 @@
+from telegram import Update
+from telegram.ext import ContextTypes
+from TelegramBot.Tools.auth_decorator import restricted
+from AgentsCore.Rooter.agent_rooter import get_agent_rooter
+
+@restricted
+async def reload_agents_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    try:
+        loaded_agents = await get_agent_rooter().reload_agents()
+    except Exception as e:
+        print(f"Could not reload agents: {e}")
+        await update.message.reply_text("Could not reload agents")
+        return
+    print(f"Reloaded {loaded_agents} agents")
+    await update.message.reply_text(f"Reloaded {loaded_agents} agents")
@@ -2,13 +2,15 @@ from telegram import Update
 from telegram.ext import ContextTypes
 import os
 from TelegramBot.Tools.auth_decorator import restricted
+from TelegramBot.Tools.user_lock_decorator import serialized_per_user
 from SqlDB.middleware import update_db_user
 from AgentsCore.Rooter.agent_rooter import get_agent_rooter
 from SqlDB.user_cache import UserCache
-from Modules.MessageProcessor.message_processor import MessageProcessor, Message
+from Modules.MessageProcessor.message_processor import MessageProcessor
 from Modules.UserManager.user_manager import UserManager
 
 @restricted
+@serialized_per_user
 @update_db_user
 async def handle_image(update: Update, context: ContextTypes.DEFAULT_TYPE):
     photo = update.message.photo[-1]
@@ -33,7 +35,7 @@ async def handle_image(update: Update, context: ContextTypes.DEFAULT_TYPE):
     
     message_obj = MessageProcessor.create_message(text, user_language, ui_language, user_id)
     
-    get_agent_rooter().switch(message_obj)
+    get_agent_rooter().route(message_obj)
 
     await update.message.reply_text("Image processed")
     
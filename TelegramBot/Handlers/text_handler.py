@@ -1,14 +1,16 @@
 from telegram import Update
 from telegram.ext import ContextTypes
 from TelegramBot.Tools.auth_decorator import restricted
+from TelegramBot.Tools.user_lock_decorator import serialized_per_user
 from TelegramBot.Tools.streaming_handler import TelegramStreamingHandler
 from SqlDB.middleware import update_db_user
 from SqlDB.user_cache import UserCache
 from AgentsCore.Rooter.agent_rooter import get_agent_rooter
-from Modules.MessageProcessor.message_processor import MessageProcessor, Message
+from Modules.MessageProcessor.message_processor import MessageProcessor
 from Modules.UserManager.user_manager import UserManager
 
 @restricted
+@serialized_per_user
 @update_db_user
 async def handle_text(update: Update, context: ContextTypes.DEFAULT_TYPE):
     message_type: str = update.message.chat.type
@@ -34,22 +36,18 @@ async def handle_text(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     message_obj = MessageProcessor.create_message(text, user_language, ui_language, user_id)
     
-    which_agent_response = get_agent_rooter().check_which_agent_query(message_obj)
-    if which_agent_response:
-        await update.message.reply_text(which_agent_response)
-        return
-    
-    switch_message = get_agent_rooter().switch(message_obj)
-    if switch_message:
-        await update.message.reply_text(switch_message)
+    agent_rooter = get_agent_rooter()
+    decision = agent_rooter.route(message_obj)
+    if decision.reply:
+        await update.message.reply_text(decision.reply)
 
-    if not MessageProcessor.should_process_message(message_obj.text):
+    if not decision.forward:
         return
 
     async def send_message(text: str):
         await update.message.reply_text(text)
     
     streaming_handler = TelegramStreamingHandler(update)
-    response = await get_agent_rooter().ask_current_agent(message_obj, send_message, streaming_handler.stream_chunk)
+    response = await agent_rooter.dispatch(decision, send_message, streaming_handler.stream_chunk)
     
     await streaming_handler.finalize(response)
\ No newline at end of file
@@ -3,14 +3,16 @@ from telegram.ext import ContextTypes
 import os
 from config import Config
 from TelegramBot.Tools.auth_decorator import restricted
+from TelegramBot.Tools.user_lock_decorator import serialized_per_user
 from Modules.SpeechHelper.speech_helper import SpeechHelper
 from AgentsCore.Rooter.agent_rooter import get_agent_rooter
 from SqlDB.user_cache import UserCache
 from SqlDB.middleware import update_db_user
-from Modules.MessageProcessor.message_processor import MessageProcessor, Message
+from Modules.MessageProcessor.message_processor import MessageProcessor
 from Modules.UserManager.user_manager import UserManager
 
 @restricted
+@serialized_per_user
 @update_db_user
 async def handle_voice(update: Update, context: ContextTypes.DEFAULT_TYPE):
     audio_file = await context.bot.get_file(update.message.voice.file_id)
@@ -35,22 +37,17 @@ async def handle_voice(update: Update, context: ContextTypes.DEFAULT_TYPE):
     
     message_obj = MessageProcessor.create_message(transcribed_text, user_language, ui_language, user_id)
     
-    which_agent_response = get_agent_rooter().check_which_agent_query(message_obj)
-    if which_agent_response:
-        await update.message.reply_text(which_agent_response)
-        os.remove(audio_path)
-        return
+    agent_rooter = get_agent_rooter()
+    decision = agent_rooter.route(message_obj)
     
-    switched = get_agent_rooter().switch(message_obj)
+    if decision.reply:
+        await update.message.reply_text(decision.reply)
     
-    if switched:
-        await update.message.reply_text(f"Switched to agent: {get_agent_rooter().current_agents[user_id]['name']}")
+    os.remove(audio_path)
     
-    if not MessageProcessor.should_process_message(message_obj.text):
+    if not decision.forward:
         return
     
-    os.remove(audio_path)
-    
     if Config.from_env().voice_response:
         await update.message.reply_text(transcribed_text)
         return
@@ -58,7 +55,7 @@ async def handle_voice(update: Update, context: ContextTypes.DEFAULT_TYPE):
     async def send_message(text: str):
         await update.message.reply_text(text)
     
-    response = await get_agent_rooter().ask_current_agent(message_obj, send_message)
+    response = await agent_rooter.dispatch(decision, send_message)
     
     response_audio_path = f'./audio/response_{update.message.message_id}.mp3'
     await speech_manager.text_to_speech(response, response_audio_path)
@@ -9,6 +9,7 @@ class TelegramStreamingHandler:
     def __init__(self, update: Update, update_interval: float = 3.0, char_update_threshold: int = 100):
         self.update = update
         self.streaming_message: Message = None
+        self.displayed_text = None
         self.last_update_time = 0
         self.pending_text = None
         self.update_interval = update_interval
@@ -30,6 +31,7 @@ class TelegramStreamingHandler:
         
         if self.streaming_message is None:
             self.streaming_message = await self.update.message.reply_text(display_text)
+            self.displayed_text = display_text
             self.last_update_time = current_time
             self.last_char_count = len(accumulated)
         else:
@@ -44,6 +46,7 @@ class TelegramStreamingHandler:
             if should_update:
                 try:
                     await self.streaming_message.edit_text(display_text)
+                    self.displayed_text = display_text
                     self.last_update_time = current_time
                     self.last_char_count = len(accumulated)
                     self.pending_text = None
@@ -66,6 +69,10 @@ class TelegramStreamingHandler:
         if len(final_text) > max_length:
             display_text += "..."
         
+        if self.streaming_message and display_text == self.displayed_text:
+            # Everything was streamed already, Telegram rejects an edit that changes nothing
+            return
+        
         if self.streaming_message:
             current_time = time.time()
             if current_time < self.flood_control_until:
@@ -0,0 +1,12 @@
+from functools import wraps
+from AgentsCore.Rooter.agent_rooter import get_agent_rooter
+
+def serialized_per_user(func):
+    """Run updates of the same Telegram user one at a time, other users in parallel"""
+    @wraps(func)
+    async def wrapped(update, context, *args, **kwargs):
+        if not update.effective_user:
+            return await func(update, context, *args, **kwargs)
+        async with get_agent_rooter().user_lock(update.effective_user.id):
+            return await func(update, context, *args, **kwargs)
+    return wrapped
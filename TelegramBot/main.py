@@ -12,20 +12,65 @@ from TelegramBot.Handlers.text_handler import handle_text
 from TelegramBot.Commands.start_command import start_command
 from TelegramBot.Commands.help_command import help_command
 from TelegramBot.Commands.version_command import version_command
+from TelegramBot.Commands.reload_agents_command import reload_agents_command
 from TelegramBot.Handlers.errors_handler import error
+from Modules.TranslationTools.catalog_registry import TranslationCatalogRegistry
+from SqlDB.agent_item_cache import AgentItemCache
+from SqlDB.user_cache import UserCache
+from SqlDB.database import dispose_engines
+from SqlDB.conversation_storage import get_conversation_storage
+from SqlDB.partition_maintenance import PartitionMaintenance
+from Modules.OpenAI.llm_client_registry import LLMClientRegistry
+from AgentsCore.Rooter.agent_rooter import get_agent_rooter
 import logging
 
 config = Config.from_env()
 config.validate()
 
+async def post_init(app: Application):
+    await get_agent_rooter().load_agents()
+    
+    try:
+        created = await PartitionMaintenance().ensure_partitions()
+        print(f"Created conversation history partitions: {created}")
+    except Exception as e:
+        print(f"Could not create conversation history partitions: {e}")
+    
+    try:
+        cached_users = await UserCache().warm_up(config.allowed_user_ids)
+        print(f"Loaded {cached_users} users")
+    except Exception as e:
+        print(f"Could not preload users: {e}")
+    
+    try:
+        loaded_users = await AgentItemCache().warm_up(config.allowed_user_ids)
+        print(f"Loaded agent items for {loaded_users} users")
+    except Exception as e:
+        print(f"Could not preload agent items: {e}")
+
+async def post_shutdown(app: Application):
+    await get_conversation_storage().close()
+    await LLMClientRegistry.get_instance().aclose()
+    await dispose_engines()
+
 def start():
     print("Starting bot...")
     
-    app = Application.builder().token(config.telegram_bot_token).build()
+    TranslationCatalogRegistry().load()
+    
+    app = (
+        Application.builder()
+        .token(config.telegram_bot_token)
+        .concurrent_updates(config.concurrent_updates)
+        .post_init(post_init)
+        .post_shutdown(post_shutdown)
+        .build()
+    )
     
     app.add_handler(CommandHandler("start", start_command))
     app.add_handler(CommandHandler("help", help_command))
     app.add_handler(CommandHandler("version", version_command))
+    app.add_handler(CommandHandler("reload_agents", reload_agents_command))
     
     app.add_handler(MessageHandler(filters.TEXT, handle_text))
     app.add_handler(MessageHandler(filters.VOICE, handle_voice))
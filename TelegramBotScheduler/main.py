@@ -7,6 +7,12 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from config import Config
 from Modules.Scheduler.scheduler import SchedulerService
+from Modules.TranslationTools.catalog_registry import TranslationCatalogRegistry
+from SqlDB.agent_item_cache import AgentItemCache
+from SqlDB.user_cache import UserCache
+from SqlDB.database import dispose_engines
+from SqlDB.conversation_storage import get_conversation_storage
+from Modules.OpenAI.llm_client_registry import LLMClientRegistry
 
 logging.basicConfig(
     level=logging.INFO,
@@ -21,6 +27,20 @@ async def main():
     config = Config.from_env()
     config.validate()
     
+    TranslationCatalogRegistry().load()
+    
+    try:
+        cached_users = await UserCache().warm_up(config.allowed_user_ids)
+        logger.info(f"Loaded {cached_users} users")
+    except Exception as e:
+        logger.error(f"Could not preload users: {e}")
+    
+    try:
+        loaded_users = await AgentItemCache().warm_up(config.allowed_user_ids)
+        logger.info(f"Loaded agent items for {loaded_users} users")
+    except Exception as e:
+        logger.error(f"Could not preload agent items: {e}")
+    
     scheduler_service = SchedulerService(config)
     
     try:
@@ -38,6 +58,9 @@ async def main():
         logger.error(f"Error in scheduler service: {e}")
     finally:
         await scheduler_service.stop()
+        await get_conversation_storage().close()
+        await LLMClientRegistry.get_instance().aclose()
+        await dispose_engines()
         logger.info("Scheduler service stopped.")
 
 if __name__ == "__main__":
@@ -0,0 +1,58 @@
+"""conversation history indexes
+
+Revision ID: 001
+Revises: 000
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '001'
+down_revision: Union[str, None] = '000'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        # get_last_session_id: index-only scan thanks to the included session_id
+        op.create_index(
+            'ix_conversation_history_user_agent_timestamp',
+            'conversation_history',
+            ['user_id', 'agent_id', sa.text('"timestamp" DESC')],
+            postgresql_include=['session_id'],
+            postgresql_concurrently=True,
+            if_not_exists=True
+        )
+        # get_conversation_history with exclude_tool_calls, tool rows are left out of the index
+        op.create_index(
+            'ix_conversation_history_user_agent_chat_timestamp',
+            'conversation_history',
+            ['user_id', 'agent_id', sa.text('"timestamp" DESC')],
+            postgresql_where=sa.text("role <> 'tool'"),
+            postgresql_concurrently=True,
+            if_not_exists=True
+        )
+        # get_conversation_history filtered by session_id
+        op.create_index(
+            'ix_conversation_history_user_agent_session_timestamp',
+            'conversation_history',
+            ['user_id', 'agent_id', 'session_id', sa.text('"timestamp" DESC')],
+            postgresql_concurrently=True,
+            if_not_exists=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_conversation_history_user_agent_session_timestamp', table_name='conversation_history',
+                      postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_conversation_history_user_agent_chat_timestamp', table_name='conversation_history',
+                      postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_conversation_history_user_agent_timestamp', table_name='conversation_history',
+                      postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,107 @@
+"""partition conversation history by month
+
+Revision ID: 002
+Revises: 001
+Create Date: 2026-10-17 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+from datetime import datetime
+
+from alembic import op
+from sqlalchemy import text
+
+# revision identifiers, used by Alembic.
+revision: str = '002'
+down_revision: Union[str, None] = '001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Same as PartitionMaintenance.MONTHS_AHEAD, the scheduler keeps creating them afterwards
+MONTHS_AHEAD = 3
+
+COLUMNS = 'id, user_id, agent_id, role, content, "timestamp", session_id'
+
+INDEXES = {
+    'ix_conversation_history_user_agent_timestamp':
+        '(user_id, agent_id, "timestamp" DESC) INCLUDE (session_id)',
+    'ix_conversation_history_user_agent_chat_timestamp':
+        '(user_id, agent_id, "timestamp" DESC) WHERE role <> \'tool\'',
+    'ix_conversation_history_user_agent_session_timestamp':
+        '(user_id, agent_id, session_id, "timestamp" DESC)',
+}
+
+
+def _add_months(month: datetime, months: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def _create_indexes() -> None:
+    for name, definition in INDEXES.items():
+        op.execute(f'CREATE INDEX {name} ON conversation_history {definition}')
+
+
+def _drop_indexes() -> None:
+    for name in INDEXES:
+        op.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+def upgrade() -> None:
+    conn = op.get_bind()
+
+    op.execute('ALTER TABLE conversation_history RENAME TO conversation_history_legacy')
+    op.execute('ALTER TABLE conversation_history_legacy RENAME CONSTRAINT conversation_history_pkey TO conversation_history_legacy_pkey')
+    _drop_indexes()
+
+    # The partition key has to be part of the primary key
+    op.execute('''
+        CREATE TABLE conversation_history (
+            id UUID NOT NULL DEFAULT uuid_generate_v4(),
+            user_id UUID NOT NULL REFERENCES users(id),
+            agent_id UUID NOT NULL REFERENCES agents(id),
+            role VARCHAR(50) NOT NULL,
+            content TEXT NOT NULL,
+            "timestamp" TIMESTAMP NOT NULL DEFAULT now(),
+            session_id VARCHAR(255) NOT NULL,
+            PRIMARY KEY (id, "timestamp")
+        ) PARTITION BY RANGE ("timestamp")
+    ''')
+    # Indexes on the parent are created on every partition
+    _create_indexes()
+
+    now = datetime.utcnow()
+    oldest = conn.execute(text('SELECT min("timestamp") FROM conversation_history_legacy')).scalar() or now
+    month = datetime(oldest.year, oldest.month, 1)
+    last_month = _add_months(datetime(now.year, now.month, 1), MONTHS_AHEAD)
+    while month <= last_month:
+        op.execute(
+            f"CREATE TABLE conversation_history_y{month:%Y}m{month:%m} PARTITION OF conversation_history "
+            f"FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{_add_months(month, 1):%Y-%m-%d}')"
+        )
+        month = _add_months(month, 1)
+
+    op.execute(f'INSERT INTO conversation_history ({COLUMNS}) SELECT {COLUMNS} FROM conversation_history_legacy')
+    op.execute('DROP TABLE conversation_history_legacy')
+
+
+def downgrade() -> None:
+    op.execute('ALTER TABLE conversation_history RENAME TO conversation_history_partitioned')
+    _drop_indexes()
+
+    op.execute('''
+        CREATE TABLE conversation_history_plain (
+            id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+            user_id UUID NOT NULL REFERENCES users(id),
+            agent_id UUID NOT NULL REFERENCES agents(id),
+            role VARCHAR(50) NOT NULL,
+            content TEXT NOT NULL,
+            "timestamp" TIMESTAMP NOT NULL DEFAULT now(),
+            session_id VARCHAR(255) NOT NULL
+        )
+    ''')
+    op.execute(f'INSERT INTO conversation_history_plain ({COLUMNS}) SELECT {COLUMNS} FROM conversation_history_partitioned')
+    op.execute('DROP TABLE conversation_history_partitioned')
+    op.execute('ALTER TABLE conversation_history_plain RENAME TO conversation_history')
+    op.execute('ALTER TABLE conversation_history RENAME CONSTRAINT conversation_history_plain_pkey TO conversation_history_pkey')
+    _create_indexes()
@@ -0,0 +1,33 @@
+"""youtube transcripts
+
+Revision ID: 003
+Revises: 002
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '003'
+down_revision: Union[str, None] = '002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'youtube_transcripts',
+        sa.Column('video_id', sa.String(32), primary_key=True),
+        sa.Column('language', sa.String(10), primary_key=True),
+        sa.Column('content', sa.LargeBinary(), nullable=False),
+        sa.Column('content_sha256', sa.String(64), nullable=False),
+        sa.Column('original_size', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False, server_default=sa.func.now())
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('youtube_transcripts')
@@ -0,0 +1,40 @@
+"""agent sessions
+
+Revision ID: 004
+Revises: 003
+Create Date: 2026-10-17 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '004'
+down_revision: Union[str, None] = '003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'agent_sessions',
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('users.id'), primary_key=True),
+        sa.Column('agent_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('agents.id'), primary_key=True),
+        sa.Column('session_id', sa.String(255), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False, server_default=sa.func.now())
+    )
+
+    # Current session of every user-agent pair that already has history
+    op.execute('''
+        INSERT INTO agent_sessions (user_id, agent_id, session_id, updated_at)
+        SELECT DISTINCT ON (user_id, agent_id) user_id, agent_id, session_id, "timestamp"
+        FROM conversation_history
+        ORDER BY user_id, agent_id, "timestamp" DESC
+    ''')
+
+
+def downgrade() -> None:
+    op.drop_table('agent_sessions')
@@ -0,0 +1,27 @@
+"""conversation history token count
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-17 17:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '005'
+down_revision: Union[str, None] = '004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Nullable without a default, so adding it does not rewrite any partition.
+    # Older rows are counted when they are loaded into a prompt.
+    op.add_column('conversation_history', sa.Column('token_count', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('conversation_history', 'token_count')
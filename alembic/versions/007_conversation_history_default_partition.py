@@ -0,0 +1,32 @@
+"""conversation history default partition
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+from sqlalchemy import text
+
+# revision identifiers, used by Alembic.
+revision: str = '007'
+down_revision: Union[str, None] = '006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Takes rows of months without a partition, PartitionMaintenance moves them into one
+    op.execute('CREATE TABLE conversation_history_default PARTITION OF conversation_history DEFAULT')
+
+
+def downgrade() -> None:
+    conn = op.get_bind()
+    rows = conn.execute(text('SELECT count(*) FROM conversation_history_default')).scalar()
+    if rows:
+        raise RuntimeError(
+            f"conversation_history_default holds {rows} rows, run partition maintenance to move them before downgrading"
+        )
+    op.execute('DROP TABLE conversation_history_default')
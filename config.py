@@ -25,6 +25,22 @@ class Config:
     proxy_username: str
     proxy_password: str
     youtube_api_key: str
+    agent_pool_max_size: int
+    agent_pool_idle_seconds: float
+    concurrent_updates: int
+    history_batch_size: int
+    history_flush_interval: float
+    history_retention_days: int
+    history_archive_dir: str
+    user_cache_max_size: int
+    user_cache_ttl_seconds: float
+    conversation_storage: str
+    conversation_memory_max_histories: int
+    context_token_budget: int
+    conversation_summary_threshold: int
+    conversation_vector_top_k: int
+    conversation_vector_max_messages: int
+    conversation_history_window: int
 
     @classmethod
     def from_env(cls) -> 'Config':
@@ -51,7 +67,23 @@ class Config:
             time_zone=os.getenv("TIME_ZONE", "UTC"),
             proxy_username=os.getenv("PROXY_USERNAME", ""),
             proxy_password=os.getenv("PROXY_PASSWORD", ""),
-            youtube_api_key=os.getenv("YOUTUBE_API_KEY", "")
+            youtube_api_key=os.getenv("YOUTUBE_API_KEY", ""),
+            agent_pool_max_size=int(os.getenv("AGENT_POOL_MAX_SIZE", "256")),
+            agent_pool_idle_seconds=float(os.getenv("AGENT_POOL_IDLE_SECONDS", "1800")),
+            concurrent_updates=int(os.getenv("CONCURRENT_UPDATES", "64")),
+            history_batch_size=int(os.getenv("HISTORY_BATCH_SIZE", "100")),
+            history_flush_interval=float(os.getenv("HISTORY_FLUSH_INTERVAL_SECONDS", "1.0")),
+            history_retention_days=int(os.getenv("HISTORY_RETENTION_DAYS", "0")),
+            history_archive_dir=os.getenv("HISTORY_ARCHIVE_DIR", "archive"),
+            user_cache_max_size=int(os.getenv("USER_CACHE_MAX_SIZE", "1024")),
+            user_cache_ttl_seconds=float(os.getenv("USER_CACHE_TTL_SECONDS", "3600")),
+            conversation_storage=os.getenv("CONVERSATION_STORAGE", "postgres"),
+            conversation_memory_max_histories=int(os.getenv("CONVERSATION_MEMORY_MAX_HISTORIES", "1024")),
+            context_token_budget=int(os.getenv("CONTEXT_TOKEN_BUDGET", "16000")),
+            conversation_summary_threshold=int(os.getenv("CONVERSATION_SUMMARY_THRESHOLD", "20")),
+            conversation_vector_top_k=int(os.getenv("CONVERSATION_VECTOR_TOP_K", "4")),
+            conversation_vector_max_messages=int(os.getenv("CONVERSATION_VECTOR_MAX_MESSAGES", "10000")),
+            conversation_history_window=int(os.getenv("CONVERSATION_HISTORY_WINDOW", "40"))
     )
 
     def validate(self) -> None: